@@ -0,0 +1,360 @@
+"""
+Test obciążeniowy jednego serwera `streamlit run orbita.py` dla N równoległych sesji.
+
+Skrypt uruchamia lokalny serwer Streamlit (albo łączy się z działającym,
+--url) i otwiera N połączeń websocket - tak jak N kart przeglądarki. Każda
+sesja wysyła te same wiadomości co frontend (BackMsg rerun_script z
+protokołu Streamlit): wejście na stronę główną, przejścia między stronami
+z menu i losowe przełączanie filtrów w sidebarze. Wszystkie sesje dzielą
+cache serwera (st.cache_data / st.cache_resource), więc mierzona jest
+rzeczywista pojemność jednego procesu.
+
+Mierzone są czasy każdego rerun (od wysłania BackMsg do script_finished,
+p50/p95 per strona), czas CPU i pamięć (RSS) procesu serwera. Reruny strony
+rozpoczęte, zanim jakakolwiek sesja skończyła pierwszy rerun tej strony,
+są raportowane jako "zimne" (cache serwera jeszcze pusty).
+
+Użycie:
+    python -m benchmarks.loadtest --sessions 8 --iterations 3
+    python -m benchmarks.loadtest --sessions 16 --pages Wykresy Statystyki
+    python -m benchmarks.loadtest --url http://serwer:8501 --sessions 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+
+APP_PATH = "orbita.py"
+# strony po ścieżce URL (url_pathname z st.navigation, "" = strona domyślna)
+DEFAULT_PAGES = ("Trasa", "Wykresy", "Statystyki")
+RESULTS_DIR = os.path.join("benchmarks", "results")
+SIDEBAR = 1  # pierwszy element delta_path dla elementów w st.sidebar
+
+
+# ========================
+# Serwer
+# ========================
+
+def start_server(port, timeout_s=60):
+    """Uruchamia `streamlit run orbita.py` w tle i czeka na /_stcore/health."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Serwer Streamlit zakończył się z kodem {server.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"Serwer Streamlit nie odpowiada po {timeout_s} s")
+
+
+def _proc_cpu_s(pid):
+    """Czas CPU procesu (user + system) [s] z /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _proc_rss_mb(pid):
+    """(bieżące RSS, szczytowe RSS) procesu [MB] z /proc/<pid>/status."""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values.get("VmRSS", 0.0), values.get("VmHWM", 0.0)
+
+
+# ========================
+# Klient websocket
+# ========================
+
+async def _connect(url):
+    """
+    Połączenie websocket z /_stcore/stream; zwraca (send, recv, close).
+
+    Streamlit do 1.4x działa na tornado, nowsze wersje na starlette +
+    websockets - używany jest klient tej biblioteki, która jest zainstalowana.
+    """
+    try:
+        from tornado.websocket import websocket_connect
+    except ImportError:
+        import websockets
+
+        ws = await websockets.connect(url, subprotocols=["streamlit"], max_size=None)
+        return ws.send, ws.recv, ws.close
+    ws = await websocket_connect(url, subprotocols=["streamlit"], max_message_size=2**30)
+
+    async def send(data):
+        await ws.write_message(data, binary=True)
+
+    async def close():
+        ws.close()
+
+    return send, ws.read_message, close
+
+
+def _pills_state(widget_id, options, chosen):
+    """WidgetState dla st.pills (multi) w formacie serwera."""
+    from streamlit.proto.ButtonGroup_pb2 import ButtonGroup
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    state = WidgetState(id=widget_id)
+    if "value" in ButtonGroup.DESCRIPTOR.fields_by_name:
+        # Streamlit <= 1.4x: indeksy wybranych opcji
+        state.int_array_value.data[:] = [options.index(o) for o in chosen]
+    else:
+        # nowsze wersje: etykiety opcji
+        state.string_array_value.data[:] = chosen
+    return state
+
+
+class Session:
+    """Jedna sesja przeglądarki: połączenie websocket + stan widżetów bieżącej strony."""
+
+    def __init__(self, session_id, base_url, rng, timeout_s):
+        self.session_id = session_id
+        self.url = base_url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.rng = rng
+        self.timeout_s = timeout_s
+        self.pages = {}      # url_pathname -> page_script_hash
+        self.filters = {}    # id widżetu -> lista opcji (pills w sidebarze)
+        self.widget_states = {}
+        self.page_hash = ""
+
+    async def open(self):
+        self._send, self._recv, self._close = await _connect(self.url)
+
+    async def close(self):
+        await self._close()
+
+    async def rerun(self):
+        """Wysyła rerun_script i czeka na koniec skryptu; zwraca (czas [s], czy wyjątek)."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_hash
+        msg.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        t0 = time.perf_counter()
+        await self._send(msg.SerializeToString())
+
+        error = False
+        while True:
+            data = await asyncio.wait_for(self._recv(), self.timeout_s)
+            if data is None:
+                raise ConnectionError("Serwer zamknął połączenie")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {p.url_pathname: p.page_script_hash for p in fwd.navigation.app_pages}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                if element.WhichOneof("type") == "exception":
+                    error = True
+                elif element.WhichOneof("type") == "button_group" and fwd.metadata.delta_path[0] == SIDEBAR:
+                    self.filters[element.button_group.id] = [o.content for o in element.button_group.options]
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - t0, error
+
+    def switch_page(self, page):
+        if page not in self.pages:
+            raise ValueError(f"Nieznana strona {page!r}, dostępne: {sorted(self.pages)}")
+        self.page_hash = self.pages[page]
+        self.filters = {}
+        self.widget_states = {}
+
+    def toggle_filter(self):
+        """Losowa zmiana jednego filtra w sidebarze - zawsze zostaje co najmniej jedna wartość."""
+        if not self.filters:
+            return False
+        widget_id = self.rng.choice(list(self.filters))
+        options = self.filters[widget_id]
+        chosen = self.rng.sample(options, self.rng.randint(1, len(options)))
+        self.widget_states[widget_id] = _pills_state(widget_id, options, chosen)
+        return True
+
+
+async def run_session(session_id, base_url, pages, iterations, toggles, think_s, timeout_s, seed, first_done):
+    """
+    Przebieg jednej sesji; zwraca listę pomiarów.
+
+    Pomiar: (strona, akcja, czas [s], czy zimny, czy wyjątek). first_done to
+    wspólny dla sesji zbiór stron, których pierwszy rerun już się skończył.
+    """
+    rng = random.Random(seed + session_id)
+    session = Session(session_id, base_url, rng, timeout_s)
+    samples = []
+
+    async def rerun(page, action):
+        cold = page not in first_done
+        elapsed, error = await session.rerun()
+        first_done.add(page)
+        samples.append((page, action, elapsed, cold, error))
+        if think_s:
+            await asyncio.sleep(rng.uniform(0, 2 * think_s))
+
+    await session.open()
+    try:
+        await rerun("", "open")
+        for _ in range(iterations):
+            for page in pages:
+                session.switch_page(page)
+                await rerun(page, "navigate")
+                for _ in range(toggles):
+                    if not session.toggle_filter():
+                        break
+                    await rerun(page, "filter")
+    finally:
+        await session.close()
+    return {"session": session_id, "samples": samples}
+
+
+async def _run_all(args, base_url, server_pid):
+    first_done = set()
+    rss_samples = []
+
+    async def sample_memory():
+        while True:
+            rss_samples.append(_proc_rss_mb(server_pid)[0])
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_memory()) if server_pid else None
+    try:
+        return await asyncio.gather(*[
+            run_session(i, base_url, args.pages, args.iterations, args.toggles, args.think, args.timeout,
+                        args.seed, first_done)
+            for i in range(args.sessions)
+        ]), rss_samples
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+
+
+# ========================
+# Raport
+# ========================
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "n": int(len(values)),
+        "p50_ms": round(float(np.percentile(values, 50)) * 1000, 1),
+        "p95_ms": round(float(np.percentile(values, 95)) * 1000, 1),
+        "max_ms": round(float(values.max()) * 1000, 1),
+    }
+
+
+def summarize(sessions, wall_s, server=None):
+    """Zbiorcze wyniki: latencje per strona (zimne / rozgrzane) i zasoby serwera."""
+    rows = [(s["session"], *sample) for s in sessions for sample in s["samples"]]
+    pages = {}
+    for page in dict.fromkeys(r[1] for r in rows):
+        cold = [r[3] for r in rows if r[1] == page and r[4]]
+        warm = [r[3] for r in rows if r[1] == page and not r[4]]
+        pages[page or "(domyślna)"] = {
+            "cold": _percentiles(cold) if cold else None,
+            "warm": _percentiles(warm) if warm else None,
+            "errors": sum(r[5] for r in rows if r[1] == page),
+        }
+    summary = {
+        "sessions": len(sessions),
+        "reruns": len(rows),
+        "wall_s": round(wall_s, 2),
+        "reruns_per_s": round(len(rows) / wall_s, 2),
+        "pages": pages,
+    }
+    if server is not None:
+        summary["server"] = {key: round(value, 1) for key, value in server.items()}
+        summary["server"]["cpu_cores_used"] = round(server["cpu_s"] / wall_s, 2)
+    return summary
+
+
+def print_report(summary):
+    print(f"\nSesje: {summary['sessions']}, reruny: {summary['reruns']}, czas: {summary['wall_s']} s "
+          f"({summary['reruns_per_s']} rerun/s)")
+    server = summary.get("server")
+    if server:
+        print(f"Serwer: CPU {server['cpu_s']} s (średnio {server['cpu_cores_used']} rdzenia), "
+              f"RSS na starcie {server['rss_start_mb']} MB, max w teście {server['rss_max_mb']} MB, "
+              f"szczyt procesu {server['rss_peak_mb']} MB\n")
+    print(f"{'strona':<28}{'zimne p50/p95 [ms]':>22}{'rozgrzane p50/p95 [ms]':>26}{'n':>6}{'błędy':>7}")
+    for page, stats in summary["pages"].items():
+        cold = f"{stats['cold']['p50_ms']} / {stats['cold']['p95_ms']}" if stats["cold"] else "-"
+        warm = f"{stats['warm']['p50_ms']} / {stats['warm']['p95_ms']}" if stats["warm"] else "-"
+        n = (stats["cold"] or {"n": 0})["n"] + (stats["warm"] or {"n": 0})["n"]
+        print(f"{page:<28}{cold:>22}{warm:>26}{n:>6}{stats['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4, help="liczba równoległych sesji")
+    parser.add_argument("--iterations", type=int, default=2, help="ile razy sesja przechodzi przez strony")
+    parser.add_argument("--toggles", type=int, default=3, help="zmiany filtrów na każdej stronie")
+    parser.add_argument("--pages", nargs="*", default=list(DEFAULT_PAGES), help="ścieżki URL stron")
+    parser.add_argument("--think", type=float, default=0.0, help="średnia przerwa między akcjami [s]")
+    parser.add_argument("--timeout", type=float, default=120.0, help="limit pojedynczego rerun [s]")
+    parser.add_argument("--url", help="adres działającego serwera (domyślnie uruchamiany lokalnie)")
+    parser.add_argument("--port", type=int, default=8599, help="port lokalnego serwera")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    server = None if args.url else start_server(args.port)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        if server is not None:
+            cpu_start = _proc_cpu_s(server.pid)
+            rss_start = _proc_rss_mb(server.pid)[0]
+        t0 = time.perf_counter()
+        sessions, rss_samples = asyncio.run(_run_all(args, base_url, server.pid if server else None))
+        wall_s = time.perf_counter() - t0
+        resources = None
+        if server is not None:
+            resources = {
+                "cpu_s": _proc_cpu_s(server.pid) - cpu_start,
+                "rss_start_mb": rss_start,
+                "rss_max_mb": max(rss_samples, default=rss_start),
+                "rss_peak_mb": _proc_rss_mb(server.pid)[1],
+            }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    summary = summarize(sessions, wall_s, resources)
+    print_report(summary)
+
+    if not args.no_save:
+        from benchmarks.run import _metadata
+
+        meta = _metadata()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"loadtest_{stamp}_{meta['revision']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "args": vars(args), "summary": summary}, f, indent=2)
+        print(f"\nZapisano: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Powtarzalne benchmarki potoku trasy i listy startowej.
+
+Każdy benchmark jest uruchamiany na prawdziwej trasie (data/track/orbita25.gpx)
+lub prawdziwej liście startowej oraz na danych syntetycznych w zadanych skalach.
+Wyniki zapisywane są jako JSON w benchmarks/results/ i mogą być porównane
+z wcześniejszym przebiegiem (--compare), żeby wychwycić regresje.
+
+Użycie:
+    python -m benchmarks.run                      # skale domyślne
+    python -m benchmarks.run --full               # do 1M punktów i 100k uczestników
+    python -m benchmarks.run --only slope --compare benchmarks/results/<plik>.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_track, synthetic_startlist, write_gpx
+from scripts.gpx_parser import GPXParser
+from scripts.elevation_profile import ElevationProfile
+from scripts.map_generator import build_map
+from scripts.track import Track
+from scripts.preprocess import DATA_PATH, prepare_data, apply_filters
+
+GPX_PATH = "data/track/orbita25.gpx"
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+DEFAULT_POINTS = (10_000, 100_000)
+DEFAULT_PARTICIPANTS = (10_000,)
+FULL_POINTS = (10_000, 100_000, 1_000_000)
+FULL_PARTICIPANTS = (10_000, 100_000)
+
+# benchmarki liczone punkt po punkcie w Pythonie - przy dużych skalach tylko jedno powtórzenie
+SLOW_BENCHMARKS = {"gpx_parse", "distance_accumulation", "map_generation", "plot_render"}
+
+
+# ========================
+# Przygotowanie danych
+# ========================
+
+def _track_source(size, workdir):
+    """Zwraca (ścieżka GPX, DataFrame trasy) dla skali 'real' lub liczby punktów."""
+    if size == "real":
+        return GPX_PATH, GPXParser(GPX_PATH).parse_to_dataframe()
+    track_df = synthetic_track(size)
+    path = os.path.join(workdir, f"synthetic_{size}.gpx")
+    if not os.path.exists(path):
+        write_gpx(track_df, path)
+    return path, track_df
+
+
+def _distance_accumulation(track_df):
+    parser = GPXParser(None)
+    km, last_lat, last_lon = 0, None, None
+    for lat, lon in zip(track_df["latitude"].tolist(), track_df["longitude"].tolist()):
+        km += parser._get_distance(last_lat, last_lon, lat, lon)
+        last_lat, last_lon = lat, lon
+    return km
+
+
+def _plot_render(profile):
+    import matplotlib.pyplot as plt
+
+    fig, _ = profile.plot()
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _map_render(track_df):
+    coords = track_df[["latitude", "longitude"]].values.tolist()
+    return build_map(coords).get_root().render()
+
+
+def _filter_startlist(df):
+    # typowa zmiana filtra: jedna płeć, obie pory, jeden typ
+    return apply_filters(df, ["K"], ["ranny", "wieczorny"], ["nowy"])
+
+
+def track_benchmarks():
+    """Zwraca listę (nazwa, funkcja(path, track_df, profile))."""
+    return [
+        ("gpx_parse", lambda path, df, profile: GPXParser(path).parse_to_dataframe()),
+        ("distance_accumulation", lambda path, df, profile: _distance_accumulation(df)),
+        ("slope_computation", lambda path, df, profile: ElevationProfile(df, seg_unit_km=0.5)),
+        ("compute_slope_lengths", lambda path, df, profile: profile.compute_slope_lengths()),
+        ("smooth_profile", lambda path, df, profile: profile.smooth_profile()),
+        ("plot_render", lambda path, df, profile: _plot_render(profile)),
+        ("map_generation", lambda path, df, profile: _map_render(df)),
+        ("track_build", lambda path, df, profile: Track.from_dataframe(df)),
+        ("track_slice_km", lambda path, df, profile: Track.from_dataframe(df).slice_km(20, 40).to_dataframe()),
+    ]
+
+
+def startlist_benchmarks():
+    """Zwraca listę (nazwa, funkcja(raw_df, prepared_df))."""
+    return [
+        ("startlist_prepare", lambda raw, prepared: prepare_data(raw.copy())),
+        ("startlist_filter", lambda raw, prepared: _filter_startlist(prepared)),
+    ]
+
+
+# ========================
+# Pomiar
+# ========================
+
+def measure(func, repeat):
+    """Zwraca czasy [s] kolejnych wywołań funkcji."""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def _record(results, name, size, timings):
+    key = f"{name}[{size}]"
+    results[key] = {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "repeat": len(timings),
+    }
+    print(f"{key:<40} min {min(timings) * 1000:10.2f} ms   median {statistics.median(timings) * 1000:10.2f} ms")
+
+
+def _record_memory(results, size, track_df):
+    """Zużycie pamięci: DataFrame float64 vs Track (zwykły i delta-kodowany)."""
+    memory = {
+        "dataframe_bytes": int(track_df.memory_usage(deep=True).sum()),
+        "track_bytes": Track.from_dataframe(track_df).nbytes,
+        "track_delta_bytes": Track.from_dataframe(track_df, delta_encode=True).nbytes,
+    }
+    results[f"track_memory[{size}]"] = memory
+    print(f"track_memory[{size}]".ljust(40) + "  ".join(f"{k} {v / 1e6:.2f} MB" for k, v in memory.items()))
+
+
+def _selected(name, only):
+    return not only or any(pattern in name for pattern in only)
+
+
+def run(points, participants, repeat=3, only=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in ["real", *points]:
+            path, track_df = _track_source(size, workdir)
+            profile = ElevationProfile(track_df, seg_unit_km=0.5)
+            if _selected("track_memory", only):
+                _record_memory(results, size, track_df)
+            for name, func in track_benchmarks():
+                if not _selected(name, only):
+                    continue
+                n = 1 if name in SLOW_BENCHMARKS and size != "real" and size >= 100_000 else repeat
+                _record(results, name, size, measure(lambda: func(path, track_df, profile), n))
+
+    for size in ["real", *participants]:
+        if size == "real":
+            t0 = time.perf_counter()
+            raw = pd.read_excel(DATA_PATH, sheet_name="clean")
+            if _selected("startlist_load", only):
+                _record(results, "startlist_load", size, [time.perf_counter() - t0])
+        else:
+            raw = synthetic_startlist(size)
+        prepared = prepare_data(raw.copy())
+        for name, func in startlist_benchmarks():
+            if _selected(name, only):
+                _record(results, name, size, measure(lambda: func(raw, prepared), repeat))
+    return results
+
+
+def _metadata():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": revision,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def save_results(results, meta, results_dir=RESULTS_DIR):
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = meta["timestamp"].replace(":", "").replace("-", "")
+    path = os.path.join(results_dir, f"{stamp}_{meta['revision']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    return path
+
+
+def compare(results, baseline_path, threshold=1.2):
+    """Porównuje medianę z poprzednim przebiegiem; zwraca listę regresji."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\nPorównanie z {baseline_path} (próg regresji x{threshold}):")
+    for key, current in results.items():
+        if key not in baseline or "median" not in current:
+            continue
+        ratio = current["median"] / baseline[key]["median"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  <-- REGRESJA"
+            regressions.append(key)
+        print(f"{key:<40} x{ratio:6.2f}{flag}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--full", action="store_true", help="skale do 1M punktów i 100k uczestników")
+    arg_parser.add_argument("--points", type=int, nargs="*", help="liczby punktów syntetycznej trasy")
+    arg_parser.add_argument("--participants", type=int, nargs="*", help="liczby syntetycznych uczestników")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--only", nargs="*", help="uruchom tylko benchmarki zawierające podany tekst")
+    arg_parser.add_argument("--compare", help="plik JSON z poprzednim przebiegiem")
+    arg_parser.add_argument("--threshold", type=float, default=1.2)
+    arg_parser.add_argument("--no-save", action="store_true")
+    args = arg_parser.parse_args()
+
+    points = args.points if args.points is not None else (FULL_POINTS if args.full else DEFAULT_POINTS)
+    participants = args.participants if args.participants is not None else (
+        FULL_PARTICIPANTS if args.full else DEFAULT_PARTICIPANTS)
+
+    results = run(points, participants, repeat=args.repeat, only=args.only)
+    meta = _metadata()
+    if not args.no_save:
+        print(f"\nZapisano: {save_results(results, meta)}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Generatory syntetycznych danych do benchmarków (trasa i lista startowa)."""
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+LAP_KM = 125
+
+# środek pętli Orbity (okolice Częstochowy)
+CENTER_LAT, CENTER_LON = 50.75, 19.10
+
+
+def haversine_km(lat, lon):
+    """Skumulowany dystans [km] wzdłuż punktów (wektorowo, wzór haversine)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    dlat, dlon = np.diff(lat), np.diff(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    return np.concatenate(([0.0], np.cumsum(dist)))
+
+
+def synthetic_track(n_points, seed=0):
+    """
+    Zwraca DataFrame trasy ['km', 'latitude', 'longitude', 'elevation']
+    w kształcie pętli z losowym (ale gładkim) profilem wysokości.
+    """
+    rng = np.random.default_rng(seed)
+    angle = np.linspace(0, 2 * np.pi, n_points)
+    radius = 0.25 + 0.03 * np.sin(7 * angle)
+    lat = CENTER_LAT + radius * np.sin(angle) + rng.normal(0, 2e-5, n_points)
+    lon = CENTER_LON + 1.5 * radius * np.cos(angle) + rng.normal(0, 2e-5, n_points)
+    elevation = 280 + 60 * np.sin(3 * angle) + np.cumsum(rng.normal(0, 0.3, n_points))
+    elevation += rng.normal(0, 1.5, n_points)  # szum GPS
+    return pd.DataFrame({
+        "km": haversine_km(lat, lon),
+        "latitude": lat,
+        "longitude": lon,
+        "elevation": elevation,
+    })
+
+
+def write_gpx(track_df, path):
+    """Zapisuje trasę do pliku GPX (jedna ścieżka, jeden segment; z czasem, jeśli jest kolumna 'time')."""
+    from datetime import datetime, timezone
+
+    has_time = "time" in track_df.columns
+    columns = ["latitude", "longitude", "elevation"] + (["time"] if has_time else [])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gpx version="1.1" creator="benchmarks" xmlns="http://www.topografix.com/GPX/1/1">\n'
+                '<trk><name>synthetic</name><trkseg>\n')
+        for row in track_df[columns].itertuples(index=False):
+            time_tag = ""
+            if has_time:
+                stamp = datetime.fromtimestamp(int(row[3]), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                time_tag = f"<time>{stamp}</time>"
+            f.write(f'<trkpt lat="{row[0]:.8f}" lon="{row[1]:.8f}"><ele>{row[2]:.1f}</ele>{time_tag}</trkpt>\n')
+        f.write('</trkseg></trk>\n</gpx>\n')
+    return path
+
+
+def synthetic_trace(route_df, laps=1.0, speed_kmh=25.0, interval_s=5, stops=(), noise_m=5.0,
+                    start_time=1751716800, seed=0):
+    """
+    Ślad zawodnika jadącego po trasie ze stałą prędkością.
+
+    stops: [(km rozwinięty, czas postoju [s]), ...]. Zwraca DataFrame
+    ['latitude', 'longitude', 'elevation', 'time'] (time w sekundach epoki).
+    """
+    rng = np.random.default_rng(seed)
+    length = route_df["km"].iloc[-1]
+    total_km = laps * length
+    ride_s = total_km / speed_kmh * 3600
+    total_s = ride_s + sum(duration for _, duration in stops)
+    t = np.arange(0, total_s, interval_s, dtype=np.float64)
+
+    # czas -> dystans z uwzględnieniem postojów (odcinkami liniowo)
+    knots_t, knots_km, clock = [0.0], [0.0], 0.0
+    for km, duration in sorted(stops):
+        clock = km / speed_kmh * 3600 + sum(d for k, d in stops if k < km)
+        knots_t += [clock, clock + duration]
+        knots_km += [km, km]
+    knots_t.append(total_s)
+    knots_km.append(total_km)
+    km = np.interp(t, knots_t, knots_km) % length
+
+    noise_deg = noise_m / 111_000
+    return pd.DataFrame({
+        "latitude": np.interp(km, route_df["km"], route_df["latitude"]) + rng.normal(0, noise_deg, len(t)),
+        "longitude": np.interp(km, route_df["km"], route_df["longitude"]) + rng.normal(0, noise_deg * 1.6, len(t)),
+        "elevation": np.interp(km, route_df["km"], route_df["elevation"]),
+        "time": (start_time + t).astype(np.int64),
+    })
+
+
+def synthetic_startlist(n_participants, seed=0):
+    """Zwraca surową listę startową (arkusz 'clean') o zadanej liczbie uczestników."""
+    rng = np.random.default_rng(seed)
+    deklarowane = rng.choice([1, 2, 3, 4, 5], size=n_participants, p=[0.6, 0.24, 0.09, 0.02, 0.05])
+    pora = rng.choice(["ranny", "wieczorny"], size=n_participants, p=[0.7, 0.3])
+    dns = rng.random(n_participants) < 0.19
+    zrobione = np.where(dns, 0.0, np.round(np.clip(rng.normal(deklarowane * 0.7, 0.5), 0, 5), 3))
+    dystans = np.round(zrobione * LAP_KM).astype(int)
+    return pd.DataFrame({
+        "nr_startowy": np.arange(1, n_participants + 1),
+        "nick": [f"rider_{i}" for i in range(n_participants)],
+        "deklarowane": deklarowane,
+        "zrobione": zrobione,
+        "DNF_km": np.where(zrobione % 1 > 0, np.round((zrobione % 1) * LAP_KM), np.nan),
+        "dystans_km": dystans,
+        "plec": rng.choice(["M", "K"], size=n_participants, p=[0.77, 0.23]),
+        "typ_uczestnika": rng.choice(["stary", "nowy"], size=n_participants, p=[0.6, 0.4]),
+        "pora_startu_z_DNS": np.where(dns, "DNS", pora),
+        "pora_startu": pora,
+    })
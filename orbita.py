@@ -1,4 +1,8 @@
+import os
 import streamlit as st
+from scripts.instrumentation import timed, debug_panel
+from scripts.jobs import schedule_artifacts
+from scripts.resources import GPX_PATH, job_runner
 
 st.set_page_config(
     page_title="Orbita'25 - Dashboard",
@@ -28,11 +32,24 @@ project_3_page = st.Page(
     title="Statystyki",
     #icon=":material/analytics:",
 )
+project_4_page = st.Page(
+    "views/4_Sektory.py",
+    title="Sektory",
+)
+project_5_page = st.Page(
+    "views/5_Oblozenie.py",
+    title="Obłożenie trasy",
+)
+project_6_page = st.Page(
+    "views/6_Tempo.py",
+    title="Prognoza tempa",
+)
 
 pg = st.navigation(
     {
         "About Me": [about_page],
-        "Strony": [project_1_page, project_2_page, project_3_page],
+        "Strony": [project_1_page, project_2_page, project_3_page, project_4_page, project_5_page,
+                   project_6_page],
     }
 )
 
@@ -47,5 +64,17 @@ st.html("""
 st.logo("static/orbita_logo.png", size="large", icon_image="static/orbita_icon.png")
 
 
+# --- ZADANIA W TLE ---
+# mapa / geolokacja / PNG profilu odświeżane po zmianie danych (zgłoszenia są deduplikowane)
+with timed("jobs.schedule"):
+    schedule_artifacts(job_runner(), GPX_PATH,
+                       geocode=os.environ.get("ORBITA_GEOCODE") == "1",
+                       gazetteer=os.environ.get("ORBITA_GAZETTEER"))
+
+
 # --- RUN NAVIGATION ---
-pg.run()
+with timed(f"page.{pg.title}"):
+    pg.run()
+
+# panel z czasami etapów (tylko przy ORBITA_METRICS=1)
+debug_panel()
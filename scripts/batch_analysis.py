@@ -0,0 +1,125 @@
+"""
+Zbiorcza analiza wariantów trasy (GPX/FIT) na puli procesów.
+
+Dla każdego pliku z katalogu: parsowanie (przez współdzielony cache tras),
+długość, suma podjazdów, wysokości skrajne, długości odcinków wg nachylenia,
+podsumowanie podjazdów i PNG profilu. Wyniki trafiają do jednej tabeli
+porównawczej (CSV lub XLSX - wg rozszerzenia).
+
+Użycie:
+    python -m scripts.batch_analysis warianty/ --out porownanie.csv --profiles profile_png/ --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from scripts.track_store import TRACK_CACHE_DIR, find_track_files, load_parser
+from scripts.elevation_profile import ElevationProfile
+
+SLOPE_THRESHOLDS = (2, 4, 5, 8)
+
+
+def analyze_track(path, profiles_dir=None, cache_dir=TRACK_CACHE_DIR, smooth_window=5,
+                  slope_thresholds=SLOPE_THRESHOLDS, min_climb_gain_m=30):
+    """Analizuje jeden plik trasy i zwraca wiersz tabeli porównawczej (dict)."""
+    t0 = time.perf_counter()
+    parser = load_parser(path, cache_dir)
+    track_df = parser.track_df
+    profile = ElevationProfile(track_df, seg_unit_km=0.5)
+
+    row = {
+        "plik": os.path.basename(path),
+        "punkty": len(track_df),
+        "dlugosc_km": round(track_df["km"].max(), 2),
+        "suma_podjazdow_m": round(parser.get_total_ascent(smooth_window), 1),
+        "max_wysokosc_m": round(track_df["elevation"].max(), 1),
+        "min_wysokosc_m": round(track_df["elevation"].min(), 1),
+    }
+
+    lengths = profile.compute_slope_lengths(smooth_window=smooth_window, slope_thresholds=slope_thresholds)
+    for slope_range, length_km in zip(lengths["slope_range"], lengths["length_km"]):
+        row[f"km {slope_range}"] = length_km
+
+    climbs = profile.find_climbs(smooth_window=smooth_window, min_gain_m=min_climb_gain_m)
+    row["liczba_podjazdow"] = len(climbs)
+    row["najdluzszy_podjazd_km"] = round(climbs["length_km"].max(), 2) if not climbs.empty else 0
+    row["najwiekszy_podjazd_m"] = round(climbs["gain_m"].max(), 1) if not climbs.empty else 0
+    row["podjazdy"] = "; ".join(
+        f"{c.start_km:.1f}-{c.end_km:.1f} km (+{c.gain_m:.0f} m, {c.avg_slope:.1f}%)"
+        for c in climbs.itertuples()
+    )
+
+    if profiles_dir:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        fig, ax = profile.plot()
+        ax.set_xlabel("Dystans [km]")
+        ax.set_ylabel("Wysokość [m]")
+        # orbita.gpx i orbita.fit nie mogą nadpisać sobie nawzajem profilu
+        png_path = os.path.join(profiles_dir, os.path.basename(path).replace(".", "_") + ".png")
+        fig.savefig(png_path, bbox_inches="tight", dpi=150)
+        plt.close(fig)
+        row["profil_png"] = png_path
+
+    row["czas_s"] = round(time.perf_counter() - t0, 3)
+    return row
+
+
+def analyze_directory(directory, profiles_dir=None, workers=None, cache_dir=TRACK_CACHE_DIR):
+    """Analizuje wszystkie pliki GPX/FIT z katalogu na puli procesów; zwraca DataFrame."""
+    paths = find_track_files(directory)
+    if not paths:
+        raise ValueError(f"Brak plików GPX/FIT w katalogu: {directory}")
+    if profiles_dir:
+        os.makedirs(profiles_dir, exist_ok=True)
+
+    rows, errors = [], []
+    # każdy plik jest niezależny - skalowanie liniowe z liczbą rdzeni (do liczby plików)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_track, path, profiles_dir, cache_dir): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                rows.append(future.result())
+                print(f"OK   {os.path.basename(path)}")
+            except Exception as e:  # jeden uszkodzony plik nie przerywa całej analizy
+                errors.append(path)
+                print(f"BŁĄD {os.path.basename(path)}: {e}")
+
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table = table.sort_values("plik").reset_index(drop=True)
+    return table, errors
+
+
+def save_table(table, out_path):
+    if out_path.lower().endswith(".xlsx"):
+        table.to_excel(out_path, index=False)
+    else:
+        table.to_csv(out_path, index=False)
+    return out_path
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("directory", help="katalog z plikami GPX/FIT")
+    arg_parser.add_argument("--out", default="porownanie_tras.csv", help="tabela wynikowa (.csv lub .xlsx)")
+    arg_parser.add_argument("--profiles", help="katalog na PNG profili (pomijane, jeśli brak)")
+    arg_parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    arg_parser.add_argument("--cache-dir", default=TRACK_CACHE_DIR)
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    table, errors = analyze_directory(args.directory, args.profiles, args.workers, args.cache_dir)
+    save_table(table, args.out)
+    print(f"Zapisano {len(table)} tras do {args.out} w {time.perf_counter() - t0:.1f} s"
+          + (f" ({len(errors)} błędów)" if errors else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import streamlit as st
+
+from scripts.instrumentation import timed
+from scripts.preprocess import load_data, apply_filters
+
+DARK_CONTRAST_COLORS = [
+    "#FF4B4B",  # czerwony
+    "#4B9EFF",  # jasny niebieski
+    "#2ECC71",  # zieleń
+    "#9B4BFF",  # fiolet
+    "#FFD700",  # złoty
+    "#00CED1"   # turkus
+]
+
+# maksymalna liczba zapamiętanych kombinacji (wykres, filtry, wersja danych z sources_version)
+MAX_CACHED_FIGURES = 128
+
+
+# ========================
+# Agregacje
+# ========================
+
+def pie_counts(df, column):
+    """Liczności i udziały procentowe kategorii w kolumnie."""
+    counts = df[column].value_counts().reset_index()
+    counts.columns = [column, 'count']
+    counts['percent'] = counts['count'] / counts['count'].sum()
+
+    # etykieta: nazwa + procent
+    counts['label'] = counts[column] + ': ' + (counts['percent'] * 100).round(1).astype(str) + '%'
+    return counts
+
+
+def laps_counts(df):
+    """Liczba uczestników wg liczby zrobionych pełnych okrążeń."""
+    okr_data = df["zrobione_pelne"].value_counts().reset_index()
+    okr_data.columns = ["Okrążenia", "Liczba"]
+    return okr_data
+
+
+def gauge_value(df):
+    """Średnie wykonanie planu okrążeń [%]."""
+    if df.empty:
+        return 0
+    return (df["zrobione_pelne"].sum() / df["deklarowane"].sum()) * 100
+
+
+# ========================
+# Wykresy
+# ========================
+
+# plotly jest importowany leniwie - wykresy budowane są tylko przy chybieniu cache
+
+def plotly_pie(counts, title):
+    import plotly.express as px
+
+    fig = px.pie(
+        counts,
+        values='count',
+        names='label',  # używamy przygotowanej etykiety
+        title=title,
+        hole=0.4,
+        color_discrete_sequence=DARK_CONTRAST_COLORS
+    )
+
+    fig.update_traces(
+        textposition='inside',
+        textinfo='label',  # tylko nasza etykieta
+        textfont_size=18,
+        textfont_color='white',
+        marker=dict(line=dict(color='#000000', width=2))
+    )
+
+    fig.update_layout(
+        showlegend=False,  # legenda zbędna
+        paper_bgcolor='rgba(0,0,0,0)',  # transparentne tło
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white')  # białe napisy w tytule
+    )
+
+    return fig
+
+
+def plotly_gauge(value, title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=value,
+        number={'suffix': '%', 'font': {'color': 'white', 'size': 48}},
+        title={'text': title, 'font': {'color': 'white', 'size': 24}},
+        gauge={
+            'axis': {'range': [0, 100], 'tickcolor': 'white'},
+            'bar': {'color': '#FF4B4B', 'thickness': 1},  # czerwony pasek postępu
+            'bgcolor': "#FF9797",         # wyblakłe tło
+            'borderwidth': 0,
+            'bordercolor': 'white'
+        }
+    ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        font={'color': 'white'}
+    )
+
+    return fig
+
+
+def plotly_laps_bar(okr_data, title):
+    import plotly.express as px
+
+    return px.bar(okr_data, x="Okrążenia", y="Liczba",
+                  title=title,
+                  labels={"Okrążenia": "Liczba okrążeń", "Liczba": "Ilość uczestników"},
+                  color_discrete_sequence=["#FF4B4B"])
+
+
+# ========================
+# Cache
+# ========================
+
+@st.cache_data(max_entries=MAX_CACHED_FIGURES)
+def aggregate(kind, column, filters, version):
+    """
+    Zwraca zagregowane dane wejściowe wykresu.
+
+    Klucz cache to (rodzaj wykresu, kolumna, filtry, wersja danych), więc
+    agregacja jest liczona tylko przy pierwszym użyciu danej kombinacji.
+    """
+    df = apply_filters(load_data(version=version), *filters)
+    if kind == "pie":
+        return pie_counts(df, column)
+    if kind == "bar":
+        return laps_counts(df)
+    if kind == "gauge":
+        return gauge_value(df)
+    raise ValueError(f"Nieznany rodzaj wykresu: {kind}")
+
+
+@st.cache_resource(max_entries=MAX_CACHED_FIGURES)
+@timed("charts.build_figure")
+def cached_figure(kind, title, filters, version, column=None):
+    """
+    Zwraca wykres dla danej kombinacji filtrów.
+
+    Obiekt Figure jest współdzielony przez sesje (cache_resource), więc
+    ponowne uruchomienie strony nie odtwarza go z JSON-a; st.plotly_chart
+    tylko go serializuje i nie modyfikuje.
+    """
+    data = aggregate(kind, column, filters, version)
+    if kind == "pie":
+        return plotly_pie(data, title)
+    if kind == "bar":
+        return plotly_laps_bar(data, title)
+    return plotly_gauge(data, title)
@@ -0,0 +1,130 @@
+"""
+Korekta wysokości trasy na podstawie lokalnego numerycznego modelu terenu (DEM).
+
+Obsługiwane są kafle w formacie SRTM .hgt (np. N50E019.hgt): siatka
+int16 big-endian, 1201x1201 (SRTM3, 3") lub 3601x3601 (SRTM1, 1"), wiersze
+od północy, wartość -32768 oznacza brak danych. Kafle otwierane są przez
+np.memmap (czytane są tylko potrzebne strony pliku), a otwarte kafle trzyma
+cache LRU.
+"""
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+HGT_VOID = -32768
+
+
+def tile_name(lat_floor, lon_floor):
+    """Nazwa kafla SRTM dla narożnika SW (np. 50, 19 -> 'N50E019.hgt')."""
+    ns = "N" if lat_floor >= 0 else "S"
+    ew = "E" if lon_floor >= 0 else "W"
+    return f"{ns}{abs(lat_floor):02d}{ew}{abs(lon_floor):03d}.hgt"
+
+
+class DEMElevation:
+    """
+    Źródło wysokości z kafli DEM z wektorową interpolacją dwuliniową.
+
+    Atrybuty
+    --------
+    tile_dir : str
+        Katalog z plikami .hgt.
+    max_open_tiles : int
+        Maksymalna liczba jednocześnie otwartych (zmapowanych) kafli.
+    """
+
+    def __init__(self, tile_dir, max_open_tiles=8):
+        if not os.path.isdir(tile_dir):
+            raise ValueError(f"Brak katalogu z kaflami DEM: {tile_dir}")
+        self.tile_dir = tile_dir
+        self.max_open_tiles = max_open_tiles
+        self._tiles = OrderedDict()
+
+    # ========================
+    # Metody prywatne
+    # ========================
+
+    def _open_tile(self, lat_floor, lon_floor):
+        """Zwraca zmapowany kafel (albo None, jeśli go nie ma) - z cache LRU."""
+        key = (lat_floor, lon_floor)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        path = os.path.join(self.tile_dir, tile_name(lat_floor, lon_floor))
+        tile = None
+        if os.path.exists(path):
+            size = int(math.isqrt(os.path.getsize(path) // 2))
+            if size * size * 2 != os.path.getsize(path):
+                raise ValueError(f"Nieprawidłowy rozmiar kafla DEM: {path}")
+            tile = np.memmap(path, dtype=">i2", mode="r", shape=(size, size))
+
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_open_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    @staticmethod
+    def _bilinear(tile, lat, lon, lat_floor, lon_floor):
+        """Interpolacja dwuliniowa dla punktów leżących w jednym kaflu."""
+        n = tile.shape[0] - 1
+        row = (lat_floor + 1 - lat) * n
+        col = (lon - lon_floor) * n
+        r0 = np.clip(np.floor(row).astype(np.int64), 0, n - 1)
+        c0 = np.clip(np.floor(col).astype(np.int64), 0, n - 1)
+        fr, fc = row - r0, col - c0
+
+        # tylko 4 sąsiednie wartości na punkt - memmap czyta jedynie potrzebne strony
+        z00 = tile[r0, c0].astype(np.float64)
+        z01 = tile[r0, c0 + 1].astype(np.float64)
+        z10 = tile[r0 + 1, c0].astype(np.float64)
+        z11 = tile[r0 + 1, c0 + 1].astype(np.float64)
+
+        elevation = (z00 * (1 - fr) * (1 - fc) + z01 * (1 - fr) * fc
+                     + z10 * fr * (1 - fc) + z11 * fr * fc)
+        void = (z00 == HGT_VOID) | (z01 == HGT_VOID) | (z10 == HGT_VOID) | (z11 == HGT_VOID)
+        elevation[void] = np.nan
+        return elevation
+
+    # ========================
+    # Metody publiczne
+    # ========================
+
+    def sample(self, latitudes, longitudes):
+        """
+        Zwraca wysokości [m] dla wszystkich punktów naraz (NaN poza kaflami / w dziurach DEM).
+        """
+        lat = np.asarray(latitudes, dtype=np.float64)
+        lon = np.asarray(longitudes, dtype=np.float64)
+        result = np.full(len(lat), np.nan)
+
+        lat_floor = np.floor(lat).astype(np.int64)
+        lon_floor = np.floor(lon).astype(np.int64)
+        tile_keys = np.stack([lat_floor, lon_floor], axis=1)
+        # punkty grupowane po kaflu - jedna operacja wektorowa na kafel
+        unique_keys, inverse = np.unique(tile_keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for k, (tile_lat, tile_lon) in enumerate(unique_keys):
+            tile = self._open_tile(int(tile_lat), int(tile_lon))
+            if tile is None:
+                continue
+            mask = inverse == k
+            result[mask] = self._bilinear(tile, lat[mask], lon[mask], tile_lat, tile_lon)
+        return result
+
+    def correct(self, track_df):
+        """
+        Zwraca kopię trasy z wysokością z DEM; oryginał GPS trafia do 'elevation_gps'.
+        Punkty bez pokrycia DEM zachowują wysokość GPS.
+        """
+        dem = self.sample(track_df["latitude"].to_numpy(), track_df["longitude"].to_numpy())
+        corrected = track_df.copy()
+        corrected["elevation_gps"] = corrected["elevation"]
+        corrected["elevation"] = np.where(np.isnan(dem), corrected["elevation"].to_numpy(), dem)
+        return corrected
+
+    def clear(self):
+        """Zamyka wszystkie otwarte kafle."""
+        self._tiles.clear()
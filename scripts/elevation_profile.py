@@ -3,10 +3,17 @@ import os
 import time
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+
+from scripts.instrumentation import timed, count
+from scripts.gradients import GradientDistribution
+from scripts.track import Track, resample_dataframe
+
+# matplotlib i geopy są importowane leniwie w plot() / geolocate_places(),
+# żeby strony korzystające tylko z danych nie płaciły za ich import przy starcie.
+
+# domyślny krok siatki nachyleń [km] - zbliżony do odstępu punktów GPX trasy (~30 m)
+# i dzielący seg_unit_km = 0.5 bez reszty
+PROFILE_STEP_KM = 0.025
 
 
 class ElevationProfile:
@@ -16,25 +23,53 @@ class ElevationProfile:
     Atrybuty
     --------
     track_df : pd.DataFrame
-        Dane trasy zawierające kolumny: ['km', 'elevation', 'latitude', 'longitude'].
+        Dane trasy zawierające kolumny: ['km', 'elevation', 'latitude', 'longitude']
+        (przy tworzeniu można też podać Track).
     seg_unit_km : float
         Długość odcinka (w km) używanego do segmentacji.
+    elevation_source : obiekt z metodą correct(track_df) | None
+        Alternatywne źródło wysokości (np. DEMElevation); None - wysokości GPS.
+    resample_step_km : float | None
+        Krok równomiernej siatki dystansu (domyślnie PROFILE_STEP_KM); None -
+        bez siatki.
+    grid_df : pd.DataFrame | None
+        Trasa ['km', 'elevation'] na siatce co resample_step_km. Służy tylko
+        do rozkładu nachyleń (okno wygładzania ma wtedy stałą długość w km);
+        segmentacja, geolokacja i wykres działają na oryginalnych punktach
+        track_df, więc klucze cache miejscowości się nie zmieniają.
     places_df : pd.DataFrame | None
         Wyniki geolokacji punktów charakterystycznych.
     """
 
-    def __init__(self, track_df: pd.DataFrame, seg_unit_km: float = 0.5):
+    @timed("profile.init")
+    def __init__(self, track_df: pd.DataFrame, seg_unit_km: float = 0.5, elevation_source=None,
+                 resample_step_km: float | None = PROFILE_STEP_KM):
+        if isinstance(track_df, Track):
+            track_df = track_df.to_dataframe()
         if track_df.empty:
             raise ValueError("DataFrame jest pusty.")
         required_cols = {"km", "elevation", "latitude", "longitude"}
         if not required_cols.issubset(track_df.columns):
             raise ValueError(f"DataFrame musi zawierać kolumny: {required_cols}")
 
-        self.track_df = track_df.copy()
+        if elevation_source is not None:
+            with timed("profile.elevation_source"):
+                track_df = elevation_source.correct(track_df)
+        else:
+            track_df = track_df.copy()
+
+        self.grid_df = None
+        if resample_step_km is not None:
+            with timed("profile.resample"):
+                self.grid_df = resample_dataframe(track_df[["km", "elevation"]], resample_step_km)
+
+        self.track_df = track_df
+        self.resample_step_km = resample_step_km
         self.seg_unit_km = seg_unit_km
         self._assign_segments()
         self._compute_slopes()
         self.places_df = None
+        self._gradients = {}
 
     # ========================
     # Metody prywatne
@@ -90,80 +125,172 @@ class ElevationProfile:
                 labels.append(f"{low} ~ {high}%")
         return thresholds, labels
 
-    # ========================
-    # Metody publiczne
-    # ========================
-
-    def geolocate_places(self, min_distance_km=5, cache_file="places_cache.json", rate_limit_sec=1):
+    @staticmethod
+    def _label_width_km(fig, ax, label_kw, padding_px):
         """
-        Wyszukuje miejscowości wzdłuż trasy.
+        Szerokość pionowej etykiety w km osi X dla bieżącego rozmiaru wykresu.
+
+        Obrócony tekst ma szerokość równą wysokości linii, niezależnie od treści,
+        więc wystarczy zmierzyć jedną próbkę.
         """
+        renderer = fig.canvas.get_renderer()
+        sample = ax.text(0, 0, "Ąg", **label_kw)
+        width_px = sample.get_window_extent(renderer=renderer).width + padding_px
+        sample.remove()
+        x0, x1 = ax.get_xlim()
+        return width_px * (x1 - x0) / ax.get_window_extent(renderer=renderer).width
+
+    def _segment_representatives(self) -> pd.DataFrame:
+        """Pierwszy punkt (najmniejszy km) każdego segmentu."""
+        first_idx = self.track_df.groupby("segment", sort=False)["km"].idxmin()
+        return self.track_df.loc[first_idx, ["segment", "latitude", "longitude", "elevation", "km"]]
+
+    def _reverse_nominatim(self, reps, cache_file, rate_limit_sec, progress=None):
+        """Nazwy miejscowości z Nominatim (z cache w pliku JSON)."""
+        from geopy.geocoders import Nominatim
+        from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+
         geolocator = Nominatim(user_agent="ElevationProfileApp")
-        places = []
-        place_last_km = {}
-        place_group = 0
         cache = self._load_cache(cache_file)
+        names = []
 
-        for segment in self.track_df["segment"].unique():
-            segment_df = self.track_df[self.track_df["segment"] == segment]
-            row = segment_df.loc[segment_df["km"].idxmin()]
-            lat, lon, elev, km = row["latitude"], row["longitude"], row["elevation"], row["km"]
+        for i, (lat, lon) in enumerate(zip(reps["latitude"], reps["longitude"])):
+            if progress is not None:
+                progress(i / len(reps))
             coords_key = f"{lat:.5f},{lon:.5f}"
 
             place_name = cache.get(coords_key)
             if place_name is None:
+                count("geocoder.requests")
                 try:
-                    location = geolocator.reverse(f"{lat},{lon}", exactly_one=True, timeout=10)
+                    with timed("geocoder.reverse"):
+                        location = geolocator.reverse(f"{lat},{lon}", exactly_one=True, timeout=10)
                     address = location.raw.get("address", {})
                     place_name = address.get("city") or address.get("town") or address.get("village")
                     cache[coords_key] = place_name
                     time.sleep(rate_limit_sec)  # unikanie blokad Nominatim
                 except (GeocoderTimedOut, GeocoderUnavailable):
-                    continue
+                    count("geocoder.errors")
+            else:
+                count("geocoder.cache_hits")
+            names.append(place_name)
+
+        self._save_cache(cache, cache_file)
+        return names
+
+    # ========================
+    # Metody publiczne
+    # ========================
 
+    @timed("profile.geolocate_places")
+    def geolocate_places(self, min_distance_km=5, cache_file="places_cache.json", rate_limit_sec=1, geocoder=None,
+                         progress=None):
+        """
+        Wyszukuje miejscowości wzdłuż trasy.
+
+        Domyślnie korzysta z Nominatim (sieć, 1 zapytanie/s). Podanie `geocoder`
+        z metodą reverse_many(lats, lons) - np. OfflineGeocoder - pozwala
+        opisać wszystkie segmenty jednym zapytaniem wsadowym, bez sieci.
+        progress(ułamek) jest wołane przy kolejnych zapytaniach do Nominatim.
+        """
+        reps = self._segment_representatives()
+        if geocoder is None:
+            names = self._reverse_nominatim(reps, cache_file, rate_limit_sec, progress)
+        else:
+            with timed("geocoder.reverse_many"):
+                names = geocoder.reverse_many(reps["latitude"].to_numpy(), reps["longitude"].to_numpy())
+
+        # "wielkość" miejscowości = liczba segmentów trasy, które w niej leżą
+        segments_per_place = pd.Series(names, dtype=object).value_counts()
+
+        places = []
+        place_last_km = {}
+        place_group = 0
+        for segment, elev, km, place_name in zip(reps["segment"], reps["elevation"], reps["km"], names):
             if place_name and ((place_name not in place_last_km) or (km - place_last_km[place_name] >= min_distance_km)):
                 place_group += 1
                 place_last_km[place_name] = km
-                places.append([segment, place_name, elev, km, place_group])
+                places.append([segment, place_name, elev, km, place_group, segments_per_place[place_name]])
 
-        self._save_cache(cache, cache_file)
-        self.places_df = pd.DataFrame(places, columns=["segment", "place", "elevation", "km", "group"])
+        self.places_df = pd.DataFrame(places, columns=["segment", "place", "elevation", "km", "group", "segments"])
         self.places_df = self.places_df.drop_duplicates(subset=["place"]).sort_values(["group", "km"])
 
+    def window_for_km(self, window_km):
+        """Liczba próbek siatki (grid_df) odpowiadająca oknu window_km."""
+        if self.resample_step_km is None:
+            raise ValueError("Okno w km wymaga resample_step_km.")
+        return max(1, int(round(window_km / self.resample_step_km)))
+
+    @staticmethod
+    def _smooth(frame, smooth_window):
+        return frame['elevation'].rolling(window=smooth_window, center=True, min_periods=1).mean()
+
+    @timed("profile.smooth_profile")
     def smooth_profile(self, smooth_window=5):
-        """Zwraca wygładzony profil wysokościowy."""
-        return self.track_df['elevation'].rolling(window=smooth_window, center=True, min_periods=1).mean()
+        """Zwraca wygładzony profil wysokościowy w punktach track_df (okno w punktach)."""
+        return self._smooth(self.track_df, smooth_window)
+
+    def gradient_distribution(self, smooth_window=5, min_delta_km=1e-4):
+        """
+        Rozkład nachyleń (scripts.gradients.GradientDistribution) dla wygładzonego
+        profilu - liczony raz na okno wygładzania, potem dowolne progi w O(k log n).
 
+        Z siatką (grid_df) okno to smooth_window próbek co resample_step_km
+        (patrz window_for_km), bez niej - punktów track_df.
+        """
+        key = (smooth_window, min_delta_km)
+        if key not in self._gradients:
+            frame = self.track_df if self.grid_df is None else self.grid_df
+            self._gradients[key] = GradientDistribution.from_profile(
+                frame["km"].to_numpy(), self._smooth(frame, smooth_window).to_numpy(), min_delta_km
+            )
+        return self._gradients[key]
+
+    @timed("profile.compute_slope_lengths")
     def compute_slope_lengths(self, smooth_window=5, slope_thresholds=(2, 4, 5, 8), min_delta_km=1e-4):
         """
         Oblicza długość odcinków w zadanych zakresach nachylenia.
         """
-        df = self.track_df.copy()
-        df['elev_smooth'] = self.smooth_profile(smooth_window)
-        df['delta_elev'] = df['elev_smooth'].diff()
-        df['delta_km'] = df['km'].diff()
-
-        df = df.dropna(subset=['delta_elev', 'delta_km'])
-        df = df[df['delta_km'] > min_delta_km]  # filtr minimalnej długości
-
-        df['slope'] = (df['delta_elev'] / (df['delta_km'] * 1000)) * 100
-        df['segment_length_km'] = df['delta_km']
-
         thresholds, labels = self._get_slope_bins(slope_thresholds)
-        df['slope_range'] = pd.cut(df['slope'], bins=thresholds, labels=labels, right=True)
-
-        result = (
-            df.groupby('slope_range')['segment_length_km']
-            .sum()
-            .reset_index()
-            .rename(columns={'segment_length_km': 'length_km'})
-        )
-
+        lengths = self.gradient_distribution(smooth_window, min_delta_km).bucket_lengths(thresholds[1:-1])
         return pd.DataFrame({
-            'slope_range': result['slope_range'],
-            'length_km': result['length_km'].round(2)
+            'slope_range': pd.Categorical(labels, categories=labels, ordered=True),
+            'length_km': np.round(lengths, 2)
         })
 
+    @timed("profile.find_climbs")
+    def find_climbs(self, smooth_window=5, min_gain_m=30, max_dip_m=10):
+        """
+        Wyszukuje podjazdy: odcinki o przewyższeniu >= min_gain_m, w których
+        chwilowy spadek od dotychczasowego szczytu nie przekracza max_dip_m.
+        """
+        km = self.track_df["km"].to_numpy()
+        elev = self.smooth_profile(smooth_window).to_numpy()
+
+        climbs = []
+        start = peak = 0
+        for i in range(1, len(elev)):
+            if elev[i] >= elev[peak]:
+                peak = i
+            elif elev[peak] - elev[i] > max_dip_m:
+                # koniec podjazdu - zapisujemy odcinek dolina -> szczyt
+                if elev[peak] - elev[start] >= min_gain_m:
+                    climbs.append((start, peak))
+                start = peak = i
+            if elev[i] < elev[start]:
+                start = peak = i
+        if elev[peak] - elev[start] >= min_gain_m:
+            climbs.append((start, peak))
+
+        rows = []
+        for start, peak in climbs:
+            length_km = km[peak] - km[start]
+            gain = elev[peak] - elev[start]
+            rows.append([km[start], km[peak], length_km, gain,
+                         gain / (length_km * 1000) * 100 if length_km > 0 else 0, elev[peak]])
+        return pd.DataFrame(rows, columns=["start_km", "end_km", "length_km", "gain_m", "avg_slope", "top_elevation"])
+
+    @timed("profile.plot")
     def plot(
         self,
         show_labels=True,
@@ -174,11 +301,20 @@ class ElevationProfile:
         smooth_window=5,
         slope_thresholds=(2, 4, 5, 8),
         slope_colors=("lightgreen", "yellow", "orange", "orangered", "maroon"),
-        slope_labels=None
+        slope_labels=None,
+        label_size=10,
+        label_padding_px=2,
     ):
         """
         Rysuje profil wysokości z kolorami nachylenia.
+
+        Etykiety miejscowości nie nachodzą na siebie: szerokość etykiety jest
+        mierzona w km dla rzeczywistego rozmiaru wykresu, a przy kolizji
+        wygrywa większa miejscowość (patrz layout_labels).
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.patches as mpatches
+
         thresholds, default_labels = self._get_slope_bins(slope_thresholds)
         if slope_labels is None:
             slope_labels = default_labels
@@ -200,38 +336,80 @@ class ElevationProfile:
                 zorder=0,
             )
 
+        # numer przedziału [low, high) dla każdego punktu - jeden digitize zamiast maski na przedział
+        slope = self.track_df["slope"].to_numpy()
+        bins = np.where(np.isnan(slope), -1, np.digitize(slope, thresholds[1:-1]))
         legend = []
         for i, color in enumerate(slope_colors):
-            mask = (self.track_df["slope"] >= thresholds[i]) & (self.track_df["slope"] < thresholds[i + 1])
-            ax.fill_between(self.track_df["km"], elevation_smooth, where=mask, color=color, zorder=1)
+            ax.fill_between(self.track_df["km"], elevation_smooth, where=bins == i, color=color, zorder=1)
             legend.append(mpatches.Patch(color=color, label=slope_labels[i]))
 
-        if show_labels and self.places_df is not None:
+        ax.set_xlim(self.track_df["km"].min() - 1, self.track_df["km"].max())
+
+        if show_labels and self.places_df is not None and not self.places_df.empty:
             annotations_anchor = self.track_df["elevation"].max() * 1.1
-            last_label_km = -5
-            for _, row in self.places_df.iterrows():
-                if row["km"] - last_label_km >= 5:
-                    ax.annotate(
-                        row["place"],
-                        xy=(row["km"], row["elevation"]),
-                        xytext=(row["km"], annotations_anchor),
-                        arrowprops=dict(arrowstyle="-", color="lightgray"),
-                        horizontalalignment="center",
-                        rotation=90,
-                        size=10,
-                        color="gray",
-                    )
-                    last_label_km = row["km"]
+            label_kw = dict(rotation=90, size=label_size, color="gray", horizontalalignment="center")
+            width_km = self._label_width_km(fig, ax, label_kw, label_padding_px)
+
+            km = self.places_df["km"].to_numpy(dtype=np.float64)
+            priority = (self.places_df["segments"].to_numpy(dtype=np.float64)
+                        if "segments" in self.places_df.columns else np.zeros(len(km)))
+            keep = layout_labels(km, np.full(len(km), width_km), priority, ax.get_xlim())
+
+            names = self.places_df["place"].to_numpy()[keep]
+            elevations = self.places_df["elevation"].to_numpy(dtype=np.float64)[keep]
+            for name, x, y in zip(names, km[keep], elevations):
+                ax.annotate(
+                    name,
+                    xy=(x, y),
+                    xytext=(x, annotations_anchor),
+                    arrowprops=dict(arrowstyle="-", color="lightgray"),
+                    **label_kw,
+                )
 
         ax.plot(self.track_df["km"], elevation_smooth, color="darkgrey", linewidth=0.15)
-        ax.set_xlim(self.track_df["km"].min() - 1, self.track_df["km"].max())
         ax.legend(handles=legend, loc="center left", bbox_to_anchor=(1, 0.5))
 
         return fig, ax
 
 
+def layout_labels(positions, widths, priority, xlim=None):
+    """
+    Wybiera etykiety, które zmieszczą się bez nakładania (maska bool).
+
+    Etykieta i zajmuje przedział [positions[i] - widths[i]/2, positions[i] + widths[i]/2].
+    Kandydaci rozpatrywani są od najwyższego priorytetu (przy remisie - od
+    początku trasy). Przyjęte przedziały są rozłączne, więc kolizję z nimi
+    wystarczy sprawdzić u dwóch sąsiadów w posortowanej liście (bisect) -
+    całość O(n log n), bez dostępu do pandas w pętli.
+    """
+    from bisect import bisect_left
+
+    positions = np.asarray(positions, dtype=np.float64)
+    half = np.asarray(widths, dtype=np.float64) / 2
+    lo, hi = positions - half, positions + half
+    keep = np.zeros(len(positions), dtype=bool)
+    if xlim is not None:
+        candidates = (lo >= xlim[0]) & (hi <= xlim[1])
+    else:
+        candidates = np.ones(len(positions), dtype=bool)
+
+    order = np.lexsort((positions, -np.asarray(priority, dtype=np.float64)))
+    order = order[candidates[order]]
+    starts, ends = [], []  # przyjęte przedziały, posortowane
+    for i, a, b in zip(order.tolist(), lo[order].tolist(), hi[order].tolist()):
+        k = bisect_left(starts, a)
+        if (k > 0 and ends[k - 1] > a) or (k < len(starts) and starts[k] < b):
+            continue
+        starts.insert(k, a)
+        ends.insert(k, b)
+        keep[i] = True
+    return keep
+
+
 if __name__ == "__main__":
-    from gpx_parser import GPXParser
+    import matplotlib.pyplot as plt
+    from scripts.gpx_parser import GPXParser
 
     gpx_file = "data/track/orbita25.gpx"
     parser = GPXParser(gpx_file)
@@ -0,0 +1,263 @@
+"""
+Eksport danych w formatach do dalszej obróbki.
+
+Uczestnicy (widok po filtrach):  CSV, JSON, Parquet
+Trasa:                           GeoJSON, uproszczony GPX, CSV km/wysokość/nachylenie
+
+Każdy eksport to generator kawałków `bytes` budowanych z wycinków kolumn
+(bez tworzenia pełnej kopii tabeli w innym formacie), więc można go
+strumieniować wprost do pliku. Strony Streamlit korzystają z wersji
+zebranych w całość i zapamiętanych per klucz filtrów.
+
+Użycie z linii poleceń:
+    python -m scripts.exports uczestnicy wyniki.parquet --plec K --pora ranny
+    python -m scripts.exports trasa orbita.geojson
+"""
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+import streamlit as st
+
+from scripts.preprocess import DATA_PATH, load_data, apply_filters
+from scripts.track import point_slopes
+
+CHUNK_ROWS = 50_000
+PARTICIPANT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "json": ("application/json", "json"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+TRACK_FORMATS = {
+    "geojson": ("application/geo+json", "geojson"),
+    "gpx": ("application/gpx+xml", "gpx"),
+    "csv": ("text/csv", "csv"),
+}
+# tolerancja upraszczania GPX (Douglas-Peucker) [m]
+GPX_TOLERANCE_M = 5.0
+
+
+def _row_chunks(n, chunk_rows):
+    for start in range(0, n, chunk_rows):
+        yield start, min(start + chunk_rows, n)
+
+
+# ========================
+# Uczestnicy
+# ========================
+
+def participants_csv(df, chunk_rows=CHUNK_ROWS):
+    """CSV kawałkami po chunk_rows wierszy (nagłówek tylko w pierwszym)."""
+    for start, end in _row_chunks(len(df), chunk_rows):
+        yield df.iloc[start:end].to_csv(index=False, header=start == 0).encode("utf-8")
+    if len(df) == 0:
+        yield df.to_csv(index=False).encode("utf-8")
+
+
+def participants_json(df, chunk_rows=CHUNK_ROWS):
+    """Tablica JSON rekordów, składana z kawałków bez budowania całej listy."""
+    yield b"["
+    for start, end in _row_chunks(len(df), chunk_rows):
+        records = df.iloc[start:end].to_json(orient="records", force_ascii=False)[1:-1]
+        yield (b"," if start else b"") + records.encode("utf-8")
+    yield b"]"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Plik tylko do zapisu, z którego zapisane bajty odbiera się kawałkami."""
+
+    def __init__(self):
+        self._parts, self._position = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def participants_parquet(df, chunk_rows=CHUNK_ROWS):
+    """Parquet - każdy kawałek to jedna grupa wierszy (row group)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # schemat z pierwszego kawałka (pusty DataFrame daje typ null dla kolumn tekstowych)
+    schema = pa.Schema.from_pandas(df.iloc[:chunk_rows], preserve_index=False)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start, end in _row_chunks(len(df), chunk_rows):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:end], schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_participants(df, fmt, chunk_rows=CHUNK_ROWS):
+    """Generator kawałków eksportu uczestników w formacie fmt (csv/json/parquet)."""
+    writers = {"csv": participants_csv, "json": participants_json, "parquet": participants_parquet}
+    if fmt not in writers:
+        raise ValueError(f"Nieobsługiwany format eksportu uczestników: {fmt}")
+    return writers[fmt](df, chunk_rows)
+
+
+# ========================
+# Trasa
+# ========================
+
+def simplify_indices(x, y, tolerance):
+    """
+    Indeksy punktów pozostawionych przez algorytm Douglasa-Peuckera.
+
+    Odległości punktów od cięciwy liczone są wektorowo dla całego odcinka;
+    pętla idzie tylko po odcinkach czekających na podział (stos).
+    """
+    n = len(x)
+    if n < 3:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        px, py = x[i + 1:j] - x[i], y[i + 1:j] - y[i]
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        norm = np.hypot(dx, dy)
+        if norm == 0:
+            dist = np.hypot(px, py)
+        else:
+            dist = np.abs(px * dy - py * dx) / norm
+        k = int(dist.argmax())
+        if dist[k] > tolerance:
+            keep[i + 1 + k] = True
+            stack += [(i, i + 1 + k), (i + 1 + k, j)]
+    return np.flatnonzero(keep)
+
+
+def track_csv(track, chunk_rows=CHUNK_ROWS):
+    """CSV km, wysokość, nachylenie [%], lat, lon."""
+    slope = point_slopes(track.km, track.elevation) if len(track) else np.zeros(0)
+    lat, lon = track.latitude, track.longitude
+    yield b"km,elevation,slope_pct,latitude,longitude\n"
+    for start, end in _row_chunks(len(track), chunk_rows):
+        block = np.column_stack((track.km[start:end], track.elevation[start:end], slope[start:end],
+                                 lat[start:end], lon[start:end]))
+        out = io.StringIO()
+        np.savetxt(out, block, fmt=["%.3f", "%.1f", "%.2f", "%.7f", "%.7f"], delimiter=",")
+        yield out.getvalue().encode("utf-8")
+
+
+def track_geojson(track, chunk_rows=CHUNK_ROWS):
+    """GeoJSON Feature z LineString [lon, lat, wysokość]."""
+    properties = {"name": "Orbita", "length_km": round(float(track.km[-1]), 2) if len(track) else 0.0}
+    yield (
+        '{"type":"Feature","properties":' + json.dumps(properties, ensure_ascii=False)
+        + ',"geometry":{"type":"LineString","coordinates":['
+    ).encode("utf-8")
+    lat, lon = track.latitude, track.longitude
+    for start, end in _row_chunks(len(track), chunk_rows):
+        coords = ",".join(
+            f"[{x:.7f},{y:.7f},{z:.1f}]"
+            for x, y, z in zip(lon[start:end], lat[start:end], track.elevation[start:end].tolist())
+        )
+        yield ((b"," if start else b"") + coords.encode("utf-8"))
+    yield b"]}}"
+
+
+def track_gpx(track, tolerance_m=GPX_TOLERANCE_M, chunk_rows=CHUNK_ROWS):
+    """GPX uproszczony algorytmem Douglasa-Peuckera (tolerancja w metrach)."""
+    from scripts.spatial_index import GridIndex
+
+    lat, lon = track.latitude, track.longitude
+    index = GridIndex(lat, lon, cell_km=1.0)
+    idx = simplify_indices(index.x, index.y, tolerance_m / 1000)
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="Orbita_dashboard" xmlns="http://www.topografix.com/GPX/1/1">\n'
+        '<trk><name>Orbita</name><trkseg>\n'
+    ).encode("utf-8")
+    for start, end in _row_chunks(len(idx), chunk_rows):
+        part = idx[start:end]
+        yield "".join(
+            f'<trkpt lat="{y:.7f}" lon="{x:.7f}"><ele>{z:.1f}</ele></trkpt>\n'
+            for y, x, z in zip(lat[part], lon[part], track.elevation[part].tolist())
+        ).encode("utf-8")
+    yield b"</trkseg></trk>\n</gpx>\n"
+
+
+def export_track(track, fmt, chunk_rows=CHUNK_ROWS):
+    """Generator kawałków eksportu trasy (Track) w formacie fmt (geojson/gpx/csv)."""
+    writers = {"geojson": track_geojson, "gpx": track_gpx, "csv": track_csv}
+    if fmt not in writers:
+        raise ValueError(f"Nieobsługiwany format eksportu trasy: {fmt}")
+    return writers[fmt](track, chunk_rows=chunk_rows)
+
+
+def write_chunks(chunks, path):
+    """Zapisuje generator kawałków do pliku; zwraca liczbę bajtów."""
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+# ========================
+# Cache dla stron Streamlit
+# ========================
+
+@st.cache_data(max_entries=64)
+def participants_export(fmt, filters, include_dns, version):
+    """
+    Eksport uczestników po filtrach (plec, pora, typ) i przełączniku DNS -
+    jeden plik na klucz filtrów i format.
+    """
+    df_filtered = apply_filters(load_data(version=version), *filters)
+    if not include_dns:
+        df_filtered = df_filtered[~df_filtered["DNS"]]
+    return b"".join(export_participants(df_filtered, fmt))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("co", choices=["uczestnicy", "trasa"])
+    parser.add_argument("output", help="plik wynikowy; format z rozszerzenia")
+    parser.add_argument("--plec", nargs="*", help="filtr płci (np. K M)")
+    parser.add_argument("--pora", nargs="*", help="filtr pory startu (ranny wieczorny)")
+    parser.add_argument("--typ", nargs="*", help="filtr typu uczestnika (stary nowy)")
+    parser.add_argument("--bez-dns", action="store_true", help="pomiń zawodników, którzy nie wystartowali")
+    parser.add_argument("--track", default="data/track/orbita25.gpx", help="plik trasy (GPX/FIT)")
+    args = parser.parse_args()
+
+    fmt = os.path.splitext(args.output)[1].lstrip(".").lower()
+    if args.co == "uczestnicy":
+        df = load_data(DATA_PATH)
+        df = apply_filters(df,
+                           args.plec or df["plec"].unique(),
+                           args.pora or df["pora_startu"].unique(),
+                           args.typ or df["typ_uczestnika"].unique())
+        if args.bez_dns:
+            df = df[~df["DNS"]]
+        chunks = export_participants(df, fmt)
+    else:
+        from scripts.track import Track
+        from scripts.track_store import load_track
+        chunks = export_track(Track.from_dataframe(load_track(args.track)), fmt)
+    size = write_chunks(chunks, args.output)
+    print(f"Zapisano {args.output} ({size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import numpy as np
+
+from scripts.gpx_parser import GPXParser, NO_TIME, point_arrays
+
+# współrzędne w plikach FIT zapisane są w "semicircles"
+SEMICIRCLE_TO_DEG = 180 / 2 ** 31
+
+
+class FITParser(GPXParser):
+    """Parser FIT -> DataFrame (te same kolumny co GPXParser)."""
+
+    def read_raw(self):
+        """Zwraca tablice (lat, lon, elevation, time) z rekordów 'record' pliku FIT."""
+        try:
+            import fitdecode
+        except ImportError as e:
+            raise ImportError("Do odczytu plików FIT potrzebny jest pakiet 'fitdecode' (pip install fitdecode).") from e
+
+        points = []
+        with fitdecode.FitReader(self.gpx_path) as reader:
+            for frame in reader:
+                if not isinstance(frame, fitdecode.FitDataMessage) or frame.name != "record":
+                    continue
+                if not (frame.has_field("position_lat") and frame.has_field("position_long")):
+                    continue
+                lat_raw, lon_raw = frame.get_value("position_lat"), frame.get_value("position_long")
+                if lat_raw is None or lon_raw is None:
+                    continue
+                elevation = np.nan
+                for field in ("enhanced_altitude", "altitude"):
+                    if frame.has_field(field) and frame.get_value(field) is not None:
+                        elevation = frame.get_value(field)
+                        break
+                timestamp = frame.get_value("timestamp") if frame.has_field("timestamp") else None
+                points.append((lat_raw * SEMICIRCLE_TO_DEG, lon_raw * SEMICIRCLE_TO_DEG, elevation,
+                               NO_TIME if timestamp is None else int(timestamp.timestamp())))
+
+        if not points:
+            raise ValueError("Brak punktów w pliku FIT.")
+        return point_arrays(points)
@@ -1,6 +1,20 @@
-import gpxpy
+import numpy as np
 import pandas as pd
-from geopy.distance import geodesic
+
+from scripts.instrumentation import timed
+
+# gpxpy i geopy są importowane leniwie - potrzebne tylko przy parsowaniu pliku
+
+# znacznik punktu bez czasu w tablicy int64 sekund epoki
+NO_TIME = np.iinfo(np.int64).min
+
+
+def point_arrays(points):
+    """Lista krotek (lat, lon, elevation, time) -> cztery tablice NumPy."""
+    lats, lons, elevations, times = zip(*points)
+    return (np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64),
+            np.asarray(elevations, dtype=np.float64), np.asarray(times, dtype=np.int64))
+
 
 class GPXParser:
     """Parser GPX -> DataFrame"""
@@ -8,34 +22,71 @@ class GPXParser:
     def __init__(self, gpx_path):
         self.gpx_path = gpx_path
         self.track_df = None
+        # int64 sekundy epoki dla kolejnych wierszy track_df (None - plik bez czasów); punkty
+        # bez czasu mają NO_TIME - przed analizą przejazdu odfiltrowuje je ride_analytics.ride_arrays
+        self.timestamps = None
 
     def _get_distance(self, lat1, lon1, lat2, lon2):
         if None in (lat1, lon1, lat2, lon2):
             return 0
+        from geopy.distance import geodesic
         return geodesic((lat1, lon1), (lat2, lon2)).km
 
-    def parse_to_dataframe(self):
-        """Parsuje plik GPX i zwraca DataFrame z danymi o ścieżce."""
+    def read_raw(self):
+        """
+        Zwraca tablice (lat, lon, elevation, time) wszystkich punktów pliku GPX.
+
+        time: int64 sekundy epoki (NO_TIME dla punktów bez czasu),
+        elevation: NaN dla punktów bez wysokości.
+        """
+        import gpxpy
+
         with open(self.gpx_path, "r", encoding="utf-8") as gpx_file:
             gpx = gpxpy.parse(gpx_file)
 
+        points = [
+            (point.latitude, point.longitude,
+             np.nan if point.elevation is None else point.elevation,
+             NO_TIME if point.time is None else int(point.time.timestamp()))
+            for track in gpx.tracks for segment in track.segments for point in segment.points
+        ]
+        if not points:
+            raise ValueError("Brak punktów w ścieżce GPX.")
+        return point_arrays(points)
+
+    def _read_points(self):
+        """
+        Zwraca listę punktów [km, lat, lon, elevation]; czasy punktów trafiają
+        do self.timestamps (None, gdy plik ich nie zawiera).
+        """
+        lats, lons, elevations, times = self.read_raw()
+        self.timestamps = times if (times != NO_TIME).any() else None
+
         track_data = []
         km = 0
         last_lat, last_lon = None, None
+        for lat, lon, elevation in zip(lats.tolist(), lons.tolist(), elevations.tolist()):
+            km += self._get_distance(last_lat, last_lon, lat, lon)
+            track_data.append([km, lat, lon, elevation])
+            last_lat, last_lon = lat, lon
+        return track_data
 
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    dist = self._get_distance(last_lat, last_lon, point.latitude, point.longitude)
-                    km += dist
-                    track_data.append([km, point.latitude, point.longitude, point.elevation])
-                    last_lat, last_lon = point.latitude, point.longitude
-
+    @timed("gpx.parse_to_dataframe")
+    def parse_to_dataframe(self):
+        """Parsuje plik GPX i zwraca DataFrame z danymi o ścieżce."""
+        track_data = self._read_points()
         self.track_df = pd.DataFrame(track_data, columns=["km", "latitude", "longitude", "elevation"])
-        if self.track_df.empty:
-            raise ValueError("Brak punktów w ścieżce GPX.")
         return self.track_df
+
+    @timed("gpx.parse_to_track")
+    def parse_to_track(self, delta_encode=False):
+        """Parsuje plik i zwraca zwartą trasę (Track) opartą na tablicach NumPy."""
+        from scripts.track import Track
+
+        points = np.asarray(self._read_points(), dtype=np.float64)
+        return Track(points[:, 0], points[:, 1], points[:, 2], points[:, 3], delta_encode=delta_encode)
     
+    @timed("gpx.get_total_ascent")
     def get_total_ascent(self, smooth_window=5):
         """Oblicza całkowite przewyższenie na podstawie danych track_df."""
         if self.track_df is None:
@@ -0,0 +1,97 @@
+"""
+Rozkład nachyleń trasy: posortowane nachylenia odcinków z długościami
+skumulowanymi.
+
+Po jednorazowym sortowaniu (O(n log n)) każde pytanie o długość trasy
+w zakresie nachyleń to dwa wyszukiwania binarne, więc dowolny zestaw k
+progów, percentyl ("ile km powyżej 6%") czy histogram kosztuje O(k log n),
+bez ponownego wygładzania, diff, pd.cut i groupby.
+
+Przedziały są domknięte z prawej, (low, high] - tak jak pd.cut w
+ElevationProfile.compute_slope_lengths.
+"""
+import numpy as np
+
+
+class GradientDistribution:
+    """
+    Rozkład długości trasy względem nachylenia.
+
+    Atrybuty
+    --------
+    slopes : np.ndarray
+        Nachylenia odcinków [%], posortowane rosnąco (bez NaN).
+    cumulative_km : np.ndarray
+        cumulative_km[i] - łączna długość [km] odcinków slopes[:i] (len = n + 1).
+    """
+
+    def __init__(self, slopes, lengths_km):
+        slopes = np.asarray(slopes, dtype=np.float64)
+        lengths_km = np.asarray(lengths_km, dtype=np.float64)
+        valid = ~np.isnan(slopes)
+        order = np.argsort(slopes[valid], kind="stable")
+        self.slopes = slopes[valid][order]
+        self.cumulative_km = np.concatenate(([0.0], np.cumsum(lengths_km[valid][order])))
+
+    @classmethod
+    def from_profile(cls, km, elevation, min_delta_km=1e-4):
+        """
+        Rozkład z punktów profilu (km, wysokość - zwykle wygładzona).
+
+        Nachylenie odcinka między kolejnymi punktami; odcinki krótsze niż
+        min_delta_km są pomijane (jak w compute_slope_lengths).
+        """
+        d_km = np.diff(np.asarray(km, dtype=np.float64))
+        d_elev = np.diff(np.asarray(elevation, dtype=np.float64))
+        keep = d_km > min_delta_km
+        return cls(d_elev[keep] / (d_km[keep] * 1000) * 100, d_km[keep])
+
+    # ========================
+    # Metody publiczne
+    # ========================
+
+    @property
+    def total_km(self):
+        return float(self.cumulative_km[-1])
+
+    def _cumulative_at(self, slopes):
+        """Długość [km] odcinków o nachyleniu <= slopes (wektorowo)."""
+        return self.cumulative_km[np.searchsorted(self.slopes, slopes, side="right")]
+
+    def length_between(self, low, high):
+        """Długość [km] odcinków o nachyleniu w (low, high]."""
+        return float(self._cumulative_at(high) - self._cumulative_at(low))
+
+    def length_above(self, slope):
+        """Długość [km] odcinków bardziej stromych niż slope [%]."""
+        return self.total_km - float(self._cumulative_at(slope))
+
+    def length_below(self, slope):
+        """Długość [km] odcinków o nachyleniu <= slope [%]."""
+        return float(self._cumulative_at(slope))
+
+    def bucket_lengths(self, thresholds):
+        """
+        Długości [km] w przedziałach wyznaczonych przez rosnące progi:
+        (-inf, t0], (t0, t1], ..., (tk, inf) - k + 1 wartości.
+        """
+        edges = np.concatenate(([-np.inf], np.asarray(thresholds, dtype=np.float64), [np.inf]))
+        return np.diff(self._cumulative_at(edges))
+
+    def percentile(self, q):
+        """
+        Nachylenie [%], poniżej którego (włącznie) leży q procent długości trasy
+        (q może być tablicą).
+        """
+        target = np.asarray(q, dtype=np.float64) / 100 * self.total_km
+        idx = np.searchsorted(self.cumulative_km[1:], target, side="left")
+        return self.slopes[np.minimum(idx, len(self.slopes) - 1)]
+
+    def histogram(self, step=1.0, low=-15.0, high=15.0):
+        """(krawędzie przedziałów [%], długości [km]); skrajne przedziały zbierają resztę."""
+        edges = np.arange(low, high + step / 2, step)
+        lengths = self.bucket_lengths(edges)
+        # pierwszy i ostatni przedział (-inf / inf) doliczane do skrajnych kubełków
+        lengths[1] += lengths[0]
+        lengths[-2] += lengths[-1]
+        return edges, lengths[1:-1]
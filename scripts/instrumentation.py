@@ -0,0 +1,204 @@
+"""
+Lekka instrumentacja ścieżek krytycznych (czasy etapów, liczniki, histogramy).
+
+Pomiary są domyślnie wyłączone - wtedy `timed` sprowadza się do jednego
+sprawdzenia flagi. Włączenie: zmienna środowiskowa ORBITA_METRICS=1 albo enable().
+
+    with timed("gpx.parse"):
+        ...
+
+    @timed("profile.plot")
+    def plot(...):
+        ...
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+# górne granice kubełków histogramu [s] (jak w Prometheusie, ostatni to +Inf)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_enabled = os.environ.get("ORBITA_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_timings = {}
+_counters = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Czyści wszystkie zebrane pomiary."""
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+
+def observe(name, seconds):
+    """Zapisuje pojedynczy pomiar czasu etapu."""
+    with _lock:
+        stats = _timings.get(name)
+        if stats is None:
+            stats = _timings[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+        stats["count"] += 1
+        stats["sum"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats["buckets"][i] += 1
+                break
+
+
+def count(name, value=1):
+    """Zwiększa licznik zdarzeń (np. zapytania do geokodera, trafienia w cache)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class timed:
+    """Menedżer kontekstu i dekorator mierzący czas wykonania etapu `name`."""
+
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        if _enabled:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            observe(self.name, time.perf_counter() - self._start)
+            self._start = None
+        return False
+
+    def __call__(self, func):
+        name = self.name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+
+        return wrapper
+
+
+# ========================
+# Eksport
+# ========================
+
+def snapshot():
+    """Zwraca kopię zebranych pomiarów: {'timings': {...}, 'counters': {...}}."""
+    with _lock:
+        return {
+            "timings": {name: dict(stats, buckets=list(stats["buckets"])) for name, stats in _timings.items()},
+            "counters": dict(_counters),
+        }
+
+
+def to_json_lines(data=None):
+    """Jeden obiekt JSON na linię: etapy (type='timing') i liczniki (type='counter')."""
+    data = data or snapshot()
+    ts = time.time()
+    lines = []
+    for name, stats in sorted(data["timings"].items()):
+        lines.append(json.dumps({
+            "ts": ts, "type": "timing", "name": name,
+            "count": stats["count"], "sum": stats["sum"], "max": stats["max"],
+            "buckets": dict(zip(map(str, BUCKETS), stats["buckets"])),
+        }))
+    for name, value in sorted(data["counters"].items()):
+        lines.append(json.dumps({"ts": ts, "type": "counter", "name": name, "value": value}))
+    return "\n".join(lines) + "\n"
+
+
+def to_prometheus(data=None):
+    """Format tekstowy Prometheusa (node_exporter textfile collector)."""
+    data = data or snapshot()
+    lines = [
+        "# HELP orbita_stage_duration_seconds Czas wykonania etapu.",
+        "# TYPE orbita_stage_duration_seconds histogram",
+    ]
+    for name, stats in sorted(data["timings"].items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS, stats["buckets"]):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'orbita_stage_duration_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'orbita_stage_duration_seconds_sum{{stage="{name}"}} {stats["sum"]}')
+        lines.append(f'orbita_stage_duration_seconds_count{{stage="{name}"}} {stats["count"]}')
+    lines += [
+        "# HELP orbita_events_total Liczba zdarzeń.",
+        "# TYPE orbita_events_total counter",
+    ]
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'orbita_events_total{{event="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    """Zapisuje pomiary do pliku: .prom -> format Prometheusa, inaczej JSON lines (dopisywane)."""
+    if path.endswith(".prom"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(to_prometheus())
+    else:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(to_json_lines())
+    return path
+
+
+# ========================
+# Panel debug
+# ========================
+
+def debug_panel():
+    """Panel w sidebarze z czasami etapów - wyświetlany tylko przy włączonych pomiarach."""
+    if not _enabled:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    data = snapshot()
+    with st.sidebar.expander("Debug: czasy etapów", expanded=False):
+        if data["timings"]:
+            rows = [
+                {
+                    "etap": name,
+                    "n": stats["count"],
+                    "średnio [ms]": round(stats["sum"] / stats["count"] * 1000, 2),
+                    "max [ms]": round(stats["max"] * 1000, 2),
+                }
+                for name, stats in sorted(data["timings"].items())
+            ]
+            st.dataframe(pd.DataFrame(rows), hide_index=True)
+        for name, value in sorted(data["counters"].items()):
+            st.caption(f"{name}: {value}")
+        st.download_button("Eksport JSON lines", to_json_lines(data), file_name="orbita_metrics.jsonl",
+                           mime="application/json")
+        st.download_button("Eksport Prometheus", to_prometheus(data), file_name="orbita_metrics.prom",
+                           mime="text/plain")
+        if st.button("Wyczyść pomiary"):
+            reset()
@@ -0,0 +1,409 @@
+"""
+Zadania w tle dla wolnych artefaktów: geolokacja miejscowości, PNG profilu, mapa.
+
+JobRunner uruchamia zadania w puli wątków (albo procesów) i zapisuje ich stan
+w tabeli SQLite, więc historia i ostatni udany wynik przetrwają restart
+serwera. Zadanie identyfikuje klucz = rodzaj + parametry + sygnatury plików
+wejściowych: ponowne zgłoszenie tego samego zadania (np. przy każdym rerun
+strony) nie uruchamia go drugi raz. Zadanie zakończone błędem jest ponawiane
+dopiero po odczekaniu (RETRY_AFTER_S, podwajane przy kolejnych błędach) albo
+po zmianie plików wejściowych - ważne dla Nominatim z limitem zapytań.
+
+Każde zadanie ma właściciela (proces, który je uruchomił). Przy kilku
+workerach serwera nowy JobRunner oznacza jako przerwane tylko zadania,
+których właściciel już nie żyje. Artefakt zapisywany jest do pliku
+tymczasowego i podmieniany atomowo - strony serwują ostatni udany wynik,
+dopóki nowy nie jest gotowy.
+
+Użycie z linii poleceń (synchronicznie, z tą samą tabelą zadań):
+    python -m scripts.jobs run map profile_png
+    python -m scripts.jobs run geocoding --param min_distance_km=10
+    python -m scripts.jobs list
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+JOBS_DB = "cache/jobs.sqlite"
+ARTIFACTS_DIR = "cache/artifacts"
+GPX_PATH = "data/track/orbita25.gpx"
+# cache odpowiedzi Nominatim (współrzędne -> nazwa), wersjonowany w repozytorium
+PLACES_CACHE = "cache/places_cache.json"
+
+QUEUED, RUNNING, DONE, FAILED, INTERRUPTED = "oczekuje", "w toku", "gotowe", "błąd", "przerwane"
+ACTIVE = (QUEUED, RUNNING)
+# przerwa przed ponowieniem zadania po błędzie (podwajana przy kolejnych błędach, do MAX_RETRY_AFTER_S)
+RETRY_AFTER_S = 15 * 60
+MAX_RETRY_AFTER_S = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    artifact TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key);
+CREATE INDEX IF NOT EXISTS jobs_kind ON jobs (kind, status);
+"""
+
+
+def _migrate(conn):
+    """Dodaje kolumny nowsze niż tabela z poprzednich wersji."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+    if "owner" not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+
+def _read_first(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _start_time(pid):
+    """Czas startu procesu (tyknięcia od uruchomienia systemu, Linux) albo None."""
+    stat = _read_first(f"/proc/{pid}/stat")
+    return stat.rsplit(")", 1)[1].split()[19] if stat else None
+
+
+def process_owner(pid=None):
+    """
+    Identyfikator procesu: host / boot id / pid / czas startu.
+
+    Boot id i czas startu odróżniają proces od innego, który po restarcie
+    systemu albo później dostał ten sam pid.
+    """
+    pid = pid or os.getpid()
+    boot = _read_first("/proc/sys/kernel/random/boot_id") or ""
+    return f"{socket.gethostname()}/{boot}/{pid}/{_start_time(pid) or ''}"
+
+
+def owner_alive(owner):
+    """
+    Czy proces-właściciel zadania nadal działa. Procesu z innego hosta nie da
+    się sprawdzić - jest uznawany za żywy. Brak właściciela (stare wpisy) = martwy.
+    """
+    if not owner:
+        return False
+    host, boot, pid, start = owner.split("/")
+    if host != socket.gethostname():
+        return True
+    if boot and boot != (_read_first("/proc/sys/kernel/random/boot_id") or ""):
+        return False
+    if start:
+        return _start_time(int(pid)) == start
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _update(db_path, job_id, **fields):
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    with _connect(db_path) as conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _report_progress(db_path, job_id, fraction):
+    """Callback postępu przekazywany do zadań (działa też w procesie potomnym)."""
+    _update(db_path, job_id, progress=float(min(max(fraction, 0.0), 1.0)))
+
+
+def _signature(path):
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# ========================
+# Zadania
+# ========================
+# Funkcje na poziomie modułu (da się je przekazać do puli procesów).
+# Każda dostaje (params, ścieżka wynikowa, progress(ułamek)).
+
+def _profile(params):
+    from scripts.elevation_profile import ElevationProfile
+    from scripts.track_store import load_track
+
+    # geolokacja i PNG działają na oryginalnych punktach - bez siatki nachyleń, a klucze
+    # places_cache.json (współrzędne pierwszych punktów odcinków) zostają te same
+    return ElevationProfile(load_track(params.get("gpx", GPX_PATH)), seg_unit_km=0.5, resample_step_km=None)
+
+
+def geocode_task(params, out_path, progress):
+    """Miejscowości wzdłuż trasy (Nominatim albo lokalny gazeter) -> CSV."""
+    profile = _profile(params)
+    geocoder = None
+    if params.get("gazetteer"):
+        from scripts.offline_geocoder import OfflineGeocoder
+        geocoder = OfflineGeocoder.from_file(params["gazetteer"])
+    profile.geolocate_places(
+        min_distance_km=float(params.get("min_distance_km", 5)),
+        cache_file=params.get("cache_file", PLACES_CACHE),
+        geocoder=geocoder, progress=progress,
+    )
+    profile.places_df.to_csv(out_path, index=False)
+
+
+def profile_png_task(params, out_path, progress):
+    """PNG profilu wysokościowego (z miejscowościami, jeśli podano CSV z geolokacji)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    profile = _profile(params)
+    if params.get("places"):
+        profile.places_df = pd.read_csv(params["places"])
+    progress(0.5)
+    fig, _ = profile.plot(show_labels=profile.places_df is not None)
+    fig.savefig(out_path, format="png", dpi=150, bbox_inches="tight")
+    plt.close(fig)
+
+
+def map_task(params, out_path, progress):
+    """Mapa folium trasy (HTML)."""
+    from scripts.map_generator import build_map
+    from scripts.track_store import load_track
+
+    track_df = load_track(params.get("gpx", GPX_PATH))
+    progress(0.5)
+    build_map(track_df[["latitude", "longitude"]].to_numpy().tolist()).save(out_path)
+
+
+# rodzaj -> (funkcja, rozszerzenie artefaktu, parametry będące ścieżkami plików wejściowych)
+TASKS = {
+    "geocoding": (geocode_task, "csv", ("gpx", "gazetteer")),
+    "profile_png": (profile_png_task, "png", ("gpx", "places")),
+    "map": (map_task, "html", ("gpx",)),
+}
+
+
+def _execute(kind, params, out_path, db_path, job_id):
+    """Uruchamia zadanie i aktualizuje tabelę; wynik trafia do out_path dopiero po sukcesie."""
+    func, ext, _ = TASKS[kind]
+    _update(db_path, job_id, status=RUNNING, started=time.time())
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        func(params, tmp_path, partial(_report_progress, db_path, job_id))
+        os.replace(tmp_path, out_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        _update(db_path, job_id, status=FAILED, error=traceback.format_exc(limit=5), finished=time.time())
+        return False
+    _update(db_path, job_id, status=DONE, progress=1.0, artifact=out_path, finished=time.time())
+    return True
+
+
+class JobRunner:
+    """
+    Kolejka zadań w tle z trwałą tabelą stanu.
+
+    Atrybuty
+    --------
+    db_path : str
+        Plik SQLite z tabelą zadań.
+    artifacts_dir : str
+        Katalog artefaktów (nazwa pliku = rodzaj + klucz zadania).
+    retry_after_s : float
+        Przerwa przed ponowieniem zadania zakończonego błędem.
+    owner : str
+        Identyfikator tego procesu zapisywany przy zgłaszanych zadaniach.
+    """
+
+    def __init__(self, db_path=JOBS_DB, artifacts_dir=ARTIFACTS_DIR, max_workers=2, processes=False,
+                 retry_after_s=RETRY_AFTER_S):
+        self.db_path = db_path
+        self.artifacts_dir = artifacts_dir
+        self.retry_after_s = retry_after_s
+        self.owner = process_owner()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        os.makedirs(artifacts_dir, exist_ok=True)
+        with _connect(db_path) as conn:
+            conn.executescript(_SCHEMA)
+            _migrate(conn)
+            # zadania procesów, które już nie działają (restart serwera, padnięty worker)
+            rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN (?, ?)", ACTIVE).fetchall()
+            orphans = [(INTERRUPTED, row["id"]) for row in rows if not owner_alive(row["owner"])]
+            conn.executemany("UPDATE jobs SET status = ? WHERE id = ?", orphans)
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._executor = pool(max_workers=max_workers)
+        self._lock = threading.Lock()
+
+    # ========================
+    # Metody prywatne
+    # ========================
+
+    def _key(self, kind, params):
+        _, _, input_params = TASKS[kind]
+        inputs = {name: _signature(params.get(name)) for name in input_params}
+        payload = json.dumps([kind, params, inputs], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _retry_at(self, rows):
+        """
+        Najwcześniejsza chwila ponowienia po serii błędów (rows: zadania klucza od
+        najnowszego) albo None, jeśli ostatnie zadanie nie skończyło się błędem.
+        """
+        failures = 0
+        for row in rows:
+            if row["status"] != FAILED:
+                break
+            failures += 1
+        if failures == 0:
+            return None
+        delay = min(self.retry_after_s * 2 ** (failures - 1), MAX_RETRY_AFTER_S)
+        return (rows[0]["finished"] or rows[0]["created"]) + delay
+
+    # ========================
+    # Metody publiczne
+    # ========================
+
+    def submit(self, kind, params=None, wait=False, retry_failed=False):
+        """
+        Zgłasza zadanie; zwraca id. Jeśli identyczne zadanie czeka, trwa (w żywym
+        procesie), ma gotowy artefakt albo niedawno skończyło się błędem, zwracane
+        jest jego id bez ponownego uruchamiania. retry_failed=True pomija przerwę
+        po błędzie (ręczne ponowienie).
+        """
+        if kind not in TASKS:
+            raise ValueError(f"Nieznany rodzaj zadania: {kind}")
+        params = dict(params or {})
+        params.setdefault("gpx", GPX_PATH)
+        key = self._key(kind, params)
+        with self._lock, _connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT id, status, artifact, owner, created, finished FROM jobs WHERE key = ? "
+                "AND status != ? ORDER BY id DESC LIMIT 16",
+                (key, INTERRUPTED),
+            ).fetchall()
+            for row in rows:
+                if row["status"] in ACTIVE:
+                    if owner_alive(row["owner"]):
+                        return row["id"]
+                    conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (INTERRUPTED, row["id"]))
+                elif row["status"] == DONE and os.path.exists(row["artifact"] or ""):
+                    return row["id"]
+            finished = [row for row in rows if row["status"] in (DONE, FAILED)]
+            retry_at = None if retry_failed else self._retry_at(finished)
+            if retry_at is not None and time.time() < retry_at:
+                return finished[0]["id"]
+            job_id = conn.execute(
+                "INSERT INTO jobs (kind, key, params, status, created, owner) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(params, sort_keys=True), QUEUED, time.time(), self.owner),
+            ).lastrowid
+
+        out_path = os.path.join(self.artifacts_dir, f"{kind}_{key}.{TASKS[kind][1]}")
+        future = self._executor.submit(_execute, kind, params, out_path, self.db_path, job_id)
+        if wait:
+            future.result()
+        return job_id
+
+    def status(self, job_id):
+        """Stan zadania jako słownik (albo None)."""
+        with _connect(self.db_path) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def latest(self, kind):
+        """Ostatnie udane zadanie danego rodzaju z istniejącym artefaktem (słownik) albo None."""
+        with _connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND status = ? ORDER BY finished DESC", (kind, DONE)
+            ).fetchall()
+        return next((dict(row) for row in rows if os.path.exists(row["artifact"])), None)
+
+    def active(self, kind=None):
+        """Zadania oczekujące i w toku (lista słowników)."""
+        query, args = "SELECT * FROM jobs WHERE status IN (?, ?)", list(ACTIVE)
+        if kind is not None:
+            query, args = query + " AND kind = ?", args + [kind]
+        with _connect(self.db_path) as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY id", args)]
+
+    def jobs(self, limit=50):
+        """Ostatnie zadania jako DataFrame."""
+        with _connect(self.db_path) as conn:
+            return pd.read_sql_query("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", conn, params=(limit,))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def schedule_artifacts(runner, gpx_path=GPX_PATH, geocode=False, gazetteer=None):
+    """
+    Zgłasza odświeżenie artefaktów trasy (bezpieczne przy każdym rerun - deduplikacja).
+
+    PNG profilu powstaje dopiero z gotowej geolokacji, żeby nie zastąpić
+    opisanego profilu wersją bez miejscowości.
+    """
+    runner.submit("map", {"gpx": gpx_path})
+    if geocode or gazetteer:
+        params = {"gpx": gpx_path}
+        if gazetteer:
+            params["gazetteer"] = gazetteer
+        runner.submit("geocoding", params)
+    places = runner.latest("geocoding")
+    if places is not None:
+        runner.submit("profile_png", {"gpx": gpx_path, "places": places["artifact"]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="uruchom zadania i poczekaj na wynik")
+    run.add_argument("kinds", nargs="+", choices=list(TASKS))
+    run.add_argument("--param", action="append", default=[], help="parametr zadania klucz=wartość")
+    sub.add_parser("list", help="ostatnie zadania")
+    args = parser.parse_args()
+
+    runner = JobRunner()
+    if args.command == "run":
+        params = dict(p.split("=", 1) for p in args.param)
+        for kind in args.kinds:
+            kind_params = dict(params)
+            if kind == "profile_png" and "places" not in kind_params:
+                places = runner.latest("geocoding")
+                if places is not None:
+                    kind_params["places"] = places["artifact"]
+            job = runner.status(runner.submit(kind, kind_params, wait=True, retry_failed=True))
+            print(f"{kind}: {job['status']} {job['artifact'] or job['error'] or ''}")
+    else:
+        print(runner.jobs()[["id", "kind", "status", "progress", "artifact"]].to_string(index=False))
+    runner.shutdown()
+
+
+if __name__ == "__main__":
+    main()
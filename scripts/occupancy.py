@@ -0,0 +1,92 @@
+"""
+Symulacja obłożenia pętli w czasie (ilu zawodników jest na danym odcinku).
+
+Dla każdego zawodnika znane są: pora startu, przejechany dystans
+(dystans_km) i tempo na kolejnych okrążeniach. Pozycje wszystkich
+zawodników na siatce czasu liczone są naraz przez broadcasting NumPy
+(zawodnicy x chwile x okrążenia), a następnie zliczane w przedziałach km
+trasy - wynikiem jest macierz czas x km.
+
+Długość pętli (lap_km) pochodzi z wczytanej trasy, np.
+resources.track_summary()["length_km"], a nie ze stałej - zmiana pliku GPX
+zmienia też symulację.
+"""
+import numpy as np
+import pandas as pd
+
+# godziny startu grup (zegar doby zawodów, 0 = północ pierwszego dnia)
+START_HOURS = {"ranny": 6.0, "wieczorny": 18.0}
+DEFAULT_SPEED_KMH = 24.0
+
+
+def rider_speeds(participants, base_speed_kmh=DEFAULT_SPEED_KMH, fatigue=0.05, max_laps=8):
+    """
+    Prędkości zawodników na kolejnych okrążeniach (macierz zawodnicy x okrążenia).
+
+    Jeśli dostępny jest czas jazdy ze śladu (czas_jazdy_h), używana jest średnia
+    prędkość zawodnika; w przeciwnym razie base_speed_kmh. Każde kolejne
+    okrążenie jest wolniejsze o `fatigue` (ułamek).
+    """
+    speed = np.full(len(participants), base_speed_kmh, dtype=np.float64)
+    if {"czas_jazdy_h", "dystans_km_slad"}.issubset(participants.columns):
+        measured = (participants["dystans_km_slad"] / participants["czas_jazdy_h"]).to_numpy(dtype=np.float64)
+        usable = np.isfinite(measured) & (measured > 5)
+        speed[usable] = measured[usable]
+    decay = (1 - fatigue) ** np.arange(max_laps)
+    return speed[:, None] * decay[None, :]
+
+
+def simulate_positions(start_h, distance_km, lap_speeds, times_h, lap_km):
+    """
+    Pozycje (km w pętli) zawodników w chwilach times_h; NaN dla zawodników,
+    którzy jeszcze nie wystartowali lub już skończyli jazdę.
+
+    Zwraca macierz zawodnicy x chwile.
+    """
+    lap_durations = lap_km / lap_speeds                                  # R x K
+    lap_ends = np.cumsum(lap_durations, axis=1)                          # R x K
+    lap_starts = lap_ends - lap_durations
+    elapsed = times_h[None, :] - start_h[:, None]                        # R x T
+
+    # numer bieżącego okrążenia: ile okrążeń już się skończyło (R x T x K -> R x T)
+    lap = (elapsed[:, :, None] >= lap_ends[:, None, :]).sum(axis=2)
+    lap = np.minimum(lap, lap_speeds.shape[1] - 1)
+    rows = np.arange(len(start_h))[:, None]
+    covered = lap * lap_km + (elapsed - lap_starts[rows, lap]) * lap_speeds[rows, lap]
+
+    on_course = (elapsed >= 0) & (covered < distance_km[:, None])
+    return np.where(on_course, covered % lap_km, np.nan)
+
+
+def occupancy_grid(participants, lap_km, time_step_min=10, km_step=2.0, hours=(0, 48),
+                   start_hours=START_HOURS, **speed_kwargs):
+    """
+    Liczba zawodników na odcinkach trasy w czasie (lap_km - długość pętli z trasy).
+
+    Zwraca (macierz [chwile x odcinki], chwile [h], początki odcinków [km]).
+    Pomijani są zawodnicy DNS i ci bez przejechanego dystansu.
+    """
+    riders = participants[(~participants["DNS"]) & (participants["dystans_km"] > 0)]
+    times_h = np.arange(hours[0], hours[1], time_step_min / 60)
+    km_edges = np.arange(0, lap_km + km_step, km_step)
+    if riders.empty:
+        return np.zeros((len(times_h), len(km_edges) - 1), dtype=np.int32), times_h, km_edges[:-1]
+
+    start_h = riders["pora_startu"].map(start_hours).fillna(min(start_hours.values())).to_numpy(dtype=np.float64)
+    distance = riders["dystans_km"].to_numpy(dtype=np.float64)
+    max_laps = int(np.ceil(distance.max() / lap_km)) + 1
+    positions = simulate_positions(start_h, distance, rider_speeds(riders, max_laps=max_laps, **speed_kwargs),
+                                   times_h, lap_km)
+
+    # zliczanie (chwila, odcinek) jednym bincount
+    t_idx = np.broadcast_to(np.arange(len(times_h)), positions.shape)
+    valid = ~np.isnan(positions)
+    km_idx = np.minimum((positions[valid] // km_step).astype(np.int64), len(km_edges) - 2)
+    counts = np.bincount(t_idx[valid] * (len(km_edges) - 1) + km_idx,
+                         minlength=len(times_h) * (len(km_edges) - 1))
+    return counts.reshape(len(times_h), len(km_edges) - 1).astype(np.int32), times_h, km_edges[:-1]
+
+
+def occupancy_frame(grid, times_h, km_starts):
+    """Macierz obłożenia jako DataFrame (indeks: godzina, kolumny: km)."""
+    return pd.DataFrame(grid, index=np.round(times_h, 2), columns=np.round(km_starts, 1))
@@ -0,0 +1,109 @@
+"""
+Offline reverse geocoding na podstawie lokalnego gazetera miejscowości.
+
+Obsługiwane pliki:
+- zrzut GeoNames (np. PL.txt z https://download.geonames.org/export/dump/),
+  z którego brane są miejscowości (feature class 'P'),
+- CSV z kolumnami: name, latitude, longitude oraz opcjonalnie population
+  i/lub type (city/town/village).
+
+Miejscowości trafiają do siatkowego indeksu przestrzennego (GridIndex),
+a zapytania dla wszystkich punktów trasy liczone są jednym wektorowym
+przebiegiem.
+
+Każda miejscowość ma "promień wpływu" zależny od wielkości (populacji albo
+typu), więc punkt na obrzeżach miasta przypisany zostanie do miasta, a nie
+do najbliższego punktu wsi - podobnie jak city/town/village w Nominatim.
+"""
+import numpy as np
+import pandas as pd
+
+from scripts.spatial_index import GridIndex
+
+# kolumny zrzutu GeoNames (geoname table)
+GEONAMES_COLUMNS = [
+    "geonameid", "name", "asciiname", "alternatenames", "latitude", "longitude",
+    "feature_class", "feature_code", "country_code", "cc2", "admin1", "admin2",
+    "admin3", "admin4", "population", "elevation", "dem", "timezone", "modified",
+]
+
+# promień wpływu [km] dla miejscowości bez populacji
+TYPE_RADIUS_KM = {"city": 5.0, "town": 2.5, "village": 1.2}
+DEFAULT_RADIUS_KM = 1.2
+
+
+def influence_radius_km(population):
+    """Przybliżony promień zabudowy [km] na podstawie liczby mieszkańców."""
+    return 1.0 + 0.5 * np.sqrt(np.maximum(population, 0) / 1000)
+
+
+def load_gazetteer(path):
+    """Wczytuje gazeter (GeoNames .txt lub CSV) do DataFrame [name, latitude, longitude, radius_km]."""
+    if path.lower().endswith(".txt"):
+        df = pd.read_csv(path, sep="\t", header=None, names=GEONAMES_COLUMNS, usecols=[1, 4, 5, 6, 14],
+                         quoting=3, dtype={"name": str}, keep_default_na=False)
+        df = df[df["feature_class"] == "P"]
+    else:
+        df = pd.read_csv(path)
+
+    radius = np.full(len(df), DEFAULT_RADIUS_KM)
+    if "type" in df.columns:
+        radius = df["type"].map(TYPE_RADIUS_KM).fillna(DEFAULT_RADIUS_KM).to_numpy()
+    if "population" in df.columns:
+        population = pd.to_numeric(df["population"], errors="coerce").fillna(0).to_numpy()
+        radius = np.where(population > 0, influence_radius_km(population), radius)
+
+    return pd.DataFrame({
+        "name": df["name"].to_numpy(),
+        "latitude": df["latitude"].to_numpy(dtype=np.float64),
+        "longitude": df["longitude"].to_numpy(dtype=np.float64),
+        "radius_km": radius,
+    })
+
+
+class OfflineGeocoder:
+    """
+    Reverse geocoder oparty o gazeter i siatkowy indeks przestrzenny.
+
+    Atrybuty
+    --------
+    places : pd.DataFrame
+        Miejscowości: ['name', 'latitude', 'longitude', 'radius_km'].
+    cell_km : float
+        Rozmiar komórki indeksu; musi być >= największemu promieniowi wpływu,
+        żeby wystarczyło przeszukać 3x3 sąsiednie komórki.
+    """
+
+    def __init__(self, places: pd.DataFrame, cell_km: float | None = None):
+        if places.empty:
+            raise ValueError("Gazeter jest pusty.")
+        self.places = places.reset_index(drop=True)
+        self._names = self.places["name"].to_numpy()
+        self._radius = self.places["radius_km"].to_numpy(dtype=np.float64)
+        self.cell_km = cell_km or max(float(self._radius.max()), 1.0)
+        self._index = GridIndex(self.places["latitude"], self.places["longitude"], self.cell_km)
+
+    @classmethod
+    def from_file(cls, path, cell_km=None):
+        return cls(load_gazetteer(path), cell_km=cell_km)
+
+    def reverse_many(self, latitudes, longitudes):
+        """
+        Zwraca listę nazw miejscowości (albo None) dla wszystkich punktów naraz.
+
+        Wybierana jest miejscowość o najmniejszym stosunku odległość / promień
+        wpływu, o ile punkt mieści się w tym promieniu.
+        """
+        result = np.full(len(latitudes), None, dtype=object)
+        if len(result) == 0:
+            return result.tolist()
+
+        qx, qy = self._index.project(latitudes, longitudes)
+        best, _ = self._index.best(qx, qy, score_fn=lambda dist, q, p: dist / self._radius[p], max_score=1.0)
+        found = best >= 0
+        result[found] = self._names[best[found]]
+        return result.tolist()
+
+    def reverse(self, latitude, longitude):
+        """Nazwa miejscowości dla pojedynczego punktu (albo None)."""
+        return self.reverse_many([latitude], [longitude])[0]
@@ -0,0 +1,258 @@
+"""
+Prognoza tempa i szansy na zrealizowanie deklaracji (deklarowane okrążenia)
+dla wszystkich zawodników naraz.
+
+Trasa to równomierna siatka dystansu (co step_km) z nachyleniem liczonym na
+100 m (point_slopes). Prędkość na każdej próbce wynika z bilansu mocy:
+
+    P * sprawność = v * m * g * (sin θ + Crr * cos θ) + 0.5 * ρ * CdA * v^3
+
+rozwiązywanego metodą Newtona na macierzy zawodnicy x próbki trasy
+(broadcasting NumPy, bez pętli po zawodnikach). Pętla jest tylko po
+okrążeniach, bo start okrążenia zależy od końca poprzedniego (noc, zmęczenie).
+
+Szansa na deklarację: rzeczywista moc zawodnika to prognoza razy czynnik
+log-normalny (sigma), więc wystarczy znaleźć skalę mocy potrzebną do
+zmieszczenia deklarowanych okrążeń w limicie (bisekcja, też wektorowo)
+i policzyć dystrybuantę.
+
+Domyślne parametry to założenia fizyczne (moc jazdy, postój), a nie wartości
+dopasowane do wyników: model mówi, czy tempo pozwala zmieścić deklarację
+w limicie, ale nie zna rezygnacji. Na wynikach 2025 przewiduje ~95%
+zrealizowanych deklaracji wobec 63% rzeczywistych; dopasowanie samych
+BASE_POWER_W / STOP_MIN_PER_LAP / POWER_SIGMA daje wartości niefizyczne
+(~20 W albo sigma ~1.8 przy 10 h postoju). Porównanie z wynikami: backtest
+i `python -m scripts.pacing`.
+
+Użycie:
+    python -m scripts.pacing --power-m 110 --stop 20 --sigma 0.2
+"""
+import argparse
+import math
+
+import numpy as np
+import pandas as pd
+
+from scripts.occupancy import START_HOURS
+from scripts.ride_analytics import DEFAULT_RIDER, GRAVITY
+from scripts.track import point_slopes, resample_dataframe
+
+TIME_LIMIT_H = 24.0
+# domyślna moc utrzymywana na pierwszym okrążeniu [W] i masa z rowerem [kg] wg płci
+BASE_POWER_W = {"M": 110.0, "K": 85.0}
+RIDER_MASS_KG = {"M": 88.0, "K": 72.0}
+FATIGUE = 0.04           # spadek mocy na każde kolejne okrążenie (ułamek)
+STOP_MIN_PER_LAP = 20.0  # postój (bufet) po każdym okrążeniu [min]
+NIGHT_HOURS = (22.0, 5.0)
+NIGHT_FACTOR = 0.9       # mnożnik mocy dla okrążeń zaczynanych w nocy
+POWER_SIGMA = 0.2        # rozrzut rzeczywistej mocy (log-normalny)
+SPEED_LIMITS_KMH = (5.0, 55.0)
+NEWTON_ITERATIONS = 6   # od górnego oszacowania: błąd czasu okrążenia < 1 ms
+BISECT_ITERATIONS = 12  # przedział skali 0.2-5: dokładność ~0.1%
+PREDICTION_COLUMNS = ["nr_startowy", "nick", "plec", "pora_startu", "deklarowane", "moc_w", "okrazenie_1_h",
+                      "okrazenia_prognoza", "czas_deklaracji_h", "szansa"]
+
+
+def route_gradients(track_df, step_km=0.1):
+    """(długości próbek [km], nachylenia [%]) na równomiernej siatce trasy."""
+    grid = resample_dataframe(track_df, step_km)
+    km = grid["km"].to_numpy()
+    slopes = point_slopes(km, grid["elevation"].to_numpy())
+    steps = np.diff(km)
+    # nachylenie odcinka = średnia z jego końców
+    return steps, (slopes[1:] + slopes[:-1]) / 2
+
+
+def solve_speed(power, slope_pct, mass_kg, rider=None):
+    """
+    Prędkość [km/h] przy stałej mocy (broadcasting: np. power R x 1, slope_pct 1 x S).
+
+    Newton startuje z górnego oszacowania pierwiastka (cbrt(P/a) + sqrt(-b/a)),
+    a funkcja jest wypukła dla v > 0, więc zbiega monotonicznie od góry.
+    """
+    p = {**DEFAULT_RIDER, **(rider or {})}
+    theta = np.arctan(np.asarray(slope_pct, dtype=np.float64) / 100)
+    a = 0.5 * p["air_density"] * p["cda_m2"]
+    b = mass_kg * GRAVITY * (np.sin(theta) + p["crr"] * np.cos(theta))
+    target = np.asarray(power, dtype=np.float64) * p["drivetrain_eff"]
+
+    v = np.cbrt(target / a) + np.sqrt(np.maximum(-b, 0) / a)
+    for _ in range(NEWTON_ITERATIONS):
+        v2 = v * v
+        v = v - (a * v2 * v + b * v - target) / (3 * a * v2 + b)
+    low, high = SPEED_LIMITS_KMH
+    return np.clip(v * 3.6, low, high)
+
+
+def lap_hours(power, mass_kg, steps_km, slopes, rider=None):
+    """Czas jazdy okrążenia [h] dla wektora mocy (zawodnicy) - macierz zawodnicy x próbki."""
+    speed = solve_speed(np.asarray(power)[:, None], slopes[None, :], np.asarray(mass_kg)[:, None], rider)
+    return (steps_km[None, :] / speed).sum(axis=1)
+
+
+def _is_night(clock_h, night_hours=NIGHT_HOURS):
+    hour = clock_h % 24
+    start, end = night_hours
+    return (hour >= start) | (hour < end)
+
+
+def simulate_laps(power, mass_kg, start_h, n_laps, steps_km, slopes, fatigue=FATIGUE,
+                  stop_min=STOP_MIN_PER_LAP, night_factor=NIGHT_FACTOR, rider=None):
+    """
+    Czasy okrążeń [h] i chwile ich ukończenia (od startu zawodnika) - macierze
+    zawodnicy x max(n_laps).
+
+    n_laps może być liczbą albo wektorem (okrążenia liczone tylko do n_laps
+    danego zawodnika, dalej NaN). Moc na okrążeniu k: power * (1 - fatigue)^k,
+    razy night_factor, jeśli okrążenie zaczyna się w nocy. Po każdym okrążeniu
+    postój stop_min.
+    """
+    power = np.asarray(power, dtype=np.float64)
+    mass_kg = np.broadcast_to(mass_kg, power.shape)
+    laps = np.broadcast_to(n_laps, power.shape)
+    total = int(laps.max()) if len(laps) else 0
+    elapsed = np.zeros(len(power))
+    lap_times = np.full((len(power), total), np.nan)
+    lap_ends = np.full((len(power), total), np.nan)
+    for k in range(total):
+        active = laps > k
+        factor = (1 - fatigue) ** k * np.where(_is_night(start_h[active] + elapsed[active]), night_factor, 1.0)
+        lap_times[active, k] = lap_hours(power[active] * factor, mass_kg[active], steps_km, slopes, rider)
+        lap_ends[active, k] = elapsed[active] + lap_times[active, k]
+        elapsed[active] = lap_ends[active, k] + stop_min / 60
+    return lap_times, lap_ends
+
+
+def _bisect_log(predicate, n, low=0.2, high=5.0, iterations=BISECT_ITERATIONS):
+    """
+    Najmniejsza skala s (wektor n) w [low, high], dla której predicate(s) jest
+    prawdziwe; predicate musi być monotoniczne względem s. Bisekcja w skali log.
+    """
+    lo = np.full(n, np.log(low))
+    hi = np.full(n, np.log(high))
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        ok = predicate(np.exp(mid))
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid)
+    return np.exp(hi)
+
+
+def calibrate_power(participants, mass_kg, steps_km, slopes, base_power, rider=None):
+    """
+    Moc na pierwszym okrążeniu: taka, przy której okrążenie jedzie się ze
+    średnią prędkością jazdy ze śladu (dystans_km_slad / czas_jazdy_h), jeśli
+    jest, w przeciwnym razie base_power. Średnia ze śladu obejmuje już
+    zmęczenie i noc, więc kalibracja jest raczej zachowawcza.
+    """
+    power = base_power.copy()
+    if not {"czas_jazdy_h", "dystans_km_slad"}.issubset(participants.columns):
+        return power
+    measured = (participants["dystans_km_slad"] / participants["czas_jazdy_h"]).to_numpy(dtype=np.float64)
+    usable = np.isfinite(measured) & (measured > 5)
+    if usable.any():
+        target_h = steps_km.sum() / measured[usable]
+        scale = _bisect_log(
+            lambda s: lap_hours(base_power[usable] * s, mass_kg[usable], steps_km, slopes, rider) <= target_h,
+            int(usable.sum()),
+        )
+        power[usable] = base_power[usable] * scale
+    return power
+
+
+def _normal_cdf(x):
+    return 0.5 * (1 + np.frompyfunc(math.erf, 1, 1)(np.asarray(x) / math.sqrt(2)).astype(np.float64))
+
+
+def predict(participants, track_df, step_km=0.1, time_limit_h=TIME_LIMIT_H, start_hours=START_HOURS,
+            base_power=BASE_POWER_W, rider_mass=RIDER_MASS_KG, fatigue=FATIGUE, stop_min=STOP_MIN_PER_LAP,
+            night_factor=NIGHT_FACTOR, sigma=POWER_SIGMA, rider=None):
+    """
+    Prognoza dla zawodników (bez DNS): czasy okrążeń, liczba okrążeń w limicie,
+    czas realizacji deklaracji i szansa na nią.
+
+    Zwraca (tabela zawodników, macierz czasów okrążeń [h] zawodnicy x okrążenia).
+    """
+    riders = participants[~participants["DNS"]]
+    if riders.empty:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS), np.zeros((0, 0))
+    steps_km, slopes = route_gradients(track_df, step_km)
+    plec = riders["plec"]
+    mass = plec.map(rider_mass).fillna(np.mean(list(rider_mass.values()))).to_numpy(dtype=np.float64)
+    base = plec.map(base_power).fillna(np.mean(list(base_power.values()))).to_numpy(dtype=np.float64)
+    start_h = riders["pora_startu"].map(start_hours).fillna(min(start_hours.values())).to_numpy(dtype=np.float64)
+    declared = riders["deklarowane"].clip(lower=1).to_numpy(dtype=np.int64)
+
+    power = calibrate_power(riders, mass, steps_km, slopes, base, rider)
+    sim = dict(steps_km=steps_km, slopes=slopes, fatigue=fatigue, stop_min=stop_min,
+               night_factor=night_factor, rider=rider)
+
+    # górna granica liczby okrążeń: limit / najszybsze okrążenie bez zmęczenia i postojów
+    fastest = lap_hours(power, mass, steps_km, slopes, rider).min()
+    n_laps = max(int(time_limit_h / fastest) + 1, int(declared.max()))
+    lap_times, lap_ends = simulate_laps(power, mass, start_h, n_laps, **sim)
+    rows = np.arange(len(riders))
+    declared_end = lap_ends[rows, declared - 1]
+
+    # skala mocy potrzebna, żeby deklarowane okrążenia zmieściły się w limicie
+    required = _bisect_log(
+        lambda s: simulate_laps(power * s, mass, start_h, declared, **sim)[1][rows, declared - 1] <= time_limit_h,
+        len(riders),
+    )
+    chance = 1 - _normal_cdf(np.log(required) / sigma)
+
+    table = pd.DataFrame({
+        "nr_startowy": riders["nr_startowy"].to_numpy(),
+        "nick": riders["nick"].to_numpy(),
+        "plec": plec.to_numpy(),
+        "pora_startu": riders["pora_startu"].to_numpy(),
+        "deklarowane": declared,
+        "moc_w": power.round(0),
+        "okrazenie_1_h": lap_times[:, 0].round(2),
+        "okrazenia_prognoza": (lap_ends <= time_limit_h).sum(axis=1),
+        "czas_deklaracji_h": declared_end.round(2),
+        "szansa": chance.round(3),
+    }, index=riders.index)
+    return table, lap_times
+
+
+def backtest(table, participants):
+    """
+    Prognoza a wyniki wg deklarowanej liczby okrążeń: średnia szansa z predict
+    i odsetek zawodników, którzy zrobili pełne deklarowane okrążenia
+    (zrobione_pelne >= deklarowane).
+    """
+    done = participants.loc[table.index, "zrobione_pelne"].to_numpy() >= table["deklarowane"].to_numpy()
+    return (
+        table.assign(wynik=done)
+        .groupby("deklarowane")
+        .agg(zawodnicy=("szansa", "size"), prognoza=("szansa", "mean"), wynik=("wynik", "mean"))
+        .reset_index()
+    )
+
+
+def main():
+    from scripts.preprocess import read_data
+    from scripts.track_store import load_track
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--track", default="data/track/orbita25.gpx", help="plik trasy (GPX/FIT)")
+    parser.add_argument("--power-m", type=float, default=BASE_POWER_W["M"], help="moc - mężczyźni [W]")
+    parser.add_argument("--power-k", type=float, default=BASE_POWER_W["K"], help="moc - kobiety [W]")
+    parser.add_argument("--fatigue", type=float, default=FATIGUE, help="spadek mocy na okrążenie (ułamek)")
+    parser.add_argument("--stop", type=float, default=STOP_MIN_PER_LAP, help="postój po okrążeniu [min]")
+    parser.add_argument("--night", type=float, default=NIGHT_FACTOR, help="mnożnik mocy w nocy")
+    parser.add_argument("--sigma", type=float, default=POWER_SIGMA, help="rozrzut mocy (log-normalny)")
+    args = parser.parse_args()
+
+    participants = read_data()
+    table, _ = predict(participants, load_track(args.track), base_power={"M": args.power_m, "K": args.power_k},
+                       fatigue=args.fatigue, stop_min=args.stop, night_factor=args.night, sigma=args.sigma)
+    result = backtest(table, participants)
+    print(result.round(2).to_string(index=False))
+    print(f"\nzrealizowane deklaracje: prognoza {table['szansa'].mean():.0%}, "
+          f"wynik {(result['wynik'] * result['zawodnicy']).sum() / len(table):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,62 @@
+import os
 import pandas as pd
 import numpy as np
 import streamlit as st
 
-@st.cache_data
-def load_data(path='data/transformed/startlist_transformed.xlsx'):
+from scripts.instrumentation import timed
+
+DATA_PATH = 'data/transformed/startlist_transformed.xlsx'
+# wynik `python -m scripts.trace_analysis` - dołączany, jeśli istnieje
+TRACE_STATS_PATH = 'data/transformed/trace_stats.csv'
+
+
+def data_version(path=DATA_PATH):
+    """Zwraca wersję danych (czas modyfikacji pliku) używaną w kluczach cache."""
+    return os.path.getmtime(path)
+
+
+@timed("data.read_data")
+def read_data(path=DATA_PATH):
+    """Czyta i przygotowuje listę startową z Excela (bez cache)."""
     df = pd.read_excel(path, sheet_name='clean')
+    df = prepare_data(df)
+    if os.path.exists(TRACE_STATS_PATH):
+        df = merge_trace_stats(df, pd.read_csv(TRACE_STATS_PATH))
+    return df
+
+
+def sources_version(path=DATA_PATH):
+    """
+    Wersja listy startowej razem z dołączanymi statystykami śladów - klucz
+    cache dla wszystkiego, co korzysta z kolumn ze śladów (czas_jazdy_h itd.).
+    """
+    trace_version = os.path.getmtime(TRACE_STATS_PATH) if os.path.exists(TRACE_STATS_PATH) else None
+    return os.path.abspath(path), data_version(path), trace_version
+
+
+@st.cache_resource(max_entries=2)
+def _shared_data(path, version):
+    from scripts.shared_data import shared_frame
+    return shared_frame("startlist", os.path.abspath(path), version, lambda: read_data(path))
+
+
+def load_data(path=DATA_PATH, version=None):
+    """
+    Lista startowa współdzielona przez wszystkie sesje i procesy serwera.
 
+    Ramka jest podłączona do pliku Arrow w cache/shared/ (scripts.shared_data)
+    i tylko do odczytu - strony nie mogą jej modyfikować, a zawężanie robią
+    przez apply_filters / filter_positions.
+
+    version - wersja z sources_version(path), która jest już kluczem cache
+    wywołującego (domyślnie odczytywana z plików); dzięki temu dane zawsze
+    odpowiadają kluczowi, pod którym zapamiętano wynik.
+    """
+    return _shared_data(path, sources_version(path) if version is None else version)
+
+
+def prepare_data(df):
+    """Dodaje kolumny pochodne i globalną pozycję do surowej listy startowej."""
     # feature engineering
     df['DNS'] = df['pora_startu_z_DNS'] == 'DNS'
     df['mniej_niz_1_orbita'] = df['dystans_km'].between(1, 124, inclusive="both")
@@ -14,3 +65,44 @@ def load_data(path='data/transformed/startlist_transformed.xlsx'):
     df["Pozycja globalna"] = np.arange(1, len(df) + 1) 
 
     return df
+
+
+def merge_trace_stats(df, trace_stats):
+    """
+    Dołącza statystyki ze śladów GPS (po nr_startowy): okrążenia, czas jazdy
+    i postojów [h] oraz czasy okrążeń. Zawodnicy bez śladu mają NaN.
+    """
+    stats = (
+        trace_stats.dropna(subset=['nr_startowy'])
+        .astype({'nr_startowy': int})
+        .drop_duplicates(subset=['nr_startowy'], keep='last')
+    )
+    stats = pd.DataFrame({
+        'nr_startowy': stats['nr_startowy'],
+        'okrazenia_slad': stats['okrazenia'],
+        'dystans_km_slad': stats['dystans_km'],
+        'czas_jazdy_h': (stats['czas_jazdy_s'] / 3600).round(2),
+        'czas_postojow_h': (stats['czas_postojow_s'] / 3600).round(2),
+        'czasy_okrazen': stats['czasy_okrazen'],
+    })
+    return df.merge(stats, on='nr_startowy', how='left').set_index(df.index)
+
+
+def filter_key(plec, pora, typ):
+    """Zamienia wybór filtrów na hashowalny klucz (niezależny od kolejności kliknięć)."""
+    return tuple(tuple(sorted(values)) for values in (plec, pora, typ))
+
+
+def filter_positions(df, plec, pora, typ):
+    """Pozycje (iloc) uczestników spełniających filtry - tablica int64, bez kopiowania ramki."""
+    mask = (
+        df["plec"].isin(plec).to_numpy()
+        & df["pora_startu"].isin(pora).to_numpy()
+        & df["typ_uczestnika"].isin(typ).to_numpy()
+    )
+    return np.flatnonzero(mask)
+
+
+def apply_filters(df, plec, pora, typ):
+    """Filtruje uczestników wg płci, pory startu i typu uczestnika."""
+    return df.take(filter_positions(df, plec, pora, typ))
@@ -0,0 +1,97 @@
+"""
+Pomiar zimnego startu stron dashboardu.
+
+Każda strona z katalogu views/ jest uruchamiana w osobnym procesie (czysty cache importów),
+przez streamlit.testing.v1.AppTest. Mierzony jest czas pierwszego renderu
+strony (bez importu samego streamlita) oraz najdroższe importy z -X importtime.
+
+Użycie:
+    python -m scripts.profile_startup [--top 8] [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+VIEWS_DIR = "views"
+
+# skrypt wykonywany w procesie potomnym - wypisuje czas renderu w sekundach
+_CHILD = """
+import sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+t0 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+elapsed = time.perf_counter() - t0
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(f"ELAPSED {elapsed:.6f}")
+"""
+
+
+def _run_child(page, root, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _CHILD, os.path.join(root, page)]
+    env = dict(os.environ, PYTHONPATH=root)
+    proc = subprocess.run(cmd, cwd=root, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page}: {proc.stderr.strip().splitlines()[-1]}")
+    elapsed = next(float(line.split()[1]) for line in proc.stdout.splitlines() if line.startswith("ELAPSED"))
+    return elapsed, proc.stderr
+
+
+def find_pages(root="."):
+    """Strony dashboardu (views/*.py) względem root, w kolejności nazw."""
+    return sorted(os.path.join(VIEWS_DIR, name) for name in os.listdir(os.path.join(root, VIEWS_DIR))
+                  if name.endswith(".py"))
+
+
+def _top_imports(importtime_log, top):
+    """Zwraca najdroższe pakiety najwyższego poziomu (czas skumulowany, s)."""
+    packages = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        # -X importtime wcina importy zagnieżdżone o 2 spacje na poziom; najwyższy poziom ma jedną spację
+        indent = len(raw_name) - len(raw_name.lstrip(" "))
+        name = raw_name.strip()
+        if not cumulative.strip().isdigit() or indent > 1 or "." in name:
+            continue
+        packages[name] = int(cumulative) / 1e6
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def profile_pages(root=".", pages=None, repeat=3, top=8):
+    """
+    Zwraca słownik {strona: (mediana czasu [s], [(pakiet, czas [s]), ...])};
+    domyślnie dla wszystkich stron z views/.
+    """
+    results = {}
+    for page in pages or find_pages(root):
+        timings = sorted(_run_child(page, root)[0] for _ in range(repeat))
+        _, log = _run_child(page, root, importtime=True)
+        results[page] = (timings[len(timings) // 2], _top_imports(log, top))
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--root", default=os.getcwd())
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--top", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    for page, (elapsed, imports) in profile_pages(args.root, repeat=args.repeat, top=args.top).items():
+        print(f"{page}: {elapsed * 1000:.0f} ms (mediana z {args.repeat})")
+        for name, seconds in imports:
+            print(f"    {name:<24} {seconds * 1000:8.1f} ms")
+    print(f"Łącznie: {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import streamlit as st
+
+from scripts.gpx_parser import GPXParser
+from scripts.elevation_profile import ElevationProfile
+
+GPX_PATH = "data/track/orbita25.gpx"
+MAP_PATH = "static/mapa_orbity.html"
+
+
+def file_signature(path):
+    """Zwraca (czas modyfikacji, rozmiar) pliku - zmiana pliku unieważnia cache."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# ========================
+# Zasoby współdzielone między sesjami
+# ========================
+# st.cache_resource trzyma jeden obiekt na proces (bez kopiowania przy każdym
+# odczycie), więc wyniki nie mogą być modyfikowane przez strony. Ramki
+# podłączone z scripts.shared_data są dodatkowo tylko do odczytu.
+
+@st.cache_resource(max_entries=4)
+def _load_track(path, signature):
+    from scripts.shared_data import shared_frame
+
+    parser = GPXParser(path)
+    # punkty trasy z pliku Arrow w cache/shared/ - jeden egzemplarz w pamięci dla wszystkich workerów
+    parser.track_df = shared_frame("track", os.path.abspath(path), signature, parser.parse_to_dataframe)
+    return parser, ElevationProfile(parser.track_df, seg_unit_km=0.5)
+
+
+def load_track(path=GPX_PATH):
+    """Zwraca sparsowaną trasę (GPXParser, ElevationProfile) dla pliku GPX."""
+    return _load_track(path, file_signature(path))
+
+
+@st.cache_resource(max_entries=4)
+def _track_summary(path, signature):
+    parser, _ = _load_track(path, signature)
+    df = parser.track_df
+    return {
+        "length_km": df["km"].max(),
+        "total_ascent": parser.get_total_ascent(),
+        "max_elevation": df["elevation"].max(),
+        "min_elevation": df["elevation"].min(),
+    }
+
+
+def track_summary(path=GPX_PATH):
+    """Podstawowe statystyki trasy (długość, suma podjazdów, wysokości skrajne)."""
+    return _track_summary(path, file_signature(path))
+
+
+@st.cache_resource(max_entries=16)
+def _slope_lengths(path, signature, smooth_window, slope_thresholds):
+    _, profile = _load_track(path, signature)
+    return profile.compute_slope_lengths(smooth_window=smooth_window, slope_thresholds=slope_thresholds)
+
+
+def slope_lengths(path=GPX_PATH, smooth_window=5, slope_thresholds=(2, 4, 5, 8)):
+    """Tabela długości odcinków wg nachylenia dla pliku GPX."""
+    return _slope_lengths(path, file_signature(path), smooth_window, tuple(slope_thresholds))
+
+
+def gradient_distribution(path=GPX_PATH, smooth_window=5):
+    """Rozkład nachyleń trasy - dowolne progi / percentyle bez przeliczania profilu."""
+    _, profile = _load_track(path, file_signature(path))
+    return profile.gradient_distribution(smooth_window)
+
+
+@st.cache_resource(max_entries=8)
+def _track_export(path, signature, fmt):
+    from scripts.exports import export_track
+    from scripts.track import Track
+
+    parser, _ = _load_track(path, signature)
+    return b"".join(export_track(Track.from_dataframe(parser.track_df), fmt))
+
+
+def track_export(fmt, path=GPX_PATH):
+    """Trasa w formacie do pobrania (geojson / gpx uproszczony / csv)."""
+    return _track_export(path, file_signature(path), fmt)
+
+
+@st.cache_resource
+def job_runner():
+    """Jeden JobRunner (pula wątków + tabela zadań) na proces serwera."""
+    from scripts.jobs import JobRunner
+    return JobRunner()
+
+
+def artifact_path(kind, default):
+    """Ścieżka ostatniego udanego artefaktu zadania w tle albo plik domyślny."""
+    job = job_runner().latest(kind)
+    return job["artifact"] if job is not None else default
+
+
+@st.cache_resource(max_entries=8)
+def _read_file(path, signature, binary):
+    mode, encoding = ("rb", None) if binary else ("r", "utf-8")
+    with open(path, mode, encoding=encoding) as f:
+        return f.read()
+
+
+def read_bytes(path):
+    """Zawartość pliku binarnego (np. GPX do pobrania), czytana raz na proces."""
+    return _read_file(path, file_signature(path), True)
+
+
+def read_text(path):
+    """Zawartość pliku tekstowego (np. HTML mapy), czytana raz na proces."""
+    return _read_file(path, file_signature(path), False)
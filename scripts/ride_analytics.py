@@ -0,0 +1,256 @@
+"""
+Analiza przejazdu z czasami punktów: prędkość, czas jazdy i postojów,
+prędkość wg nachylenia, szacowana moc i podziały czasowe.
+
+Wszystkie funkcje działają na tablicach NumPy (km, wysokość, czas int64
+w sekundach epoki - jak GPXParser.timestamps) i liczą wynik wektorowo, bez
+pętli po punktach, więc ślad z setkami tysięcy punktów to ułamek sekundy.
+
+Prędkość liczona jest z przemieszczenia netto w oknie czasowym (odległość
+między końcami okna, gdy podane są lat/lon), a nie z sumy km po punktach:
+szum GPS na postoju (kilka metrów w losowych kierunkach) sumuje się w km,
+ale nie w przemieszczenie, więc nie udaje jazdy i nie zawyża mocy.
+
+Użycie:
+    python -m scripts.ride_analytics slady/28_ethea.gpx --mass 80
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from scripts.gpx_parser import NO_TIME
+from scripts.spatial_index import EARTH_RADIUS_KM
+from scripts.track import point_slopes
+
+GRAVITY = 9.81
+# domyślne parametry modelu mocy (rower szosowy, pozycja na klamkach)
+DEFAULT_RIDER = {"mass_kg": 85.0, "crr": 0.005, "cda_m2": 0.32, "air_density": 1.225, "drivetrain_eff": 0.97}
+GRADIENT_BUCKETS = (-np.inf, -4, -2, 0, 2, 4, 6, np.inf)
+POWER_ZONES = (0, 100, 150, 200, 250, 300, 400, np.inf)
+
+
+def ride_arrays(track_df, timestamps):
+    """
+    Tablice (km, wysokość, czas, lat, lon) punktów śladu z czasem.
+
+    Punkty bez czasu (NO_TIME) są pomijane - km pozostałych punktów nie
+    zmienia się, więc dystans przez lukę jest zachowany. Czasy muszą być
+    niemalejące (okna wyznacza searchsorted), inaczej ValueError.
+    """
+    if timestamps is None:
+        raise ValueError("Plik nie zawiera czasów punktów.")
+    t = np.asarray(timestamps, dtype=np.int64)
+    timed_rows = t != NO_TIME
+    if timed_rows.sum() < 2:
+        raise ValueError("Za mało punktów z czasem.")
+    t = t[timed_rows]
+    if (np.diff(t) < 0).any():
+        raise ValueError("Czasy punktów nie są niemalejące - ślad wymaga uporządkowania.")
+    df = track_df[timed_rows]
+    return (df["km"].to_numpy(dtype=np.float64), df["elevation"].to_numpy(dtype=np.float64), t,
+            df["latitude"].to_numpy(dtype=np.float64), df["longitude"].to_numpy(dtype=np.float64))
+
+
+def _segments(km, t):
+    """Długości [km] i czasy [s] odcinków między kolejnymi punktami."""
+    return np.diff(np.asarray(km, dtype=np.float64)), np.diff(np.asarray(t, dtype=np.int64)).astype(np.float64)
+
+
+def _displacement_km(lat, lon, start):
+    """Odległość [km] (haversine) między punktem start[i] a punktem i."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    d_lat = lat - lat[start]
+    d_lon = lon - lon[start]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat) * np.cos(lat[start]) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def instant_speed(km, t):
+    """Prędkość [km/h] na odcinku kończącym się w każdym punkcie (pierwszy punkt: 0)."""
+    d_km, d_t = _segments(km, t)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(d_t > 0, d_km / d_t * 3600, 0.0)
+    return np.concatenate(([0.0], speed))
+
+
+def smoothed_speed(km, t, window_s=30, lat=None, lon=None):
+    """
+    Prędkość [km/h] z ostatnich window_s sekund przed każdym punktem.
+
+    Początek okna wyznacza searchsorted na czasach, więc koszt to O(n log n)
+    niezależnie od długości okna i nieregularnego próbkowania. Z lat/lon
+    droga w oknie to przemieszczenie netto między jego końcami (odporne na
+    szum GPS na postoju); bez nich - różnica km.
+    """
+    km = np.asarray(km, dtype=np.float64)
+    t = np.asarray(t, dtype=np.int64)
+    start = np.searchsorted(t, t - window_s, side="left")
+    d_t = (t - t[start]).astype(np.float64)
+    if lat is not None and lon is not None:
+        distance = _displacement_km(lat, lon, start)
+    else:
+        distance = km - km[start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(d_t > 0, distance / d_t * 3600, 0.0)
+
+
+def moving_segments(km, t, threshold_kmh=3.0, window_s=30, lat=None, lon=None):
+    """Maska odcinków (n - 1), na których zawodnik jechał (prędkość z okna > threshold_kmh)."""
+    return smoothed_speed(km, t, window_s, lat, lon)[1:] > threshold_kmh
+
+
+def moving_time(km, t, threshold_kmh=3.0, window_s=30, lat=None, lon=None):
+    """(czas jazdy [s], czas postojów [s])."""
+    _, d_t = _segments(km, t)
+    moving = moving_segments(km, t, threshold_kmh, window_s, lat, lon)
+    return float(d_t[moving].sum()), float(d_t[~moving].sum())
+
+
+def estimate_power(km, elevation, t, rider=None, window_s=10, lat=None, lon=None):
+    """
+    Szacowana moc [W] na odcinkach (n - 1): opór toczenia, grawitacja,
+    opór powietrza (bez wiatru) i zmiana energii kinetycznej.
+
+    Prędkość jest wygładzana oknem window_s, a nachylenie liczone na 100 m
+    (point_slopes), bo surowe różnice GPS dają nierealne skoki mocy.
+    Moc ujemna (zjazd, hamowanie) jest obcinana do 0.
+    """
+    p = {**DEFAULT_RIDER, **(rider or {})}
+    km = np.asarray(km, dtype=np.float64)
+    t = np.asarray(t, dtype=np.int64)
+    v = smoothed_speed(km, t, window_s, lat, lon) / 3.6
+    theta = np.arctan(point_slopes(km, elevation) / 100)
+    v_seg = (v[1:] + v[:-1]) / 2
+    theta_seg = (theta[1:] + theta[:-1]) / 2
+
+    # przyspieszenie z tego samego okna co prędkość - różnice sekundowe
+    # wzmacniają szum GPS, a obcięcie mocy do 0 zamienia go w dodatnie waty
+    start = np.searchsorted(t, t - window_s, side="left")
+    d_t_window = (t - t[start]).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accel_point = np.where(d_t_window > 0, (v - v[start]) / d_t_window, 0.0)
+    accel = (accel_point[1:] + accel_point[:-1]) / 2
+    force = (
+        p["mass_kg"] * GRAVITY * (np.sin(theta_seg) + p["crr"] * np.cos(theta_seg))
+        + 0.5 * p["air_density"] * p["cda_m2"] * v_seg ** 2
+        + p["mass_kg"] * accel
+    )
+    return np.maximum(force * v_seg / p["drivetrain_eff"], 0.0)
+
+
+def speed_by_gradient(km, elevation, t, buckets=GRADIENT_BUCKETS, threshold_kmh=3.0, window_s=30,
+                      lat=None, lon=None):
+    """Dystans, czas jazdy i średnia prędkość w przedziałach nachylenia (tylko odcinki w ruchu)."""
+    d_km, d_t = _segments(km, t)
+    slope = point_slopes(km, elevation)
+    slope_seg = (slope[1:] + slope[:-1]) / 2
+    moving = moving_segments(km, t, threshold_kmh, window_s, lat, lon)
+
+    bucket = np.digitize(slope_seg[moving], buckets[1:-1])
+    n = len(buckets) - 1
+    distance = np.bincount(bucket, weights=d_km[moving], minlength=n)
+    duration = np.bincount(bucket, weights=d_t[moving], minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(duration > 0, distance / duration * 3600, np.nan)
+    labels = [f"{lo:g} ~ {hi:g}%" for lo, hi in zip(buckets[:-1], buckets[1:])]
+    return pd.DataFrame({"nachylenie": labels, "dystans_km": distance, "czas_s": duration, "predkosc_kmh": speed})
+
+
+def power_zones(power, km, t, zones=POWER_ZONES):
+    """Czas [s] i dystans [km] spędzony w strefach mocy (power z estimate_power)."""
+    d_km, d_t = _segments(km, t)
+    zone = np.digitize(power, zones[1:-1])
+    n = len(zones) - 1
+    labels = [f"{lo:g}-{hi:g} W" for lo, hi in zip(zones[:-1], zones[1:])]
+    return pd.DataFrame({
+        "strefa": labels,
+        "czas_s": np.bincount(zone, weights=d_t, minlength=n),
+        "dystans_km": np.bincount(zone, weights=d_km, minlength=n),
+    })
+
+
+def km_splits(km, t, power=None, split_km=5.0):
+    """Międzyczasy co split_km: czas, prędkość i średnia moc (ważona czasem) na odcinku."""
+    d_km, d_t = _segments(km, t)
+    split = (np.asarray(km, dtype=np.float64)[1:] // split_km).astype(np.int64)
+    n = int(split.max()) + 1 if len(split) else 0
+    distance = np.bincount(split, weights=d_km, minlength=n)
+    duration = np.bincount(split, weights=d_t, minlength=n)
+    table = pd.DataFrame({
+        "od_km": np.arange(n) * split_km,
+        "dystans_km": distance,
+        "czas_s": duration,
+    })
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table["predkosc_kmh"] = np.where(duration > 0, distance / duration * 3600, np.nan)
+        if power is not None:
+            work = np.bincount(split, weights=power * d_t, minlength=n)
+            table["moc_w"] = np.where(duration > 0, work / duration, np.nan)
+    return table
+
+
+def analyze_ride(km, elevation, t, rider=None, threshold_kmh=3.0, window_s=30, lat=None, lon=None):
+    """
+    Podsumowanie przejazdu + tabele (wg nachylenia, strefy mocy, międzyczasy).
+
+    Czasy muszą być niemalejące i bez NO_TIME (patrz ride_arrays). Dystans
+    w podsumowaniu liczony jest tylko po odcinkach w ruchu, więc km
+    "nabite" szumem GPS na postojach nie zawyżają średniej prędkości.
+    """
+    km = np.asarray(km, dtype=np.float64)
+    t = np.asarray(t, dtype=np.int64)
+    if len(t) < 2 or (t == NO_TIME).any() or (np.diff(t) < 0).any():
+        raise ValueError("Czasy punktów muszą być kompletne i niemalejące (patrz ride_arrays).")
+    moving_s, stopped_s = moving_time(km, t, threshold_kmh, window_s, lat, lon)
+    power = estimate_power(km, elevation, t, rider, lat=lat, lon=lon)
+    d_km, d_t = _segments(km, t)
+    moving = moving_segments(km, t, threshold_kmh, window_s, lat, lon)
+    moving_km = float(d_km[moving].sum())
+    # maksimum tylko z pełnych okien - na początku śladu okno ma 1-2 s i szum dominuje
+    speed = smoothed_speed(km, t, window_s, lat, lon)
+    full_window = t >= t[0] + window_s
+    summary = {
+        "dystans_km": moving_km,
+        "czas_calkowity_s": float(t[-1] - t[0]),
+        "czas_jazdy_s": moving_s,
+        "czas_postojow_s": stopped_s,
+        "srednia_predkosc_kmh": moving_km / moving_s * 3600 if moving_s > 0 else np.nan,
+        "max_predkosc_kmh": float(speed[full_window].max() if full_window.any() else speed.max()),
+        "srednia_moc_w": float((power * d_t)[moving].sum() / moving_s) if moving_s > 0 else np.nan,
+        "praca_kj": float((power * d_t).sum() / 1000),
+    }
+    return summary, {
+        "nachylenie": speed_by_gradient(km, elevation, t, threshold_kmh=threshold_kmh, window_s=window_s,
+                                        lat=lat, lon=lon),
+        "moc": power_zones(power, km, t),
+        "miedzyczasy": km_splits(km, t, power),
+    }
+
+
+def main():
+    from scripts.track_store import load_parser
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="ślad GPX/FIT z czasami punktów")
+    parser.add_argument("--mass", type=float, default=DEFAULT_RIDER["mass_kg"], help="masa zawodnika z rowerem [kg]")
+    parser.add_argument("--cda", type=float, default=DEFAULT_RIDER["cda_m2"], help="CdA [m2]")
+    parser.add_argument("--stop-speed", type=float, default=3.0, help="próg postoju [km/h]")
+    args = parser.parse_args()
+
+    track = load_parser(args.path)
+    try:
+        km, elevation, t, lat, lon = ride_arrays(track.track_df, track.timestamps)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    summary, tables = analyze_ride(km, elevation, t, rider={"mass_kg": args.mass, "cda_m2": args.cda},
+                                   threshold_kmh=args.stop_speed, lat=lat, lon=lon)
+    for key, value in summary.items():
+        print(f"{key:<24}{value:10.1f}")
+    for name, table in tables.items():
+        print(f"\n{name}\n{table.round(1).to_string(index=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Porównanie dwóch wersji pętli (np. kolejnych edycji).
+
+Obie trasy są przeliczane na równomierną siatkę dystansu, a następnie każdy
+punkt jednej trasy rzutowany jest na najbliższy punkt drugiej (siatkowy
+indeks przestrzenny, wszystkie punkty naraz). Ciągłe przebiegi punktów bez
+odpowiednika dają odcinki:
+
+- dodany    - jest tylko w nowej trasie,
+- usunięty  - jest tylko w starej trasie,
+- zmieniony - nowy odcinek zastępuje usunięty między tymi samymi punktami
+              wspólnymi (objazd),
+- wysokość  - przebieg bez zmian, ale wysokości różnią się o więcej niż
+              elevation_tolerance_m (po odjęciu stałego przesunięcia).
+
+Użycie:
+    python -m scripts.route_diff stara.gpx nowa.gpx --csv zmiany.csv --map zmiany.html --profile zmiany.png
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from scripts.spatial_index import GridIndex, unit_headings
+from scripts.trace_analysis import runs
+from scripts.track import resample_dataframe
+
+DIFF_COLUMNS = [
+    "typ", "old_start_km", "old_end_km", "new_start_km", "new_end_km",
+    "old_length_km", "new_length_km", "ascent_old_m", "ascent_new_m", "elevation_delta_m",
+]
+DIFF_COLORS = {"dodany": "green", "usunięty": "red", "zmieniony": "orange", "wysokość": "purple"}
+
+
+def _ascent(elevation, window=5):
+    """Suma podjazdów [m] po wygładzeniu średnią kroczącą (jak GPXParser.get_total_ascent)."""
+    if len(elevation) < 2:
+        return 0.0
+    smoothed = pd.Series(elevation).rolling(window=window, center=True, min_periods=1).mean().to_numpy()
+    diff = np.diff(smoothed)
+    return float(diff[diff > 0].sum())
+
+
+def align(route, other, tolerance_km):
+    """
+    Dla każdego punktu route indeks najbliższego punktu other w promieniu
+    tolerance_km (albo -1). Obie trasy: DataFrame z latitude/longitude.
+
+    Punkty jadące w przeciwną stronę nie są dopasowywane - na odcinkach
+    "tam i z powrotem" (km 0-12 i 114-125) usunięcie jednego kierunku
+    nie zostanie przykryte przez drugi.
+    """
+    index = GridIndex(other["latitude"].to_numpy(), other["longitude"].to_numpy(), cell_km=tolerance_km)
+    qx, qy = index.project(route["latitude"].to_numpy(), route["longitude"].to_numpy())
+    qhx, qhy = unit_headings(qx, qy)
+    hx, hy = index.headings()
+
+    def score(dist, q, p):
+        opposite = qhx[q] * hx[p] + qhy[q] * hy[p] < 0
+        return np.where(opposite, np.inf, dist)
+
+    matched, _ = index.best(qx, qy, score_fn=score, max_score=tolerance_km)
+    return matched
+
+
+def _anchor_km(matched, other_km, start, end):
+    """Km drugiej trasy w punktach wspólnych tuż przed i tuż za przebiegiem [start, end)."""
+    before = other_km[matched[start - 1]] if start > 0 and matched[start - 1] >= 0 else -np.inf
+    after = other_km[matched[end]] if end < len(matched) and matched[end] >= 0 else np.inf
+    return min(before, after), max(before, after)
+
+
+def diff_routes(old_df, new_df, step_km=0.02, tolerance_km=0.05, min_length_km=0.2, elevation_tolerance_m=10.0):
+    """
+    Zwraca DataFrame odcinków różnic (kolumny DIFF_COLUMNS), posortowany po km nowej trasy.
+
+    Km "old_*" odnoszą się do starej trasy, "new_*" do nowej; dla odcinków
+    istniejących tylko w jednej trasie druga para to NaN.
+    """
+    old = resample_dataframe(old_df[["km", "latitude", "longitude", "elevation"]], step_km)
+    new = resample_dataframe(new_df[["km", "latitude", "longitude", "elevation"]], step_km)
+    old_km, new_km = old["km"].to_numpy(), new["km"].to_numpy()
+    old_ele, new_ele = old["elevation"].to_numpy(), new["elevation"].to_numpy()
+
+    new_to_old = align(new, old, tolerance_km)
+    old_to_new = align(old, new, tolerance_km)
+    min_points = max(1, int(round(min_length_km / step_km)))
+
+    def changed_sections(mask):
+        # krótkie wspólne fragmenty w środku zmiany (przecięcia ze starą trasą) nie dzielą odcinka
+        gap_starts, gap_ends = runs(~mask)
+        inner = (gap_starts > 0) & (gap_ends < len(mask)) & (gap_ends - gap_starts < min_points)
+        mask = mask.copy()
+        for start, end in zip(gap_starts[inner], gap_ends[inner]):
+            mask[start:end] = True
+        starts, ends = runs(mask)
+        long_enough = ends - starts >= min_points
+        return list(zip(starts[long_enough], ends[long_enough]))
+
+    added = changed_sections(new_to_old < 0)
+    removed = changed_sections(old_to_new < 0)
+
+    rows = []
+    used_removed = set()
+    for start, end in added:
+        lo, hi = _anchor_km(new_to_old, old_km, start, end)
+        # usunięty odcinek leżący między tymi samymi punktami wspólnymi starej trasy
+        pair = next((k for k, (s, e) in enumerate(removed)
+                     if k not in used_removed and old_km[s] >= lo - step_km and old_km[e - 1] <= hi + step_km), None)
+        row = {"typ": "dodany", "new_start_km": new_km[start], "new_end_km": new_km[end - 1],
+               "ascent_new_m": _ascent(new_ele[start:end])}
+        if pair is not None:
+            used_removed.add(pair)
+            s, e = removed[pair]
+            row.update(typ="zmieniony", old_start_km=old_km[s], old_end_km=old_km[e - 1],
+                       ascent_old_m=_ascent(old_ele[s:e]))
+        rows.append(row)
+
+    for k, (s, e) in enumerate(removed):
+        if k in used_removed:
+            continue
+        lo, hi = _anchor_km(old_to_new, new_km, s, e)
+        rows.append({"typ": "usunięty", "old_start_km": old_km[s], "old_end_km": old_km[e - 1],
+                     "ascent_old_m": _ascent(old_ele[s:e]),
+                     # miejsce w nowej trasie, gdzie odcinek został wycięty
+                     "new_start_km": lo if np.isfinite(lo) else np.nan,
+                     "new_end_km": lo if np.isfinite(lo) else np.nan})
+
+    # różnice wysokości na wspólnym przebiegu (po odjęciu mediany - inne źródło / kalibracja)
+    common = new_to_old >= 0
+    if common.any():
+        delta = np.full(len(new_km), np.nan)
+        delta[common] = new_ele[common] - old_ele[new_to_old[common]]
+        offset = np.nanmedian(delta)
+        for start, end in changed_sections(common & (np.abs(delta - offset) > elevation_tolerance_m)):
+            old_idx = new_to_old[start:end]
+            rows.append({"typ": "wysokość", "new_start_km": new_km[start], "new_end_km": new_km[end - 1],
+                         "old_start_km": old_km[old_idx.min()], "old_end_km": old_km[old_idx.max()],
+                         "ascent_new_m": _ascent(new_ele[start:end]), "ascent_old_m": _ascent(old_ele[old_idx]),
+                         "elevation_delta_m": float(np.mean(delta[start:end] - offset))})
+
+    diff = pd.DataFrame(rows, columns=DIFF_COLUMNS)
+    diff["old_length_km"] = diff["old_end_km"] - diff["old_start_km"]
+    diff["new_length_km"] = diff["new_end_km"] - diff["new_start_km"]
+    changed = diff["typ"] != "wysokość"
+    diff.loc[changed, "elevation_delta_m"] = (
+        diff.loc[changed, "ascent_new_m"].fillna(0) - diff.loc[changed, "ascent_old_m"].fillna(0)
+    )
+    return diff.sort_values(["new_start_km", "old_start_km"], ignore_index=True).round(3)
+
+
+def affected_sectors(diff, sectors):
+    """Sektory (start_km, end_km starej trasy) nachodzące na zmienione odcinki - do przeliczenia."""
+    changed = diff.dropna(subset=["old_start_km"])
+    if changed.empty:
+        return sectors.iloc[:0]
+    starts = sectors["start_km"].to_numpy()[:, None]
+    ends = sectors["end_km"].to_numpy()[:, None]
+    overlap = (starts <= changed["old_end_km"].to_numpy()) & (ends >= changed["old_start_km"].to_numpy())
+    return sectors[overlap.any(axis=1)]
+
+
+# ========================
+# Wizualizacja
+# ========================
+
+def _section(route_df, start_km, end_km):
+    km = route_df["km"].to_numpy()
+    i, j = np.searchsorted(km, start_km, side="left"), np.searchsorted(km, end_km, side="right")
+    return route_df.iloc[max(i - 1, 0):j + 1]
+
+
+def add_diff_to_map(m, old_df, new_df, diff):
+    """Dodaje do mapy folium warstwę z odcinkami różnic (kolory wg DIFF_COLORS)."""
+    import folium
+
+    layer = folium.FeatureGroup(name="Zmiany trasy")
+    for row in diff.itertuples(index=False):
+        parts = []
+        if row.typ in ("usunięty", "zmieniony"):
+            parts.append((_section(old_df, row.old_start_km, row.old_end_km), "5, 8", "stara"))
+        if row.typ in ("dodany", "zmieniony", "wysokość"):
+            parts.append((_section(new_df, row.new_start_km, row.new_end_km), None, "nowa"))
+        for section, dash, label in parts:
+            folium.PolyLine(
+                section[["latitude", "longitude"]].to_numpy().tolist(),
+                color=DIFF_COLORS[row.typ], weight=7, opacity=0.8, dash_array=dash,
+                tooltip=f"{row.typ} ({label} trasa): {row.elevation_delta_m:+.0f} m",
+            ).add_to(layer)
+    layer.add_to(m)
+    folium.LayerControl().add_to(m)
+    return m
+
+
+def plot_diff(old_df, new_df, diff):
+    """Profile starej i nowej trasy (jeden pod drugim) z zaznaczonymi odcinkami różnic."""
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as mpatches
+
+    fig, (ax_old, ax_new) = plt.subplots(2, 1, figsize=(12, 6), sharey=True)
+    for ax, route, title, prefix in ((ax_old, old_df, "Stara trasa", "old"), (ax_new, new_df, "Nowa trasa", "new")):
+        ax.plot(route["km"], route["elevation"], color="darkgrey", linewidth=0.8)
+        ax.set_title(title, loc="left", fontsize=10)
+        ax.set_ylabel("Elevation [m]")
+        ax.spines[["right", "top"]].set_visible(False)
+        sections = diff.dropna(subset=[f"{prefix}_start_km"])
+        for typ, start, end in zip(sections["typ"], sections[f"{prefix}_start_km"], sections[f"{prefix}_end_km"]):
+            if end - start > 0:
+                ax.axvspan(start, end, color=DIFF_COLORS[typ], alpha=0.3)
+            else:
+                ax.axvline(start, color=DIFF_COLORS[typ], linestyle="--")
+    ax_new.set_xlabel("Kilometers")
+    legend = [mpatches.Patch(color=color, alpha=0.5, label=typ) for typ, color in DIFF_COLORS.items()]
+    ax_old.legend(handles=legend, loc="center left", bbox_to_anchor=(1, 0.5))
+    fig.tight_layout()
+    return fig
+
+
+def main():
+    from scripts.track_store import load_track
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", help="stara trasa (GPX/FIT)")
+    parser.add_argument("new", help="nowa trasa (GPX/FIT)")
+    parser.add_argument("--tolerance-km", type=float, default=0.05, help="maks. odległość punktów wspólnych")
+    parser.add_argument("--min-length-km", type=float, default=0.2, help="minimalna długość odcinka zmiany")
+    parser.add_argument("--csv", help="zapis tabeli zmian")
+    parser.add_argument("--map", help="zapis mapy HTML ze zmianami")
+    parser.add_argument("--profile", help="zapis PNG profili ze zmianami")
+    args = parser.parse_args()
+
+    old_df, new_df = load_track(args.old), load_track(args.new)
+    diff = diff_routes(old_df, new_df, tolerance_km=args.tolerance_km, min_length_km=args.min_length_km)
+    print(diff.to_string() if not diff.empty else "Brak różnic.")
+
+    from scripts.sectors import SECTORS
+    sectors = affected_sectors(diff, SECTORS)
+    if not sectors.empty:
+        print("\nSektory do przeliczenia:", ", ".join(sectors["sektor"]))
+
+    if args.csv:
+        diff.to_csv(args.csv, index=False)
+    if args.map:
+        from scripts.map_generator import build_map
+        m = build_map(new_df[["latitude", "longitude"]].to_numpy().tolist())
+        add_diff_to_map(m, old_df, new_df, diff).save(args.map)
+    if args.profile:
+        import matplotlib
+        matplotlib.use("Agg")
+        plot_diff(old_df, new_df, diff).savefig(args.profile, dpi=150, bbox_inches="tight")
+
+
+if __name__ == "__main__":
+    main()
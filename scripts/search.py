@@ -0,0 +1,109 @@
+"""
+Szybkie wyszukiwanie zawodników po nicku i numerze startowym.
+
+Indeks budowany jest raz na wersję danych:
+
+- słownik numer startowy -> wiersz (dokładne trafienie w O(1)),
+- posortowana tablica znormalizowanych kluczy (cały nick, jego kolejne słowa
+  i numer jako tekst) - wszystkie klucze z danym prefiksem leżą obok siebie,
+  więc zakres wyznaczają dwa wyszukiwania binarne (jak zejście w drzewie trie,
+  ale bez tysięcy małych słowników).
+
+Normalizacja ignoruje wielkość liter i znaki diakrytyczne ("Łukasz" == "lukasz").
+"""
+import unicodedata
+
+import numpy as np
+import streamlit as st
+
+from scripts.preprocess import load_data
+
+# litery bez rozkładu NFKD na literę bazową + znak diakrytyczny
+_EXTRA_FOLD = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss"})
+
+
+def normalize(text):
+    """Tekst bez znaków diakrytycznych, małymi literami, z pojedynczymi spacjami."""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.translate(_EXTRA_FOLD).split())
+
+
+class ParticipantIndex:
+    """
+    Indeks wyszukiwania nad tabelą uczestników (kolejność wierszy = ranking globalny).
+
+    Wyniki to pozycje wierszy (iloc) w tabeli, dla której zbudowano indeks.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        numbers = df["nr_startowy"].to_numpy()
+        self._by_number = {int(n): i for i, n in enumerate(numbers)}
+
+        keys, rows = [], []
+        for i, (nick, number) in enumerate(zip(df["nick"].astype(str), numbers)):
+            name = normalize(nick)
+            words = name.split(" ")
+            # pełny nick + każde słowo od drugiego (szukanie "kowal" znajdzie "Jan Kowalski")
+            for key in {name, *words[1:], str(int(number))}:
+                keys.append(key)
+                rows.append(i)
+        order = np.argsort(keys, kind="stable")
+        self._keys = np.asarray(keys, dtype=object)[order].tolist()
+        self._rows = np.asarray(rows, dtype=np.int64)[order]
+
+    # ========================
+    # Metody prywatne
+    # ========================
+
+    def _prefix_range(self, prefix):
+        """Zakres [lo, hi) kluczy zaczynających się od prefix (dwa wyszukiwania binarne)."""
+        from bisect import bisect_left
+
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    # ========================
+    # Metody publiczne
+    # ========================
+
+    def by_number(self, number):
+        """Wiersz zawodnika o danym numerze startowym albo None."""
+        return self._by_number.get(int(number))
+
+    def search(self, query, limit=10):
+        """
+        Wiersze pasujące do zapytania, w kolejności rankingu globalnego.
+
+        Dokładny numer startowy jest zawsze pierwszy; dalej trafienia po
+        prefiksie nicku, jego słów lub numeru.
+        """
+        query = normalize(query)
+        if not query:
+            return np.zeros(0, dtype=np.int64)
+        lo, hi = self._prefix_range(query)
+        rows = np.unique(self._rows[lo:hi])[:limit]
+        exact = self.by_number(query) if query.isdigit() else None
+        if exact is not None:
+            rows = np.concatenate(([exact], rows[rows != exact]))[:limit]
+        return rows
+
+    @staticmethod
+    def filtered_positions(rows, filtered_rows):
+        """
+        Pozycje wierszy w rankingu po filtrach (1..n) albo 0, gdy wiersz nie
+        przechodzi filtrów. filtered_rows: posortowane pozycje wierszy widoku.
+        """
+        if len(filtered_rows) == 0:
+            return np.zeros(len(rows), dtype=np.int64)
+        pos = np.searchsorted(filtered_rows, rows)
+        inside = (pos < len(filtered_rows)) & (filtered_rows[np.minimum(pos, len(filtered_rows) - 1)] == rows)
+        return np.where(inside, pos + 1, 0)
+
+
+@st.cache_resource(max_entries=2)
+def participant_index(version):
+    """Indeks wyszukiwania dla wersji danych version (preprocess.sources_version; jeden na proces)."""
+    return ParticipantIndex(load_data(version=version))
@@ -0,0 +1,160 @@
+"""
+Wirtualne odcinki pomiarowe (sektory) na pętli - czasy z wielu śladów.
+
+Sektor to zakres km trasy. Dla każdego śladu wejście i wyjście z sektora
+to przekroczenia "bramek" postępu (lap * L + start_km, lap * L + end_km),
+liczone wektorowo dla wszystkich sektorów i okrążeń naraz na indeksie trasy
+z scripts/trace_analysis.py. Wyniki trafiają do kolumnowej tabeli
+(data/transformed/sector_times.parquet).
+
+Użycie:
+    python -m scripts.sectors slady/ --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from scripts.trace_analysis import (
+    ROUTE_PATH, RouteIndex, read_trace, start_number, trace_progress, crossing_times,
+)
+from scripts.track_store import TRACK_EXTENSIONS
+
+SECTOR_TIMES_PATH = "data/transformed/sector_times.parquet"
+
+# największe podjazdy (ElevationProfile.find_climbs) i dojazd do bufetu (55.8 km)
+SECTORS = pd.DataFrame(
+    [
+        ("Podjazd Mstów", 6.2, 8.0),
+        ("Podjazd Małusy", 12.0, 14.7),
+        ("Podjazd na dach Orbity", 21.8, 28.4),
+        ("Dojazd do bufetu", 50.0, 55.7),
+        ("Podjazd przed metą", 113.6, 117.4),
+    ],
+    columns=["sektor", "start_km", "end_km"],
+)
+
+
+def sector_times(trace, route, sectors=SECTORS):
+    """
+    Czasy przejazdu sektorów w jednym śladzie (wszystkie okrążenia).
+    Zwraca DataFrame ['sektor', 'okrazenie', 'wejscie', 'czas_s', 'predkosc_kmh'].
+    """
+    t = trace["time"].to_numpy(dtype=np.int64)
+    route_km = route.match(trace["latitude"].to_numpy(), trace["longitude"].to_numpy())
+    if (~np.isnan(route_km)).sum() < 2:
+        return pd.DataFrame(columns=["sektor", "okrazenie", "wejscie", "czas_s", "predkosc_kmh"])
+    t_m, progress = trace_progress(route_km, t, route.length_km)
+
+    n_laps = int(np.ceil(progress[-1] / route.length_km)) + 1
+    laps = np.arange(n_laps)[:, None]
+    # bramki: okrążenia x sektory
+    entry_gate = laps * route.length_km + sectors["start_km"].to_numpy()[None, :]
+    exit_gate = laps * route.length_km + sectors["end_km"].to_numpy()[None, :]
+    entry = crossing_times(progress, t_m, entry_gate.ravel())
+    exit_ = crossing_times(progress, t_m, exit_gate.ravel())
+    # sektor zaliczony tylko, gdy ślad wjechał przed bramką wejścia i dojechał do wyjścia
+    valid = ~np.isnan(entry) & ~np.isnan(exit_) & (entry_gate.ravel() >= progress[0])
+
+    sector_idx = np.tile(np.arange(len(sectors)), n_laps)[valid]
+    elapsed = (exit_ - entry)[valid]
+    length = (sectors["end_km"] - sectors["start_km"]).to_numpy()[sector_idx]
+    return pd.DataFrame({
+        "sektor": sectors["sektor"].to_numpy()[sector_idx],
+        "okrazenie": np.repeat(np.arange(1, n_laps + 1), len(sectors))[valid].astype(np.int16),
+        "wejscie": entry[valid].astype(np.int64),
+        "czas_s": elapsed.astype(np.float32),
+        "predkosc_kmh": np.divide(length * 3600, elapsed, out=np.zeros_like(elapsed),
+                                  where=elapsed > 0).astype(np.float32),
+    })
+
+
+# ========================
+# Przetwarzanie wsadowe
+# ========================
+
+_route = None
+
+
+def _init_worker(route_path):
+    # indeks trasy budowany raz na proces
+    global _route
+    _route = RouteIndex.from_file(route_path)
+
+
+def _sector_times_file(path):
+    times = sector_times(read_trace(path), _route)
+    times.insert(0, "nr_startowy", start_number(path))
+    return times
+
+
+def compute_sector_times(directory, route_path=ROUTE_PATH, workers=None):
+    """Czasy sektorów dla wszystkich śladów z katalogu (pula procesów), jako jedna tabela."""
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(TRACK_EXTENSIONS)
+    )
+    if not paths:
+        raise ValueError(f"Brak śladów GPX/FIT w katalogu: {directory}")
+
+    tables = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(route_path,)) as pool:
+        futures = {pool.submit(_sector_times_file, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                tables.append(future.result())
+            except Exception as e:  # uszkodzony ślad nie przerywa analizy pozostałych
+                print(f"BŁĄD {os.path.basename(futures[future])}: {e}")
+
+    table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+    if not table.empty:
+        table = table.dropna(subset=["nr_startowy"]).astype({"nr_startowy": np.int32})
+        table["sektor"] = pd.Categorical(table["sektor"], categories=SECTORS["sektor"])
+    return table
+
+
+# ========================
+# Rankingi
+# ========================
+
+def best_times(times):
+    """Najlepszy czas każdego zawodnika w każdym sektorze."""
+    return (
+        times.sort_values("czas_s", kind="stable")
+        .drop_duplicates(subset=["sektor", "nr_startowy"])
+        .reset_index(drop=True)
+    )
+
+
+def sector_leaderboard(best, participants, sektor):
+    """
+    Ranking sektora dla (już przefiltrowanych) uczestników - filtr to tylko
+    dopasowanie numerów startowych, bez ponownego liczenia czasów.
+    """
+    board = best[(best["sektor"] == sektor) & best["nr_startowy"].isin(participants["nr_startowy"])]
+    board = board.merge(participants[["nr_startowy", "nick", "plec", "pora_startu", "typ_uczestnika"]],
+                        on="nr_startowy", how="inner")
+    board = board.sort_values("czas_s", kind="stable").reset_index(drop=True)
+    board.index = np.arange(1, len(board) + 1)
+    return board
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("directory", help="katalog ze śladami zawodników (GPX/FIT)")
+    arg_parser.add_argument("--route", default=ROUTE_PATH)
+    arg_parser.add_argument("--out", default=SECTOR_TIMES_PATH)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    table = compute_sector_times(args.directory, args.route, args.workers)
+    table.to_parquet(args.out, index=False)
+    print(f"Zapisano {len(table)} przejazdów sektorów do {args.out} w {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
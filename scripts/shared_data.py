@@ -0,0 +1,97 @@
+"""
+Dane współdzielone między sesjami i procesami serwera (Arrow IPC + mmap).
+
+Lista startowa i punkty trasy są zapisywane raz do plików Arrow IPC
+(bez kompresji) w katalogu cache/shared/, a każdy proces podłącza je przez
+pa.memory_map. Kolumny liczbowe bez braków trafiają do pandas bez kopiowania
+(wskazują wprost na zmapowany plik), więc N workerów korzysta z tych samych
+stron pamięci w cache systemu operacyjnego. Kolumny tekstowe i logiczne
+Arrow i tak konwertuje do obiektów NumPy - to jedna kopia na proces, bo
+podłączona ramka jest trzymana w st.cache_resource.
+
+Zmapowane kolumny są tylko do odczytu: próba zapisu kończy się ValueError
+zamiast po cichu zmienić dane wszystkim sesjom.
+
+Nazwa pliku to <name>_<skrót źródła>_<skrót wersji>.arrow - publikacja nowej
+wersji usuwa tylko starsze wersje tego samego źródła (np. tej samej trasy
+GPX), a nie dane innych plików.
+"""
+import hashlib
+import os
+
+import pyarrow as pa
+
+SHARED_DIR = os.path.join("cache", "shared")
+
+
+# ile razy shared_frame ponawia podłączenie pliku usuniętego przez inny proces
+ATTACH_ATTEMPTS = 3
+
+
+def _token(key, length):
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:length]
+
+
+def shared_path(name, source, version, shared_dir=SHARED_DIR):
+    """
+    Ścieżka pliku Arrow dla danych name ze źródła source (np. ścieżki pliku)
+    w wersji version (dowolne repr-owalne klucze).
+    """
+    return os.path.join(shared_dir, f"{name}_{_token(source, 8)}_{_token(version, 16)}.arrow")
+
+
+def publish_frame(df, path):
+    """
+    Zapisuje DataFrame (z indeksem) do pliku Arrow IPC.
+
+    Zapis do pliku tymczasowego + os.replace - bezpieczne, gdy kilka
+    procesów publikuje te same dane naraz. Starsze wersje tego samego źródła
+    (ten sam prefiks <name>_<skrót źródła>_) są usuwane; procesy, które je
+    jeszcze mapują, zachowują dostęp do czasu zamknięcia mapowania.
+    """
+    directory, filename = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+    prefix = filename.rsplit("_", 1)[0] + "_"  # <name>_<skrót źródła>_
+    for old in os.listdir(directory):
+        if old.startswith(prefix) and old.endswith(".arrow") and old != filename:
+            try:
+                os.remove(os.path.join(directory, old))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def attach_frame(path):
+    """DataFrame podłączony do pliku Arrow przez mmap (kolumny liczbowe bez kopii, tylko do odczytu)."""
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    # split_blocks: każda kolumna osobnym blokiem, bez sklejania (i kopiowania) w bloki 2D
+    return table.to_pandas(split_blocks=True)
+
+
+def shared_frame(name, source, version, build, shared_dir=SHARED_DIR):
+    """
+    Zwraca podłączoną ramkę name ze źródła source w wersji version; przy
+    pierwszym użyciu (w dowolnym procesie) buduje ją funkcją build() i publikuje.
+
+    Między sprawdzeniem pliku a podłączeniem inny proces może go usunąć
+    (publikując nowszą wersję) - wtedy ramka jest budowana i publikowana
+    ponownie. Po ATTACH_ATTEMPTS nieudanych próbach zwracana jest ramka
+    zbudowana lokalnie, bez współdzielenia.
+    """
+    path = shared_path(name, source, version, shared_dir)
+    for _ in range(ATTACH_ATTEMPTS):
+        if not os.path.exists(path):
+            publish_frame(build(), path)
+        try:
+            return attach_frame(path)
+        except FileNotFoundError:
+            continue
+    return build()
+
@@ -0,0 +1,116 @@
+"""
+Siatkowy indeks przestrzenny punktów (lat/lon) z wektorowymi zapytaniami.
+
+Punkty rzutowane są do lokalnego układu równoodległościowego [km] i
+sortowane wg komórki siatki cell_km x cell_km (układ CSR). Zapytanie
+przegląda 3x3 sąsiednie komórki, więc znajduje wszystkie punkty w promieniu
+cell_km - bez pętli po zapytaniach.
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class GridIndex:
+    """
+    Atrybuty
+    --------
+    x, y : np.ndarray
+        Współrzędne punktów w lokalnym rzucie [km].
+    cell_km : float
+        Rozmiar komórki - największy promień, dla którego wynik jest pełny.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_km, lat0=None):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if len(latitudes) == 0:
+            raise ValueError("Indeks przestrzenny wymaga co najmniej jednego punktu.")
+        self.cell_km = float(cell_km)
+        self._lat0 = np.radians(latitudes.mean() if lat0 is None else lat0)
+        self.x, self.y = self.project(latitudes, longitudes)
+
+        keys = self._cell_keys(np.floor(self.x / self.cell_km), np.floor(self.y / self.cell_km))
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+
+    def __len__(self):
+        return len(self.x)
+
+    @staticmethod
+    def _cell_keys(cx, cy):
+        # klucz komórki w jednej liczbie int64 (przesunięcie, żeby obsłużyć ujemne indeksy)
+        return (cx.astype(np.int64) + (1 << 31)) * (1 << 32) + (cy.astype(np.int64) + (1 << 31))
+
+    def project(self, latitudes, longitudes):
+        """Rzut lat/lon -> (x, y) [km] w układzie indeksu."""
+        lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+        lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+        return EARTH_RADIUS_KM * lon * np.cos(self._lat0), EARTH_RADIUS_KM * lat
+
+    def candidates(self, qx, qy):
+        """Pary (indeks zapytania, indeks punktu) z sąsiednich 3x3 komórek."""
+        cx = np.floor(qx / self.cell_km)
+        cy = np.floor(qy / self.cell_km)
+        query_idx, point_idx = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                keys = self._cell_keys(cx + dx, cy + dy)
+                lo = np.searchsorted(self._sorted_keys, keys, side="left")
+                hi = np.searchsorted(self._sorted_keys, keys, side="right")
+                counts = hi - lo
+                total = counts.sum()
+                if total == 0:
+                    continue
+                # rozwinięcie zakresów [lo, hi) bez pętli po zapytaniach
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                query_idx.append(np.repeat(np.arange(len(keys)), counts))
+                point_idx.append(self._order[np.repeat(lo, counts) + offsets])
+        if not query_idx:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(query_idx), np.concatenate(point_idx)
+
+    def best(self, qx, qy, score_fn=None, max_score=np.inf):
+        """
+        Dla każdego zapytania zwraca (indeks punktu, wynik) o najmniejszym wyniku
+        (domyślnie odległość [km]; score_fn(dist, q, p) pozwala go zmienić);
+        -1 / inf, gdy brak kandydata <= max_score.
+        """
+        n = len(qx)
+        best_idx = np.full(n, -1, dtype=np.int64)
+        best_score = np.full(n, np.inf)
+        q, p = self.candidates(qx, qy)
+        if len(q) == 0:
+            return best_idx, best_score
+
+        dist = np.hypot(qx[q] - self.x[p], qy[q] - self.y[p])
+        score = dist if score_fn is None else score_fn(dist, q, p)
+        keep = score <= max_score
+        q, p, score = q[keep], p[keep], score[keep]
+
+        # najlepszy kandydat dla każdego zapytania: sortowanie (zapytanie, wynik)
+        order = np.lexsort((score, q))
+        q, p, score = q[order], p[order], score[order]
+        first = np.ones(len(q), dtype=bool)
+        first[1:] = q[1:] != q[:-1]
+        best_idx[q[first]] = p[first]
+        best_score[q[first]] = score[first]
+        return best_idx, best_score
+
+    def nearest(self, latitudes, longitudes, max_distance_km=None):
+        """Najbliższy punkt indeksu (indeks, odległość [km]) w promieniu max_distance_km (<= cell_km)."""
+        qx, qy = self.project(latitudes, longitudes)
+        limit = self.cell_km if max_distance_km is None else min(max_distance_km, self.cell_km)
+        return self.best(qx, qy, max_score=limit)
+
+    def headings(self):
+        """Jednostkowe wektory kierunku kolejnych punktów (różnica centralna), gdy punkty tworzą linię."""
+        return unit_headings(self.x, self.y)
+
+
+def unit_headings(x, y):
+    """Jednostkowe wektory kierunku ruchu wzdłuż ciągu punktów (0 dla punktów w miejscu)."""
+    dx, dy = np.gradient(x), np.gradient(y)
+    norm = np.hypot(dx, dy)
+    safe = np.where(norm > 0, norm, 1.0)
+    return np.where(norm > 0, dx / safe, 0.0), np.where(norm > 0, dy / safe, 0.0)
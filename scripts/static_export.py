@@ -0,0 +1,275 @@
+"""
+Statyczna wersja dashboardu do publikacji przy dużym ruchu.
+
+Wszystkie kombinacje filtrów (płeć x pora startu x typ uczestnika - każdy
+niepusty podzbiór wartości) są liczone z góry: metryki ze "Statystyk",
+wykresy z "Wykresów" (JSON plotly) i ranking. Do tego uproszczona mapa,
+profil wysokościowy i tabela nachyleń. Wynik to katalog plików serwowany
+przez dowolny serwer plików - przełączanie filtrów odbywa się w przeglądarce
+przez wczytanie gotowego pliku JSON, bez sesji Streamlit.
+
+Użycie:
+    python -m scripts.static_export --out site/
+    python -m http.server -d site 8000
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+
+import numpy as np
+
+from scripts.charts import pie_counts, laps_counts, gauge_value, plotly_pie, plotly_laps_bar, plotly_gauge
+from scripts.preprocess import DATA_PATH, load_data, filter_key, apply_filters
+
+FILTER_COLUMNS = {"plec": "Płeć", "pora_startu": "Pora startu", "typ_uczestnika": "Typ uczestnika"}
+RANK_COLUMNS = ['Pozycja globalna', 'nr_startowy', 'nick', 'dystans_km', 'zrobione_pelne']
+TRACE_COLUMNS = ['czas_jazdy_h', 'czas_postojow_h', 'czasy_okrazen']
+PROFILE_IMAGE = "static/elevation_profile.png"
+# plotly.js z CDN w wersji, dla której plotly.py serializuje wykresy (jak include_plotlyjs="cdn")
+PLOTLY_CDN = "https://cdn.plot.ly/plotly-{version}.min.js"
+# tolerancja upraszczania śladu na mapie [m]
+MAP_TOLERANCE_M = 10.0
+
+
+def plotly_js_url():
+    """Adres plotly.js zgodnego z zainstalowanym plotly.py."""
+    from plotly.offline import get_plotlyjs_version
+
+    return PLOTLY_CDN.format(version=get_plotlyjs_version())
+
+
+def filter_combinations(df):
+    """Wszystkie klucze filtrów (jak filter_key) z niepustymi podzbiorami wartości."""
+    subsets = []
+    for column in FILTER_COLUMNS:
+        values = sorted(df[column].unique())
+        subsets.append([combo for r in range(1, len(values) + 1) for combo in itertools.combinations(values, r)])
+    return [filter_key(*combo) for combo in itertools.product(*subsets)]
+
+
+def payload_key(filters):
+    """Klucz kombinacji używany po stronie przeglądarki: 'K,M|ranny|nowy,stary'."""
+    return "|".join(",".join(values) for values in filters)
+
+
+def _mean(series):
+    return round(float(series.mean()), 2) if len(series) else 0.0
+
+
+def summary_metrics(df):
+    """Metryki ze strony "Statystyki" (bez DNS w części o okrążeniach i dystansie)."""
+    started = df[~df["DNS"]]
+    laps = started["zrobione_pelne"].value_counts()
+    return {
+        "zapisani": int(len(df)),
+        "dns": int(df["DNS"].sum()),
+        "wystartowali": int(len(started)),
+        "deklarowane": int(started["deklarowane"].sum()),
+        "wykrecone": int(started["zrobione_pelne"].sum()),
+        "srednio_deklarowane": _mean(started["deklarowane"]),
+        "srednio_zrobione": _mean(started["zrobione"]),
+        "mniej_niz_1": int(started["mniej_niz_1_orbita"].sum() + df["DNS"].sum()),
+        "okrazenia": {str(k): int(v) for k, v in sorted(laps.items())},
+        "sredni_dystans_km": _mean(started["dystans_km"]),
+        "suma_dystansu_km": round(float(started["dystans_km"].sum()), 2),
+    }
+
+
+def build_payload(df_filtered):
+    """Dane jednej kombinacji filtrów: metryki, wykresy (JSON plotly), ranking."""
+    figures = {
+        "pie_plec": plotly_pie(pie_counts(df_filtered, "plec"), 'Udział uczestników wg płci'),
+        "pie_typ": plotly_pie(pie_counts(df_filtered, "typ_uczestnika"), 'Udział wg typu uczestnika'),
+        "pie_pora": plotly_pie(pie_counts(df_filtered, "pora_startu"), 'Udział wg pory startu'),
+        "bar_okrazenia": plotly_laps_bar(laps_counts(df_filtered), "Liczba uczestników wg liczby zrobionych okrążeń"),
+        "gauge_realizacja": plotly_gauge(gauge_value(df_filtered), "Realizacja deklarowanych okrążeń [%]"),
+    }
+    columns = RANK_COLUMNS + [c for c in TRACE_COLUMNS if c in df_filtered.columns]
+    ranking = df_filtered[~df_filtered["DNS"]][columns]
+    return {
+        "metrics": summary_metrics(df_filtered),
+        "figures": {name: json.loads(fig.to_json()) for name, fig in figures.items()},
+        "ranking": json.loads(ranking.to_json(orient="split", index=False)),
+    }
+
+
+def export_track_assets(out_dir, gpx_path):
+    """Uproszczona mapa, profil i tabela nachyleń; zwraca podsumowanie trasy."""
+    from scripts.exports import simplify_indices
+    from scripts.gpx_parser import GPXParser
+    from scripts.elevation_profile import ElevationProfile
+    from scripts.map_generator import build_map
+    from scripts.spatial_index import GridIndex
+
+    parser = GPXParser(gpx_path)
+    track = parser.parse_to_track()
+    index = GridIndex(track.latitude, track.longitude, cell_km=1.0)
+    keep = simplify_indices(index.x, index.y, MAP_TOLERANCE_M / 1000)
+    build_map(track.coords()[keep].tolist()).save(os.path.join(out_dir, "mapa.html"))
+
+    if os.path.exists(PROFILE_IMAGE):
+        shutil.copyfile(PROFILE_IMAGE, os.path.join(out_dir, "profil.png"))
+
+    parser.track_df = track.to_dataframe()
+    slopes = ElevationProfile(parser.track_df).compute_slope_lengths(smooth_window=5, slope_thresholds=(2, 4, 5, 8))
+    return {
+        "dlugosc_km": round(float(track.km[-1]), 2),
+        "suma_podjazdow_m": round(float(parser.get_total_ascent()), 2),
+        "max_wysokosc_m": round(float(track.elevation.max()), 2),
+        "min_wysokosc_m": round(float(track.elevation.min()), 2),
+        "punkty_mapy": int(len(keep)),
+        "nachylenia": [
+            {"zakres": str(r), "dlugosc_km": round(float(l), 1)}
+            for r, l in zip(slopes["slope_range"], slopes["length_km"])
+        ],
+    }
+
+
+def export_bundle(out_dir, data_path=DATA_PATH, gpx_path="data/track/orbita25.gpx"):
+    """Zapisuje cały statyczny dashboard do out_dir; zwraca liczbę kombinacji filtrów."""
+    os.makedirs(os.path.join(out_dir, "data"), exist_ok=True)
+    df = load_data(data_path)
+
+    payloads = {}
+    for i, filters in enumerate(filter_combinations(df)):
+        name = f"data/{i:03d}.json"
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            json.dump(build_payload(apply_filters(df, *filters)), f, ensure_ascii=False, separators=(",", ":"))
+        payloads[payload_key(filters)] = name
+
+    manifest = {
+        "filters": [
+            {"column": column, "label": label, "values": sorted(df[column].unique().tolist())}
+            for column, label in FILTER_COLUMNS.items()
+        ],
+        "payloads": payloads,
+        "track": export_track_assets(out_dir, gpx_path),
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, default=lambda o: o.item() if isinstance(o, np.generic) else str(o))
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(INDEX_HTML.replace("{{PLOTLY_JS}}", plotly_js_url()))
+    return len(payloads)
+
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="pl">
+<head>
+<meta charset="utf-8">
+<title>Orbita'25 - Dashboard</title>
+<script src="{{PLOTLY_JS}}"></script>
+<style>
+  body { background: #0e1117; color: #fafafa; font-family: sans-serif; margin: 0; display: flex; }
+  aside { width: 240px; padding: 1rem; background: #262730; min-height: 100vh; }
+  main { flex: 1; padding: 1rem 2rem; }
+  .pill { display: inline-block; margin: 2px; padding: 4px 10px; border: 1px solid #555; border-radius: 1rem; cursor: pointer; }
+  .pill.on { background: #ff4b4b; border-color: #ff4b4b; }
+  .metrics { display: flex; flex-wrap: wrap; gap: 1.5rem; }
+  .metric small { display: block; color: #aaa; } .metric b { font-size: 1.8rem; }
+  .row { display: flex; flex-wrap: wrap; } .row > div { flex: 1; min-width: 320px; height: 380px; }
+  table { border-collapse: collapse; } td, th { padding: 2px 8px; border-bottom: 1px solid #333; text-align: right; }
+  iframe { border: 0; width: 100%; height: 420px; } img { max-width: 100%; background: white; }
+</style>
+</head>
+<body>
+<aside><h3>Filtry</h3><div id="filters"></div></aside>
+<main>
+  <h1>Dashboard Maratonu Kolarskiego - Orbita'25</h1>
+  <h2>Trasa</h2>
+  <div class="metrics" id="track"></div>
+  <iframe src="mapa.html"></iframe>
+  <img src="profil.png" alt="Profil wysokościowy trasy">
+  <h2>Statystyki</h2>
+  <div id="empty" hidden>Brak danych dla wybranych filtrów</div>
+  <div id="content">
+    <div class="metrics" id="metrics"></div>
+    <div class="row"><div id="pie_plec"></div><div id="pie_typ"></div><div id="pie_pora"></div></div>
+    <div class="row"><div id="bar_okrazenia" style="flex:2"></div><div id="gauge_realizacja"></div></div>
+    <h2>Ranking</h2>
+    <table id="ranking"></table>
+  </div>
+</main>
+<script>
+const cache = new Map();
+let manifest, selected;
+
+// elementy budowane przez createElement / textContent - wartości z danych (np. nick) nigdy nie trafiają do innerHTML
+function el(tag, props, ...children) {
+  const node = Object.assign(document.createElement(tag), props);
+  node.append(...children.map(c => c instanceof Node ? c : String(c ?? "")));
+  return node;
+}
+
+const metric = (label, value) => el("div", {className: "metric"}, el("small", {}, label), el("b", {}, value));
+
+async function payload(key) {
+  if (!cache.has(key)) cache.set(key, fetch(manifest.payloads[key]).then(r => r.json()));
+  return cache.get(key);
+}
+
+async function render() {
+  const key = manifest.filters.map(f => [...selected[f.column]].sort().join(",")).join("|");
+  const empty = !(key in manifest.payloads);
+  document.getElementById("empty").hidden = !empty;
+  document.getElementById("content").hidden = empty;
+  if (empty) return;
+  const data = await payload(key);
+  const m = data.metrics;
+  document.getElementById("metrics").replaceChildren(
+    metric("Liczba zapisanych", m.zapisani), metric("DNS", m.dns), metric("Wystartowali", m.wystartowali),
+    metric("Deklarowane okrążenia", m.deklarowane), metric("Wykręcone okrążenia", m.wykrecone),
+    metric("Średni dystans", m.sredni_dystans_km + " km"), metric("Suma dystansu", m.suma_dystansu_km + " km"),
+  );
+  for (const [id, fig] of Object.entries(data.figures)) Plotly.react(id, fig.data, fig.layout, {responsive: true});
+  const r = data.ranking;
+  document.getElementById("ranking").replaceChildren(
+    el("tr", {}, el("th", {}, "Pozycja (z filtrem)"), ...r.columns.map(c => el("th", {}, c))),
+    ...r.data.map((row, i) => el("tr", {}, el("td", {}, i + 1), ...row.map(v => el("td", {}, v)))),
+  );
+}
+
+fetch("manifest.json").then(r => r.json()).then(m => {
+  manifest = m;
+  selected = Object.fromEntries(m.filters.map(f => [f.column, new Set(f.values)]));
+  const t = m.track;
+  document.getElementById("track").replaceChildren(
+    metric("Długość trasy", t.dlugosc_km + " km"), metric("Suma podjazdów", t.suma_podjazdow_m + " m"),
+    metric("Najwyższy punkt", t.max_wysokosc_m + " m n.p.m."), metric("Najniższy punkt", t.min_wysokosc_m + " m n.p.m."),
+    ...t.nachylenia.map(s => metric(s.zakres, s.dlugosc_km + " km")),
+  );
+  document.getElementById("filters").replaceChildren(...m.filters.flatMap(f => [
+    el("p", {}, f.label),
+    ...f.values.map(v => {
+      const pill = el("span", {className: "pill on"}, v);
+      pill.onclick = () => {
+        const values = selected[f.column];
+        values.has(v) ? values.delete(v) : values.add(v);
+        pill.classList.toggle("on");
+        render();
+      };
+      return pill;
+    }),
+  ]));
+  render();
+});
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="site", help="katalog wynikowy")
+    parser.add_argument("--data", default=DATA_PATH, help="lista startowa (xlsx)")
+    parser.add_argument("--gpx", default="data/track/orbita25.gpx", help="trasa GPX")
+    args = parser.parse_args()
+
+    n = export_bundle(args.out, args.data, args.gpx)
+    print(f"Zapisano {n} kombinacji filtrów do {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Analiza śladów zawodników (GPX/FIT z czasem) względem pętli Orbity.
+
+Każdy punkt śladu dopasowywany jest do najbliższego punktu trasy (indeks
+przestrzenny nad trasą zagęszczoną do stałego kroku), co daje km trasy.
+Z "rozwiniętego" km (przejścia przez metę zwiększają licznik pętli)
+liczone są ukończone okrążenia, czasy okrążeń oraz postoje.
+
+Użycie:
+    python -m scripts.trace_analysis slady/ --out data/transformed/trace_stats.csv --workers 8
+
+Nazwa pliku śladu powinna zaczynać się od numeru startowego (np. '123_nick.gpx').
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from scripts.spatial_index import GridIndex, EARTH_RADIUS_KM, unit_headings
+from scripts.track import resample_dataframe
+from scripts.gpx_parser import NO_TIME
+from scripts.track_store import TRACK_EXTENSIONS, load_track, parser_for
+
+ROUTE_PATH = "data/track/orbita25.gpx"
+
+
+# ========================
+# Odczyt śladów
+# ========================
+
+def read_trace(path):
+    """Zwraca DataFrame śladu ['latitude', 'longitude', 'time'] (time: int64, sekundy epoki)."""
+    if os.path.splitext(path)[1].lower() not in TRACK_EXTENSIONS:
+        raise ValueError(f"Nieobsługiwany format śladu: {path}")
+    # surowe punkty z parsera (bez liczenia dystansu punkt po punkcie)
+    lats, lons, _, times = parser_for(path).read_raw()
+    has_time = times != NO_TIME
+    if not has_time.any():
+        raise ValueError(f"Ślad bez punktów z czasem: {path}")
+    trace = pd.DataFrame({"latitude": lats[has_time], "longitude": lons[has_time], "time": times[has_time]})
+    return trace.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def start_number(path):
+    """Numer startowy z początku nazwy pliku (albo None)."""
+    match = re.match(r"(\d+)", os.path.basename(path))
+    return int(match.group(1)) if match else None
+
+
+# ========================
+# Dopasowanie do trasy
+# ========================
+
+class RouteIndex:
+    """
+    Indeks trasy do dopasowywania śladów.
+
+    Atrybuty
+    --------
+    route_km : np.ndarray
+        km trasy w punktach zagęszczonej siatki.
+    length_km : float
+        Długość pętli.
+    max_offroute_km : float
+        Punkty dalej od trasy nie są dopasowywane.
+
+    Odcinki pętli jechane tą samą drogą w obie strony (np. dojazd i powrót
+    z Częstochowy) rozróżniane są kierunkiem jazdy: kandydat o przeciwnym
+    kierunku dostaje karę większą niż max_offroute_km.
+    """
+
+    def __init__(self, route_df, step_km=0.02, max_offroute_km=0.1):
+        dense = resample_dataframe(route_df[["km", "latitude", "longitude"]], step_km)
+        self.route_km = dense["km"].to_numpy()
+        self.length_km = float(self.route_km[-1])
+        self.max_offroute_km = max_offroute_km
+        self._index = GridIndex(dense["latitude"], dense["longitude"], cell_km=max_offroute_km)
+        self._hx, self._hy = self._index.headings()
+
+    @classmethod
+    def from_file(cls, path=ROUTE_PATH, **kwargs):
+        return cls(load_track(path), **kwargs)
+
+    def match(self, latitudes, longitudes):
+        """km trasy dla każdego punktu (NaN dla punktów poza trasą)."""
+        qx, qy = self._index.project(latitudes, longitudes)
+        hx, hy = unit_headings(qx, qy)
+        penalty = 2 * self.max_offroute_km
+
+        def score(dist, q, p):
+            opposite = hx[q] * self._hx[p] + hy[q] * self._hy[p] < 0
+            return dist + penalty * opposite
+
+        idx, _ = self._index.best(qx, qy, score_fn=score, max_score=self.max_offroute_km + penalty)
+        route_km = np.full(len(idx), np.nan)
+        route_km[idx >= 0] = self.route_km[idx[idx >= 0]]
+        return route_km
+
+
+def _pair_distance_km(lat1, lon1, lat2, lon2):
+    """Odległość haversine [km] między parami punktów."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def runs(mask):
+    """Początki i końce (wyłącznie) ciągłych przebiegów True."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def unwrap_route_km(route_km, length_km, start_tolerance_km=1.0):
+    """
+    Zamienia km trasy (0..L) na km "rozwinięty" - przejście przez metę dodaje L.
+    Start tuż przed linią mety (w granicy start_tolerance_km) traktowany jest jako km 0.
+    """
+    step = np.diff(route_km)
+    wraps = np.where(step < -length_km / 2, 1, np.where(step > length_km / 2, -1, 0))
+    unwrapped = route_km + length_km * np.concatenate(([0], np.cumsum(wraps)))
+    if len(unwrapped) and unwrapped[0] > length_km - start_tolerance_km:
+        unwrapped = unwrapped - length_km
+    return unwrapped
+
+
+def trace_progress(route_km, t, length_km):
+    """
+    Zwraca (czas, postęp [km]) dla dopasowanych punktów śladu. Postęp to
+    rozwinięty km trasy, niemalejący (cofnięcia GPS są pomijane).
+    """
+    matched = ~np.isnan(route_km)
+    progress = np.maximum.accumulate(unwrap_route_km(route_km[matched], length_km))
+    return t[matched].astype(np.float64), progress
+
+
+def crossing_times(progress, t, thresholds):
+    """
+    Czas przekroczenia każdej "bramki" (wartości postępu) - interpolowany liniowo
+    między sąsiednimi punktami; NaN dla bramek, do których ślad nie dotarł.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    hi = np.searchsorted(progress, thresholds, side="left")
+    reached = (hi < len(progress)) & (len(progress) > 0)
+    hi = np.minimum(hi, len(progress) - 1)
+    lo = np.maximum(hi - 1, 0)
+    span = progress[hi] - progress[lo]
+    frac = np.divide(thresholds - progress[lo], span, out=np.ones_like(span), where=span > 0)
+    crossing = t[lo] + np.clip(frac, 0, 1) * (t[hi] - t[lo])
+    return np.where(reached, crossing, np.nan)
+
+
+def _merge_runs(t, starts, ends, max_gap_s):
+    """Łączy przebiegi oddzielone krótszą niż max_gap_s przerwą."""
+    if len(starts) == 0:
+        return starts, ends
+    new_run = np.concatenate(([True], t[starts[1:]] - t[ends[:-1]] >= max_gap_s))
+    return starts[new_run], ends[np.concatenate((new_run[1:], [True]))]
+
+
+def analyze_trace(trace, route, stop_speed_kmh=3.0, min_stop_s=60, stop_window_s=30, lap_tolerance_km=0.3):
+    """
+    Analizuje jeden ślad. Zwraca słownik ze statystykami, czasami okrążeń [s]
+    i listą postojów [(km trasy, czas [s])].
+
+    Prędkość do wykrywania postojów liczona jest na oknie stop_window_s,
+    a postoje przerwane krótkim "ruchem" (szum GPS) są łączone. Okrążenie
+    zakończone w granicy lap_tolerance_km przed metą jest liczone.
+    """
+    lat = trace["latitude"].to_numpy(dtype=np.float64)
+    lon = trace["longitude"].to_numpy(dtype=np.float64)
+    t = trace["time"].to_numpy(dtype=np.int64)
+
+    route_km = route.match(lat, lon)
+    matched = ~np.isnan(route_km)
+    stats = {
+        "punkty": len(t),
+        "dopasowanie": round(float(matched.mean()), 3),
+        "czas_calkowity_s": int(t[-1] - t[0]),
+    }
+
+    # --- okrążenia ---
+    laps = []
+    progress_all = np.zeros(len(t))
+    if matched.sum() >= 2:
+        t_m, progress = trace_progress(route_km, t, route.length_km)
+        # postęp dla wszystkich punktów (ostatni znany dla punktów niedopasowanych)
+        last_matched = np.maximum.accumulate(np.where(matched, np.arange(len(t)), 0))
+        progress_all = progress[np.clip(np.cumsum(matched)[last_matched] - 1, 0, None)]
+
+        n_laps = int(max(np.floor((progress[-1] + lap_tolerance_km) / route.length_km), 0))
+        thresholds = np.minimum(route.length_km * np.arange(1, n_laps + 1), progress[-1])
+        crossing = crossing_times(progress, t_m, thresholds)
+        laps = np.diff(np.concatenate(([float(t[0])], crossing))).round().astype(int).tolist()
+        stats["dystans_km"] = round(float(progress[-1] - max(progress[0], 0)), 2)
+    else:
+        stats["dystans_km"] = 0.0
+    stats["okrazenia"] = len(laps)
+
+    # --- postoje ---
+    n = len(t)
+    i = np.arange(n - 1)
+    j = np.clip(np.searchsorted(t, t[:-1] + stop_window_s, side="left"), i + 1, n - 1)
+    dist = _pair_distance_km(lat[i], lon[i], lat[j], lon[j])
+    dt = (t[j] - t[i]).astype(np.float64)
+    speed = np.divide(dist * 3600, dt, out=np.zeros_like(dt), where=dt > 0)
+    starts, ends = _merge_runs(t, *runs(speed < stop_speed_kmh), max_gap_s=stop_window_s)
+    durations = t[ends] - t[starts]
+    long_stops = durations >= min_stop_s
+    # miejsce postoju z postępu jazdy - w miejscu kierunek jest nieokreślony
+    stop_km = progress_all[starts[long_stops]] % route.length_km
+    stops = list(zip(np.round(stop_km, 1).tolist(), durations[long_stops].tolist()))
+
+    stats["czas_postojow_s"] = int(durations[long_stops].sum())
+    stats["czas_jazdy_s"] = stats["czas_calkowity_s"] - stats["czas_postojow_s"]
+    stats["liczba_postojow"] = int(long_stops.sum())
+    return stats, laps, stops
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+# ========================
+# Przetwarzanie wsadowe
+# ========================
+
+_route = None
+
+
+def _init_worker(route_path, max_offroute_km):
+    # indeks trasy budowany raz na proces
+    global _route
+    _route = RouteIndex.from_file(route_path, max_offroute_km=max_offroute_km)
+
+
+def _analyze_file(path):
+    stats, laps, stops = analyze_trace(read_trace(path), _route)
+    return {
+        "plik": os.path.basename(path),
+        "nr_startowy": start_number(path),
+        **stats,
+        "czasy_okrazen": "; ".join(format_duration(s) for s in laps),
+        "postoje": "; ".join(f"{km} km: {format_duration(s)}" for km, s in stops),
+    }
+
+
+def analyze_traces(directory, route_path=ROUTE_PATH, workers=None, max_offroute_km=0.1):
+    """Analizuje wszystkie ślady z katalogu na puli procesów; zwraca (DataFrame, błędne pliki)."""
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(TRACK_EXTENSIONS)
+    )
+    if not paths:
+        raise ValueError(f"Brak śladów GPX/FIT w katalogu: {directory}")
+
+    rows, errors = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(route_path, max_offroute_km)) as pool:
+        futures = {pool.submit(_analyze_file, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:  # uszkodzony ślad nie przerywa analizy pozostałych
+                errors.append(futures[future])
+                print(f"BŁĄD {os.path.basename(futures[future])}: {e}")
+
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table = table.sort_values(["nr_startowy", "plik"]).reset_index(drop=True)
+    return table, errors
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("directory", help="katalog ze śladami zawodników (GPX/FIT)")
+    arg_parser.add_argument("--route", default=ROUTE_PATH)
+    arg_parser.add_argument("--out", default="data/transformed/trace_stats.csv")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--max-offroute-m", type=float, default=100)
+    args = arg_parser.parse_args()
+
+    t0 = time.perf_counter()
+    table, errors = analyze_traces(args.directory, args.route, args.workers, args.max_offroute_m / 1000)
+    table.to_csv(args.out, index=False)
+    print(f"Zapisano {len(table)} śladów do {args.out} w {time.perf_counter() - t0:.1f} s"
+          + (f" ({len(errors)} błędów)" if errors else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Zwarta reprezentacja trasy oparta na ciągłych tablicach NumPy.
+
+Kolumny trzymane są osobno (układ kolumnowy), w najmniejszym typie, który
+zachowuje potrzebną precyzję:
+
+- km        float32 (dla 1000 km rozdzielczość ~6 cm),
+- elevation float32 (dokładność GPS i tak jest rzędu metrów),
+- latitude / longitude float64 albo - przy delta_encode=True - int32 różnice
+  kolejnych punktów w jednostkach 1e-7 stopnia (~1 cm) plus wartość bazowa.
+
+Wycinki po km (`slice_km`) są widokami na te same tablice (bez kopiowania).
+"""
+import numpy as np
+import pandas as pd
+
+COORD_SCALE = 1e7  # 1e-7 stopnia na jednostkę różnicy
+# długość odcinka, na którym liczone jest nachylenie punktu [km]
+SLOPE_WINDOW_KM = 0.1
+
+
+class Track:
+    """
+    Trasa jako zestaw ciągłych tablic.
+
+    Atrybuty
+    --------
+    km : np.ndarray (float32)
+        Skumulowany dystans.
+    elevation : np.ndarray (float32)
+        Wysokość [m n.p.m.].
+    latitude, longitude : np.ndarray
+        Współrzędne (dekodowane przy pierwszym dostępie, jeśli trasa jest delta-kodowana).
+    """
+
+    def __init__(self, km, latitude, longitude, elevation, delta_encode=False, dtype=np.float32):
+        self.km = np.ascontiguousarray(km, dtype=dtype)
+        self.elevation = np.ascontiguousarray(elevation, dtype=dtype)
+        n = len(self.km)
+        if not (len(latitude) == len(longitude) == len(self.elevation) == n):
+            raise ValueError("Wszystkie kolumny trasy muszą mieć tę samą długość.")
+
+        self.delta_encoded = delta_encode
+        if delta_encode:
+            self._lat_base, self._lat_delta = self._encode(latitude)
+            self._lon_base, self._lon_delta = self._encode(longitude)
+            self._latitude = self._longitude = None
+        else:
+            self._latitude = np.ascontiguousarray(latitude, dtype=np.float64)
+            self._longitude = np.ascontiguousarray(longitude, dtype=np.float64)
+
+    # ========================
+    # Metody prywatne
+    # ========================
+
+    @staticmethod
+    def _encode(values):
+        """Zwraca (wartość bazowa, int32 różnice); różnica [0] jest zawsze ignorowana."""
+        fixed = np.round(np.asarray(values, dtype=np.float64) * COORD_SCALE).astype(np.int64)
+        if len(fixed) == 0:
+            return 0.0, np.zeros(0, dtype=np.int32)
+        delta = np.empty_like(fixed)
+        delta[0] = 0
+        delta[1:] = np.diff(fixed)
+        if np.abs(delta).max() > np.iinfo(np.int32).max:
+            raise ValueError("Zbyt duży skok współrzędnych dla kodowania różnicowego.")
+        return fixed[0] / COORD_SCALE, delta.astype(np.int32)
+
+    @staticmethod
+    def _decode(base, delta):
+        if len(delta) == 0:
+            return np.zeros(0, dtype=np.float64)
+        fixed = np.empty(len(delta), dtype=np.int64)
+        fixed[0] = 0
+        np.cumsum(delta[1:], out=fixed[1:])
+        return base + fixed / COORD_SCALE
+
+    @classmethod
+    def _from_arrays(cls, km, elevation, coords):
+        """Tworzy Track z gotowych tablic bez kopiowania (używane przy wycinkach)."""
+        track = cls.__new__(cls)
+        track.km, track.elevation = km, elevation
+        track.delta_encoded = coords[0]
+        if track.delta_encoded:
+            _, track._lat_base, track._lat_delta, track._lon_base, track._lon_delta = coords
+            track._latitude = track._longitude = None
+        else:
+            _, track._latitude, track._longitude = coords
+        return track
+
+    # ========================
+    # Metody publiczne
+    # ========================
+
+    @classmethod
+    def from_dataframe(cls, track_df, delta_encode=False, dtype=np.float32):
+        """Tworzy Track z DataFrame ['km', 'latitude', 'longitude', 'elevation']."""
+        return cls(
+            track_df["km"].to_numpy(), track_df["latitude"].to_numpy(),
+            track_df["longitude"].to_numpy(), track_df["elevation"].to_numpy(),
+            delta_encode=delta_encode, dtype=dtype,
+        )
+
+    @property
+    def latitude(self):
+        if self._latitude is None:
+            self._latitude = self._decode(self._lat_base, self._lat_delta)
+        return self._latitude
+
+    @property
+    def longitude(self):
+        if self._longitude is None:
+            self._longitude = self._decode(self._lon_base, self._lon_delta)
+        return self._longitude
+
+    def __len__(self):
+        return len(self.km)
+
+    def coords(self):
+        """Tablica (n, 2) [lat, lon] - np. dla folium (`.tolist()`)."""
+        return np.column_stack((self.latitude, self.longitude))
+
+    def slice_km(self, start_km, end_km):
+        """Zwraca fragment trasy w zakresie [start_km, end_km] jako widok (bez kopii tablic)."""
+        i = np.searchsorted(self.km, start_km, side="left")
+        j = np.searchsorted(self.km, end_km, side="right")
+        if self.delta_encoded:
+            # nowa baza = współrzędna punktu i; różnice od i+1 są wspólne z oryginałem
+            lat_base = self._lat_base + self._lat_delta[1:i + 1].sum(dtype=np.int64) / COORD_SCALE
+            lon_base = self._lon_base + self._lon_delta[1:i + 1].sum(dtype=np.int64) / COORD_SCALE
+            coords = (True, lat_base, self._lat_delta[i:j], lon_base, self._lon_delta[i:j])
+        else:
+            coords = (False, self.latitude[i:j], self.longitude[i:j])
+        return Track._from_arrays(self.km[i:j], self.elevation[i:j], coords)
+
+    def to_dataframe(self):
+        """DataFrame dla kodu opartego o pandas (kolumny numeryczne bez kopiowania tam, gdzie się da)."""
+        return pd.DataFrame({
+            "km": self.km,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "elevation": self.elevation,
+        }, copy=False)
+
+    def resample(self, step_km=0.01):
+        """
+        Zwraca trasę przeinterpolowaną na równomierną siatkę dystansu (co step_km).
+
+        Okna wygładzania i różnice liczone na takiej trasie mają stałą długość
+        w km, niezależnie od gęstości punktów w pliku źródłowym.
+        """
+        grid = uniform_grid(self.km, step_km)
+        km = self.km.astype(np.float64)
+        return Track(
+            grid,
+            np.interp(grid, km, self.latitude),
+            np.interp(grid, km, self.longitude),
+            np.interp(grid, km, self.elevation),
+            delta_encode=self.delta_encoded, dtype=self.km.dtype,
+        )
+
+    @property
+    def nbytes(self):
+        """Rozmiar danych trasy w pamięci [B] (bez zdekodowanego cache współrzędnych)."""
+        arrays = [self.km, self.elevation]
+        if self.delta_encoded:
+            arrays += [self._lat_delta, self._lon_delta]
+        else:
+            arrays += [self._latitude, self._longitude]
+        return sum(a.nbytes for a in arrays)
+
+
+def uniform_grid(km, step_km):
+    """Równomierna siatka od początku do końca trasy (ostatni punkt zawsze włączony)."""
+    if step_km <= 0:
+        raise ValueError("Krok resamplingu musi być dodatni.")
+    start, end = float(km[0]), float(km[-1])
+    grid = np.arange(start, end, step_km, dtype=np.float64)
+    if len(grid) == 0 or grid[-1] < end:
+        grid = np.append(grid, end)
+    return grid
+
+
+def resample_dataframe(track_df, step_km=0.01):
+    """
+    Interpoluje wszystkie kolumny numeryczne trasy (DataFrame) na równomierną
+    siatkę 'km' co step_km. Kolumny nienumeryczne są pomijane.
+    """
+    km = track_df["km"].to_numpy(dtype=np.float64)
+    grid = uniform_grid(km, step_km)
+    columns = {"km": grid}
+    for column in track_df.columns:
+        if column != "km" and pd.api.types.is_numeric_dtype(track_df[column]):
+            columns[column] = np.interp(grid, km, track_df[column].to_numpy(dtype=np.float64))
+    return pd.DataFrame(columns)
+
+
+def point_slopes(km, elevation, window_km=SLOPE_WINDOW_KM):
+    """
+    Nachylenie [%] w każdym punkcie liczone na odcinku window_km wokół punktu
+    (wysokości z interpolacji) - odporne na szum GPS przy gęstych punktach.
+    """
+    km = np.asarray(km, dtype=np.float64)
+    elevation = np.asarray(elevation, dtype=np.float64)
+    lo = np.maximum(km - window_km / 2, km[0])
+    hi = np.minimum(km + window_km / 2, km[-1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (np.interp(hi, km, elevation) - np.interp(lo, km, elevation)) / ((hi - lo) * 1000) * 100
+    return np.where(hi > lo, slope, 0.0)
@@ -0,0 +1,76 @@
+"""
+Współdzielony cache sparsowanych tras na dysku.
+
+Trasy zapisywane są jako Parquet w katalogu cache/tracks/, pod nazwą będącą
+skrótem SHA-1 zawartości pliku źródłowego - ten sam plik (nawet pod inną
+nazwą) jest parsowany tylko raz, także przez wiele procesów naraz.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.gpx_parser import GPXParser
+from scripts.fit_parser import FITParser
+
+TRACK_CACHE_DIR = os.path.join("cache", "tracks")
+TRACK_EXTENSIONS = (".gpx", ".fit")
+# wersja formatu plików cache (2: kolumna 'time' z czasami punktów)
+CACHE_FORMAT = 2
+
+
+def parser_for(path):
+    """Zwraca parser odpowiedni dla rozszerzenia pliku."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".gpx":
+        return GPXParser(path)
+    if ext == ".fit":
+        return FITParser(path)
+    raise ValueError(f"Nieobsługiwany format trasy: {path}")
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Skrót SHA-1 zawartości pliku."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_parser(path, cache_dir=TRACK_CACHE_DIR):
+    """
+    Zwraca parser z wypełnionym track_df - z cache, jeśli trasa była już sparsowana.
+    """
+    parser = parser_for(path)
+    cache_path = os.path.join(cache_dir, f"{file_digest(path)}_v{CACHE_FORMAT}.parquet")
+    if os.path.exists(cache_path):
+        track_df = pd.read_parquet(cache_path)
+        if "time" in track_df.columns:
+            parser.timestamps = track_df.pop("time").to_numpy(dtype=np.int64)
+        parser.track_df = track_df
+        return parser
+
+    track_df = parser.parse_to_dataframe()
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = track_df if parser.timestamps is None else track_df.assign(time=parser.timestamps)
+    # zapis do pliku tymczasowego + os.replace - bezpieczne przy równoległych procesach
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    cached.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, cache_path)
+    return parser
+
+
+def load_track(path, cache_dir=TRACK_CACHE_DIR):
+    """Zwraca DataFrame trasy ['km', 'latitude', 'longitude', 'elevation']."""
+    return load_parser(path, cache_dir).track_df
+
+
+def find_track_files(directory):
+    """Lista plików GPX/FIT w katalogu (posortowana)."""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(TRACK_EXTENSIONS)
+    )
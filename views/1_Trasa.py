@@ -1,25 +1,22 @@
+import numpy as np
 import streamlit as st
-from scripts.gpx_parser import GPXParser
-from scripts.elevation_profile import ElevationProfile
+from scripts.resources import GPX_PATH, MAP_PATH, track_summary, slope_lengths, gradient_distribution, \
+    read_bytes, read_text, track_export, job_runner, artifact_path
+from scripts.exports import TRACK_FORMATS
+from scripts.elevation_profile import PROFILE_STEP_KM
 
 # --- Footer ---
 st.sidebar.markdown("Made with ❤️ by Michał Makowiejczuk")
 
-# GPX coords 
-parser = GPXParser("data/track/orbita25.gpx")
-df = parser.parse_to_dataframe()
-coords = df[['latitude', 'longitude']].values.tolist()
+# GPX track - statystyki liczone raz na proces, unieważniane zmianą pliku
+summary = track_summary(GPX_PATH)
 
 # bufet coords
 bufet_latlon = [50.716720597663816, 19.01338864353129]
 
 st.title("Trasa Orbity'25 (jedna pętla)")
 
-# slopes dataframe
-ElevationProfile = ElevationProfile(df, seg_unit_km=0.5)
-lengths = ElevationProfile.compute_slope_lengths(smooth_window=5, slope_thresholds=(2, 4, 5, 8))
-lengths.rename(columns={'length_km': 'Długość [km]', 'slope_range': 'Nachylenie'}, inplace=True)
-lengths["Długość [km]"] = lengths["Długość [km]"].round(1)
+DEFAULT_SLOPE_THRESHOLDS = [2, 4, 5, 8]
 color_map = {
     "< 2%": "lightgreen",
     "2 ~ 4%": "yellow",
@@ -27,27 +24,44 @@ color_map = {
     "5 ~ 8%": "orangered",
     ">= 8%": "maroon"
 }
-def color_cells(val):
-    return f"background-color: {color_map.get(val, 'white')}; color: black;"
-styled_df = (
-    lengths.style
-    .applymap(color_cells, subset=["Nachylenie"])
-    .format("{:.1f}", subset=["Długość [km]"])
-)
+
+# rozkład nachyleń liczony raz na proces - każdy zestaw progów to tylko wyszukiwanie binarne
+gradients = gradient_distribution(GPX_PATH, smooth_window=5)
 
 col1, col2 = st.columns([1, 3])
 
 with col1:
-    st.metric("Długość trasy", f"{round(df['km'].max(), 2)} km")
-    st.metric('Suma podjazdów', f"{round(parser.get_total_ascent(), 2)} m")
-    st.metric("Najwyższy punkt na trasie", f"{round(df['elevation'].max(), 2)} m n.p.m.")
-    st.metric("Najniższy punkt na trasie", f"{round(df['elevation'].min(), 2)} m n.p.m.")
+    st.metric("Długość trasy", f"{round(summary['length_km'], 2)} km")
+    st.metric('Suma podjazdów', f"{round(summary['total_ascent'], 2)} m")
+    st.metric("Najwyższy punkt na trasie", f"{round(summary['max_elevation'], 2)} m n.p.m.")
+    st.metric("Najniższy punkt na trasie", f"{round(summary['min_elevation'], 2)} m n.p.m.")
     st.write("## Długości segmentów według nachylenia")
-    st.dataframe(styled_df, hide_index=True)
+    slope_thresholds = st.multiselect("Progi nachylenia [%]", options=list(range(-10, 16)),
+                                      default=DEFAULT_SLOPE_THRESHOLDS)
+    slope_thresholds = sorted(slope_thresholds) or DEFAULT_SLOPE_THRESHOLDS
+    lengths = slope_lengths(GPX_PATH, smooth_window=5, slope_thresholds=slope_thresholds)
+    lengths = lengths.rename(columns={'length_km': 'Długość [km]', 'slope_range': 'Nachylenie'})
+    labels = list(lengths["Nachylenie"])
+    if slope_thresholds != DEFAULT_SLOPE_THRESHOLDS:
+        # plotly tylko dla własnych progów - domyślny widok nie płaci za jego import
+        from plotly.colors import sample_colorscale
+
+        colors = sample_colorscale("RdYlGn_r", np.linspace(0, 1, len(labels)))
+        color_map = dict(zip(labels, colors))
+
+    def color_cells(val):
+        return f"background-color: {color_map.get(val, 'white')}; color: black;"
+
+    st.dataframe(
+        lengths.style.applymap(color_cells, subset=["Nachylenie"]).format("{:.1f}", subset=["Długość [km]"]),
+        hide_index=True,
+    )
+    st.caption(f"Nachylenie liczone na równomiernej siatce co {PROFILE_STEP_KM * 1000:g} m, "
+               f"wysokość wygładzona na ~{5 * PROFILE_STEP_KM * 1000:g} m.")
+    steep = st.slider("Bardziej stromo niż [%]", min_value=0.0, max_value=15.0, value=6.0, step=0.5)
+    st.metric(f"Dystans powyżej {steep:g}%", f"{gradients.length_above(steep):.2f} km")
 
-    file_path = "./data/track/orbita25.gpx"
-    with open(file_path, "rb") as f:
-        gpx_data = f.read()
+    gpx_data = read_bytes(GPX_PATH)
 
     # download button for GPX file
     st.download_button(
@@ -57,13 +71,28 @@ with col1:
         mime="application/gpx+xml"  # typ MIME - GPX
     )
 
+    # pozostałe formaty trasy (generowane raz na wersję pliku GPX)
+    track_fmt = st.selectbox("Inny format trasy", list(TRACK_FORMATS),
+                             format_func={"geojson": "GeoJSON", "gpx": "GPX uproszczony",
+                                          "csv": "CSV (km, wysokość, nachylenie)"}.get)
+    mime, ext = TRACK_FORMATS[track_fmt]
+    st.download_button(
+        label="Pobierz",
+        data=track_export(track_fmt),
+        file_name=f"orbita25_uproszczona.{ext}" if track_fmt == "gpx" else f"orbita25.{ext}",
+        mime=mime,
+    )
+
 with col2:
     # map
-    with open("static/mapa_orbity.html", "r", encoding="utf-8") as f:
-        mapa_html = f.read()
+    # ostatni gotowy artefakt zadań w tle (scripts/jobs.py), a do tego czasu pliki ze static/
+    mapa_html = read_text(artifact_path("map", MAP_PATH))
 
     st.components.v1.html(mapa_html, height=400, width=2000)
 
     # elevation profile img
-    st.image("static/elevation_profile.png", caption="Profil wysokościowy trasy")
+    st.image(artifact_path("profile_png", "static/elevation_profile.png"), caption="Profil wysokościowy trasy")
+
+    for job in job_runner().active():
+        st.progress(job["progress"], text=f"Odświeżanie w tle: {job['kind']} ({job['status']})")
 
@@ -1,13 +1,17 @@
 import streamlit as st
 import numpy as np
-from scripts.preprocess import load_data
+from scripts.preprocess import sources_version, load_data, filter_key, apply_filters
+from scripts.exports import PARTICIPANT_FORMATS, participants_export
+from scripts.search import participant_index
 
 def format_value(value, total, mode):
     if mode == "Procenty" and total > 0:
         return f"{(value / total * 100):.1f}%"
     return value
 
-df = load_data()
+# jedna wersja danych (lista startowa + statystyki śladów) dla ramki, wyszukiwarki i eksportu
+version = sources_version()
+df = load_data(version=version)
 
 st.title("Podstawowe Statystyki")
 
@@ -20,7 +24,7 @@ pora = st.sidebar.pills("Pora startu", options=df["pora_startu"].unique(),
 typ = st.sidebar.pills("Typ uczestnika", options=df["typ_uczestnika"].unique(),
                        default=df["typ_uczestnika"].unique(), selection_mode="multi")
 
-df_filtered = df.query("plec in @plec and pora_startu in @pora and typ_uczestnika in @typ")
+df_filtered = apply_filters(df, plec, pora, typ)
 
 # --- Footer ---
 st.sidebar.markdown("---")
@@ -93,9 +97,53 @@ with tab2:
         st.metric("Suma dystansu wszystkich uczestników", f"{round(df_filtered["dystans_km"].sum(), 2)} km")
 
 with tab3:
+    # --- Wyszukiwarka zawodnika ---
+    query = st.text_input("Szukaj zawodnika", placeholder="nick lub numer startowy")
+    if query:
+        index = participant_index(version)
+        rows = index.search(query)
+        if len(rows) == 0:
+            st.warning("Nie znaleziono zawodnika")
+        else:
+            found = df.iloc[rows]
+            filtered_pos = index.filtered_positions(rows, df.index.get_indexer(df_filtered.index))
+            choice = 0
+            if len(rows) > 1:
+                choice = st.radio("Pasujący zawodnicy", range(len(rows)), horizontal=True,
+                                  format_func=lambda i: f"{found['nick'].iat[i]} (#{found['nr_startowy'].iat[i]})")
+            rider = found.iloc[choice]
+            st.subheader(f"{rider['nick']} - nr {rider['nr_startowy']}")
+            card = st.columns(4)
+            card[0].metric("Pozycja globalna", int(rider["Pozycja globalna"]))
+            card[1].metric("Pozycja (z filtrem)", int(filtered_pos[choice]) or "poza filtrem")
+            card[2].metric("Dystans", f"{rider['dystans_km']} km")
+            card[3].metric("Okrążenia (zrobione / deklarowane)",
+                           "DNS" if rider["DNS"] else f"{rider['zrobione_pelne']} / {rider['deklarowane']}")
+            if "czas_jazdy_h" in rider.index and not np.isnan(rider["czas_jazdy_h"]):
+                trace_card = st.columns(3)
+                trace_card[0].metric("Czas jazdy", f"{rider['czas_jazdy_h']} h")
+                trace_card[1].metric("Czas postojów", f"{rider['czas_postojow_h']} h")
+                trace_card[2].metric("Czasy okrążeń", rider["czasy_okrazen"])
+
     df_rank = df_filtered.sort_values(["dystans_km", "nr_startowy"], ascending=[False, True])
     df_rank.index = np.arange(1, len(df_rank) + 1) 
     df_rank.index.name = "Pozycja (z filtrem)"       
 
-    st.dataframe(df_rank[['Pozycja globalna' ,'nr_startowy', 'nick', 'dystans_km', 'zrobione_pelne']])
+    rank_columns = ['Pozycja globalna' ,'nr_startowy', 'nick', 'dystans_km', 'zrobione_pelne']
+    # kolumny ze śladów GPS (scripts/trace_analysis.py), jeśli zostały wczytane
+    rank_columns += [c for c in ['czas_jazdy_h', 'czas_postojow_h', 'czasy_okrazen'] if c in df_rank.columns]
+    st.dataframe(df_rank[rank_columns])
+
+    # eksport widoku po filtrach i przełączniku DNS (pełne kolumny)
+    col_fmt, col_btn = st.columns([1, 3])
+    with col_fmt:
+        export_fmt = st.selectbox("Format eksportu", list(PARTICIPANT_FORMATS), label_visibility="collapsed")
+    with col_btn:
+        mime, ext = PARTICIPANT_FORMATS[export_fmt]
+        st.download_button(
+            label="Pobierz ranking",
+            data=participants_export(export_fmt, filter_key(plec, pora, typ), include_dns, version),
+            file_name=f"orbita25_ranking.{ext}",
+            mime=mime,
+        )
 
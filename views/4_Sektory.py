@@ -0,0 +1,57 @@
+import os
+import streamlit as st
+import pandas as pd
+from scripts.preprocess import sources_version, load_data, filter_key, apply_filters
+from scripts.sectors import SECTOR_TIMES_PATH, SECTORS, best_times, sector_leaderboard
+from scripts.trace_analysis import format_duration
+
+
+@st.cache_data(max_entries=2)
+def load_best_times(path, version):
+    # najlepsze czasy liczone raz na wersję pliku - filtry działają już tylko na numerach startowych
+    return best_times(pd.read_parquet(path))
+
+
+@st.cache_data(max_entries=256)
+def cached_leaderboard(sektor, filters, times_version, data_version):
+    # klucz: wersja czasów sektorów i wersja listy startowej (ze statystykami śladów)
+    df_filtered = apply_filters(load_data(version=data_version), *filters)
+    board = sector_leaderboard(load_best_times(SECTOR_TIMES_PATH, times_version), df_filtered, sektor)
+    board["czas"] = board["czas_s"].map(format_duration)
+    board["predkosc_kmh"] = board["predkosc_kmh"].astype(float).round(1)
+    return board
+
+
+df = load_data()
+
+st.title("Sektory czasowe")
+
+# --- Filtry boczne ---
+st.sidebar.header("Filtry")
+plec = st.sidebar.pills("Płeć", options=df["plec"].unique(),
+                        default=df["plec"].unique(), selection_mode="multi")
+pora = st.sidebar.pills("Pora startu", options=df["pora_startu"].unique(),
+                        default=df["pora_startu"].unique(), selection_mode="multi")
+typ = st.sidebar.pills("Typ uczestnika", options=df["typ_uczestnika"].unique(),
+                       default=df["typ_uczestnika"].unique(), selection_mode="multi")
+
+# --- Footer ---
+st.sidebar.markdown("---")
+st.sidebar.markdown("Made with ❤️ by Michał Makowiejczuk")
+
+if not os.path.exists(SECTOR_TIMES_PATH):
+    st.info("Brak czasów sektorów. Wygeneruj je ze śladów zawodników: "
+            "`python -m scripts.sectors slady/`")
+else:
+    times_version = os.path.getmtime(SECTOR_TIMES_PATH)
+    sektor = st.selectbox("Sektor", SECTORS["sektor"])
+    bounds = SECTORS.set_index("sektor").loc[sektor]
+    st.caption(f"Od {bounds['start_km']} km do {bounds['end_km']} km "
+               f"({bounds['end_km'] - bounds['start_km']:.1f} km)")
+
+    board = cached_leaderboard(sektor, filter_key(plec, pora, typ), times_version, sources_version())
+    if board.empty:
+        st.warning("Brak przejazdów sektora dla wybranych filtrów")
+    else:
+        board.index.name = "Pozycja (z filtrem)"
+        st.dataframe(board[['nr_startowy', 'nick', 'czas', 'predkosc_kmh', 'okrazenie']])
@@ -0,0 +1,71 @@
+import streamlit as st
+import pandas as pd
+from scripts.preprocess import sources_version, load_data, filter_key, apply_filters
+from scripts.occupancy import START_HOURS, DEFAULT_SPEED_KMH, occupancy_grid
+from scripts.resources import track_summary
+
+
+@st.cache_data(max_entries=64)
+def cached_occupancy(filters, version, lap_km, speed, fatigue, start_ranny, start_wieczorny, time_step_min, km_step):
+    df_filtered = apply_filters(load_data(version=version), *filters)
+    return occupancy_grid(df_filtered, lap_km, time_step_min=time_step_min, km_step=km_step,
+                          start_hours={"ranny": start_ranny, "wieczorny": start_wieczorny},
+                          base_speed_kmh=speed, fatigue=fatigue)
+
+
+df = load_data()
+
+st.title("Obłożenie trasy")
+st.caption("Symulacja: ilu zawodników jest na danym odcinku pętli w kolejnych godzinach zawodów. "
+           "Pozycje wynikają z pory startu, przejechanego dystansu i założonego tempa.")
+
+# --- Filtry boczne ---
+st.sidebar.header("Filtry")
+plec = st.sidebar.pills("Płeć", options=df["plec"].unique(),
+                        default=df["plec"].unique(), selection_mode="multi")
+pora = st.sidebar.pills("Pora startu", options=df["pora_startu"].unique(),
+                        default=df["pora_startu"].unique(), selection_mode="multi")
+typ = st.sidebar.pills("Typ uczestnika", options=df["typ_uczestnika"].unique(),
+                       default=df["typ_uczestnika"].unique(), selection_mode="multi")
+
+st.sidebar.header("Założenia symulacji")
+speed = st.sidebar.slider("Średnia prędkość [km/h]", 15.0, 35.0, DEFAULT_SPEED_KMH, 0.5)
+fatigue = st.sidebar.slider("Spadek tempa na okrążenie [%]", 0, 15, 5) / 100
+start_ranny = st.sidebar.number_input("Start poranny [h]", 0.0, 23.5, START_HOURS["ranny"], 0.5)
+start_wieczorny = st.sidebar.number_input("Start wieczorny [h]", 0.0, 23.5, START_HOURS["wieczorny"], 0.5)
+km_step = st.sidebar.select_slider("Długość odcinka [km]", options=[1.0, 2.0, 5.0], value=2.0)
+
+# --- Footer ---
+st.sidebar.markdown("---")
+st.sidebar.markdown("Made with ❤️ by Michał Makowiejczuk")
+
+version = sources_version()
+# długość pętli z pliku trasy (zmienia się razem z GPX)
+lap_km = float(track_summary()["length_km"])
+grid, times_h, km_starts = cached_occupancy(filter_key(plec, pora, typ), version, lap_km, speed, fatigue,
+                                            start_ranny, start_wieczorny, 10, km_step)
+
+if grid.sum() == 0:
+    st.warning("Brak zawodników na trasie dla wybranych filtrów")
+else:
+    import plotly.graph_objects as go
+
+    active = grid.sum(axis=1)
+    peak = int(active.argmax())
+    col1, col2 = st.columns(2)
+    col1.metric("Najwięcej zawodników na trasie", int(active[peak]))
+    col2.metric("Godzina szczytu", f"{int(times_h[peak]) % 24:02d}:{int(round(times_h[peak] % 1 * 60)):02d}")
+
+    fig = go.Figure(go.Heatmap(
+        z=grid, x=km_starts, y=times_h, colorscale="YlOrRd",
+        colorbar=dict(title="Zawodnicy"),
+        hovertemplate="km %{x}<br>godz. %{y:.2f}<br>zawodników: %{z}<extra></extra>",
+    ))
+    fig.update_layout(xaxis_title="Kilometr pętli", yaxis_title="Godzina od północy przed startem",
+                      height=650, margin=dict(t=20))
+    st.plotly_chart(fig, use_container_width=True)
+
+    hour = st.slider("Rozkład na trasie o godzinie", float(times_h[0]), float(times_h[-1]),
+                     float(times_h[peak]), 10 / 60)
+    row = grid[min(int(times_h.searchsorted(hour)), len(times_h) - 1)]
+    st.bar_chart(pd.Series(row, index=km_starts.round(1)), x_label="Kilometr pętli", y_label="Zawodnicy")
@@ -0,0 +1,98 @@
+import streamlit as st
+import pandas as pd
+from scripts.preprocess import sources_version, load_data, filter_key, apply_filters
+from scripts.resources import GPX_PATH, file_signature, load_track
+from scripts.pacing import BASE_POWER_W, FATIGUE, STOP_MIN_PER_LAP, NIGHT_FACTOR, POWER_SIGMA, TIME_LIMIT_H, backtest, predict
+
+
+@st.cache_data(max_entries=64)
+def cached_prediction(filters, version, track_signature, power_m, power_k, fatigue, stop_min, night_factor, sigma):
+    parser, _ = load_track(GPX_PATH)
+    return predict(apply_filters(load_data(version=version), *filters), parser.track_df,
+                   base_power={"M": power_m, "K": power_k}, fatigue=fatigue, stop_min=stop_min,
+                   night_factor=night_factor, sigma=sigma)
+
+
+df = load_data()
+
+st.title("Prognoza tempa")
+st.caption("Przewidywane czasy okrążeń i szansa na przejechanie deklarowanej liczby okrążeń w limicie "
+           f"{TIME_LIMIT_H:g} h. Prędkość na każdych 100 m pętli wynika z bilansu mocy (nachylenie, opór "
+           "toczenia i powietrza), moc - z płci albo ze śladu GPS zawodnika, jeśli jest.")
+st.info("Założenia modelu nie są skalibrowane na wynikach - prognoza mówi, czy tempo pozwala zmieścić "
+        "deklarację w limicie, ale nie uwzględnia rezygnacji z jazdy. Porównanie z wynikami 2025 "
+        "jest na dole strony.")
+
+# --- Filtry boczne ---
+st.sidebar.header("Filtry")
+plec = st.sidebar.pills("Płeć", options=df["plec"].unique(),
+                        default=df["plec"].unique(), selection_mode="multi")
+pora = st.sidebar.pills("Pora startu", options=df["pora_startu"].unique(),
+                        default=df["pora_startu"].unique(), selection_mode="multi")
+typ = st.sidebar.pills("Typ uczestnika", options=df["typ_uczestnika"].unique(),
+                       default=df["typ_uczestnika"].unique(), selection_mode="multi")
+
+st.sidebar.header("Założenia modelu")
+power_m = st.sidebar.slider("Moc - mężczyźni [W]", 60, 250, int(BASE_POWER_W["M"]), 5)
+power_k = st.sidebar.slider("Moc - kobiety [W]", 50, 220, int(BASE_POWER_W["K"]), 5)
+fatigue = st.sidebar.slider("Spadek mocy na okrążenie [%]", 0, 15, int(FATIGUE * 100)) / 100
+stop_min = st.sidebar.slider("Postój po okrążeniu [min]", 0, 90, int(STOP_MIN_PER_LAP), 5)
+night_factor = st.sidebar.slider("Moc w nocy [%]", 60, 100, int(NIGHT_FACTOR * 100), 5) / 100
+sigma = st.sidebar.slider("Niepewność mocy (sigma)", 0.05, 0.5, POWER_SIGMA, 0.05)
+
+# --- Footer ---
+st.sidebar.markdown("---")
+st.sidebar.markdown("Made with ❤️ by Michał Makowiejczuk")
+
+# wersja razem ze statystykami śladów - z nich kalibrowana jest moc zawodników
+version = sources_version()
+table, lap_times = cached_prediction(filter_key(plec, pora, typ), version, file_signature(GPX_PATH),
+                                     power_m, power_k, fatigue, stop_min, night_factor, sigma)
+
+if table.empty:
+    st.warning("Brak zawodników dla wybranych filtrów")
+else:
+    import plotly.express as px
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Zawodnicy", len(table))
+    col2.metric("Oczekiwana liczba zrealizowanych deklaracji", f"{table['szansa'].sum():.0f}")
+    col3.metric("Zagrożone deklaracje (szansa < 50%)", int((table["szansa"] < 0.5).sum()))
+
+    by_declared = (
+        table.groupby("deklarowane")
+        .agg(zawodnicy=("szansa", "size"), szansa=("szansa", "mean"), czas_h=("czas_deklaracji_h", "median"))
+        .reset_index()
+    )
+    fig = px.bar(by_declared, x="deklarowane", y="szansa", text=by_declared["szansa"].map("{:.0%}".format),
+                 hover_data=["zawodnicy", "czas_h"],
+                 labels={"deklarowane": "Deklarowane okrążenia", "szansa": "Średnia szansa",
+                         "zawodnicy": "Zawodnicy", "czas_h": "Mediana czasu [h]"})
+    fig.update_layout(yaxis_tickformat=".0%", yaxis_range=[0, 1.05], margin=dict(t=20))
+    st.plotly_chart(fig, use_container_width=True)
+
+    laps = pd.DataFrame(lap_times, index=table.index).round(2)
+    laps.columns = [f"Okr. {k + 1} [h]" for k in laps.columns]
+    laps = laps.loc[:, laps.notna().any()]
+    st.dataframe(
+        table.drop(columns="okrazenie_1_h").rename(columns={
+            "nr_startowy": "Nr", "nick": "Nick", "plec": "Płeć", "pora_startu": "Start",
+            "deklarowane": "Deklaracja", "moc_w": "Moc [W]",
+            "okrazenia_prognoza": "Okrążenia w limicie", "czas_deklaracji_h": "Czas deklaracji [h]",
+            "szansa": "Szansa",
+        }).join(laps).sort_values("Szansa"),
+        hide_index=True,
+        column_config={"Szansa": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1)},
+    )
+
+    st.subheader("Prognoza a wyniki 2025")
+    result = backtest(table, df)
+    st.caption(f"Zrealizowane deklaracje: prognoza {table['szansa'].mean():.0%}, "
+               f"w rzeczywistości {(result['wynik'] * result['zawodnicy']).sum() / len(table):.0%}.")
+    percent = st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1)
+    st.dataframe(
+        result.rename(columns={"deklarowane": "Deklaracja", "zawodnicy": "Zawodnicy",
+                               "prognoza": "Średnia szansa", "wynik": "Zrealizowało"}),
+        hide_index=True,
+        column_config={"Średnia szansa": percent, "Zrealizowało": percent},
+    )